@@ -3,12 +3,23 @@ from django.contrib.auth.admin import UserAdmin
 
 from media.models import User, Genre, Movie, Anime, Cartoon, Series
 
+AGGREGATE_FIELDS = [
+    "rating_sum",
+    "rating_count",
+    "average_rate",
+    "watching_count",
+    "want_to_watch_count",
+    "dropped_count",
+    "finished_count",
+]
+
 
 @admin.register(Movie)
 class MovieAdmin(admin.ModelAdmin):
     list_display = ["title", "year_released"]
     list_filter = ["year_released"]
     search_fields = ["title"]
+    readonly_fields = AGGREGATE_FIELDS
 
 
 @admin.register(Anime)
@@ -16,6 +27,7 @@ class AnimeAdmin(admin.ModelAdmin):
     list_display = ["title", "year_released", "seasons", "episodes"]
     list_filter = ["year_released", "seasons", "episodes"]
     search_fields = ["title"]
+    readonly_fields = AGGREGATE_FIELDS
 
 
 @admin.register(Cartoon)
@@ -23,6 +35,7 @@ class CartoonAdmin(admin.ModelAdmin):
     list_display = ["title", "year_released", "seasons", "episodes"]
     list_filter = ["year_released", "seasons", "episodes"]
     search_fields = ["title"]
+    readonly_fields = AGGREGATE_FIELDS
 
 
 @admin.register(Series)
@@ -30,6 +43,7 @@ class SeriesAdmin(admin.ModelAdmin):
     list_display = ["title", "year_released", "seasons", "episodes"]
     list_filter = ["year_released", "seasons", "episodes"]
     search_fields = ["title"]
+    readonly_fields = AGGREGATE_FIELDS
 
 
 @admin.register(Genre)
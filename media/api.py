@@ -0,0 +1,408 @@
+import json
+from functools import partial, wraps
+
+from django import forms
+from django.db.models import Prefetch, QuerySet
+from django.http import Http404, HttpRequest, JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from media.batch import apply_user_data_updates
+from media.feed import get_feed
+from media.forms import (
+    MediaFilterForm,
+    MediaOrderForm,
+    MediaSearchForm,
+    MovieOrderForm,
+    StatusFilterForm,
+)
+from media.genres import filter_by_genres
+from media.models import (
+    Anime,
+    Cartoon,
+    Genre,
+    MediaDescription,
+    Movie,
+    Series,
+)
+from media.pagination import KeysetPage, keyset_ordering
+from media.search import get_search_backend
+
+# API name of every media kind, as in the HTML URLs.
+API_MEDIA_MODELS = {
+    "movies": Movie,
+    "anime": Anime,
+    "series": Series,
+    "cartoons": Cartoon,
+}
+ORDER_FORMS = {
+    Movie: MovieOrderForm,
+    Anime: MediaOrderForm,
+    Series: MediaOrderForm,
+    Cartoon: MediaOrderForm,
+}
+
+MEDIA_FIELDS = (
+    "id",
+    "title",
+    "year_released",
+    "seasons",
+    "episodes",
+    "description",
+    "updated_at",
+)
+AGGREGATE_FIELDS = (
+    "rating_count",
+    "average_rate",
+    *MediaDescription.STATUS_COUNT_FIELDS.values(),
+)
+USER_DATA_FIELDS = (
+    "id",
+    "media_id",
+    "rate",
+    "status",
+    "comment",
+    "updated_at",
+)
+MEDIA_INCLUDES = ("genres", "aggregates")
+USER_DATA_INCLUDES = ("media",)
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 100
+MAX_UPDATES = 1000
+
+
+class ApiError(Exception):
+    def __init__(self, message, status: int = 400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.payload = {"error": message, **extra}
+
+
+def api_view(view=None, *, methods=("GET",)):
+    """JSON errors instead of redirects and HTML pages for API views."""
+    if view is None:
+        return partial(api_view, methods=methods)
+
+    @require_http_methods(list(methods))
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {"error": "Authentication required"},
+                status=401
+            )
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse(error.payload, status=error.status)
+        except Http404 as error:
+            return JsonResponse({"error": str(error)}, status=404)
+
+    return wrapper
+
+
+def _media_model(kind: str):
+    try:
+        return API_MEDIA_MODELS[kind]
+    except KeyError:
+        raise Http404(f"Unknown media kind: {kind}")
+
+
+def _split(value: str | None) -> list[str]:
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def requested_fields(request: HttpRequest, allowed: tuple) -> list[str]:
+    """The sparse fieldset of ``?fields=``, every field by default."""
+    fields = _split(request.GET.get("fields")) or list(allowed)
+    unknown = sorted(set(fields) - set(allowed))
+    if unknown:
+        raise ApiError("Unknown fields", unknown=unknown)
+    return list(dict.fromkeys(["id", *fields]))
+
+
+def requested_includes(request: HttpRequest, allowed: tuple) -> set[str]:
+    includes = set(_split(request.GET.get("include")))
+    unknown = sorted(includes - set(allowed))
+    if unknown:
+        raise ApiError("Unknown includes", unknown=unknown)
+    return includes
+
+
+def requested_ids(request: HttpRequest) -> list[int]:
+    try:
+        ids = [int(pk) for pk in _split(request.GET.get("ids"))]
+    except ValueError:
+        raise ApiError("ids must be integers")
+    if not ids:
+        raise ApiError("ids is required")
+    if len(ids) > MAX_LIMIT:
+        raise ApiError(f"At most {MAX_LIMIT} ids per request")
+    return list(dict.fromkeys(ids))
+
+
+def requested_limit(request: HttpRequest) -> int:
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError("limit must be an integer")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def validated(form: forms.Form) -> dict:
+    if not form.is_valid():
+        raise ApiError("Invalid query", errors=form.errors.get_json_data())
+    return form.cleaned_data
+
+
+def media_columns(fields: list, includes: set) -> list[str]:
+    columns = list(fields)
+    if "aggregates" in includes:
+        columns.extend(AGGREGATE_FIELDS)
+    return columns
+
+
+def media_queryset(model, includes: set) -> QuerySet:
+    queryset = model.objects.all()
+    if "genres" in includes:
+        queryset = queryset.prefetch_related(
+            Prefetch("genre", queryset=Genre.objects.only("id", "name"))
+        )
+    return queryset
+
+
+def serialize_media(media, fields: list, includes: set) -> dict:
+    data = {field: getattr(media, field) for field in fields}
+    if "genres" in includes:
+        data["genres"] = [
+            {"id": genre.id, "name": genre.name} for genre in media.genre.all()
+        ]
+    if "aggregates" in includes:
+        data["aggregates"] = {
+            field: getattr(media, field) for field in AGGREGATE_FIELDS
+        }
+    return data
+
+
+def keyset_response(
+        request: HttpRequest,
+        queryset: QuerySet,
+        columns: list,
+        serialize
+) -> JsonResponse:
+    """One keyset page of ``queryset``, loading only ``columns`` and the
+    sort key, with the cursors of its neighbours."""
+    ordering = keyset_ordering(queryset) or ["id"]
+    field_names = {
+        field.name for field in queryset.model._meta.concrete_fields
+    }
+    sort_columns = [
+        field.lstrip("-") for field in ordering
+        if field.lstrip("-") in field_names
+    ]
+    try:
+        page = KeysetPage(
+            queryset.only(*columns, *sort_columns),
+            ordering,
+            requested_limit(request),
+            request.GET.get("cursor")
+        )
+    except Http404:
+        raise ApiError("Invalid cursor")
+    return JsonResponse({
+        "results": [serialize(obj) for obj in page],
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    })
+
+
+@api_view
+def media_list(request: HttpRequest, kind: str) -> JsonResponse:
+    model = _media_model(kind)
+    fields = requested_fields(request, MEDIA_FIELDS)
+    includes = requested_includes(request, MEDIA_INCLUDES)
+    queryset = media_queryset(model, includes)
+
+    title = validated(MediaSearchForm(request.GET)).get("title")
+    genre_filter = validated(MediaFilterForm(request.GET))
+    genres = genre_filter.get("genres")
+    order = validated(ORDER_FORMS[model](request.GET)).get("order")
+    if title:
+        search_backend = get_search_backend()
+        queryset = search_backend.filter(queryset, title)
+        queryset = search_backend.rank(queryset, title)
+    if genres:
+        queryset = filter_by_genres(
+            queryset,
+            genres,
+            genre_filter.get("genre_match") == "all"
+        )
+    if order:
+        queryset = queryset.order_by(order)
+
+    return keyset_response(
+        request,
+        queryset,
+        media_columns(fields, includes),
+        lambda media: serialize_media(media, fields, includes)
+    )
+
+
+@api_view
+def media_detail(request: HttpRequest, kind: str, pk: int) -> JsonResponse:
+    model = _media_model(kind)
+    fields = requested_fields(request, MEDIA_FIELDS)
+    includes = requested_includes(request, MEDIA_INCLUDES)
+    media = media_queryset(model, includes).only(
+        *media_columns(fields, includes)
+    ).filter(pk=pk).first()
+    if media is None:
+        raise Http404(f"No {model._meta.verbose_name} found")
+    return JsonResponse(serialize_media(media, fields, includes))
+
+
+@api_view
+def media_batch(request: HttpRequest, kind: str) -> JsonResponse:
+    model = _media_model(kind)
+    fields = requested_fields(request, MEDIA_FIELDS)
+    includes = requested_includes(request, MEDIA_INCLUDES)
+    ids = requested_ids(request)
+    objects = media_queryset(model, includes).only(
+        *media_columns(fields, includes)
+    ).in_bulk(ids)
+    return JsonResponse({
+        "results": [
+            serialize_media(objects[pk], fields, includes)
+            for pk in ids if pk in objects
+        ],
+        "not_found": [pk for pk in ids if pk not in objects],
+    })
+
+
+def user_data_columns(
+        user_data_model,
+        fields: list,
+        includes: set
+) -> list[str]:
+    media_field = user_data_model.media_field
+    columns = [
+        f"{media_field}_id" if field == "media_id" else field
+        for field in fields
+    ]
+    if "media" in includes:
+        columns.extend(
+            f"{media_field}__{field}"
+            for field in ("id", "title", "year_released")
+        )
+    return columns
+
+
+def user_data_queryset(request: HttpRequest, model, includes: set) -> QuerySet:
+    """The current user's entries of ``model``, with the title joined in
+    when ``media`` is included."""
+    user_data_model = model.user_data_model()
+    queryset = user_data_model.objects.filter(user_id=request.user.id)
+    if "media" in includes:
+        queryset = queryset.select_related(user_data_model.media_field)
+    return queryset
+
+
+def serialize_user_data(user_data, fields: list, includes: set) -> dict:
+    data = {field: getattr(user_data, field) for field in fields}
+    if "media" in includes:
+        media = getattr(user_data, user_data.media_field)
+        data["media"] = {
+            "id": media.id,
+            "title": media.title,
+            "year_released": media.year_released,
+        }
+    return data
+
+
+@api_view
+def user_data_list(request: HttpRequest, kind: str) -> JsonResponse:
+    model = _media_model(kind)
+    fields = requested_fields(request, USER_DATA_FIELDS)
+    includes = requested_includes(request, USER_DATA_INCLUDES)
+    queryset = user_data_queryset(request, model, includes)
+    media_field = queryset.model.media_field
+
+    title = validated(MediaSearchForm(request.GET)).get("title")
+    status = validated(StatusFilterForm(request.GET)).get("show_only")
+    if title:
+        queryset = get_search_backend().filter(queryset, title, media_field)
+    if status:
+        queryset = queryset.filter(status=status)
+
+    return keyset_response(
+        request,
+        queryset,
+        user_data_columns(queryset.model, fields, includes),
+        lambda user_data: serialize_user_data(user_data, fields, includes)
+    )
+
+
+def user_data_entries(
+        request: HttpRequest,
+        kind: str,
+        ids: list
+) -> tuple[dict, list, set]:
+    """The current user's entries for the titles in ``ids`` keyed by
+    title id, with the requested fields and includes."""
+    model = _media_model(kind)
+    fields = requested_fields(request, USER_DATA_FIELDS)
+    includes = requested_includes(request, USER_DATA_INCLUDES)
+    queryset = user_data_queryset(request, model, includes)
+    media_field = queryset.model.media_field
+    entries = {
+        user_data.media_id: user_data
+        for user_data in queryset.only(
+            *user_data_columns(queryset.model, fields, includes),
+            f"{media_field}_id"
+        ).filter(**{f"{media_field}__in": ids})
+    }
+    return entries, fields, includes
+
+
+@api_view
+def user_data_detail(request: HttpRequest, kind: str, pk: int) -> JsonResponse:
+    """The current user's entry for the title ``pk``."""
+    entries, fields, includes = user_data_entries(request, kind, [pk])
+    if pk not in entries:
+        raise Http404("Not in your list")
+    return JsonResponse(serialize_user_data(entries[pk], fields, includes))
+
+
+@api_view
+def user_data_batch(request: HttpRequest, kind: str) -> JsonResponse:
+    """The current user's entries for the titles listed in ``ids``."""
+    ids = requested_ids(request)
+    entries, fields, includes = user_data_entries(request, kind, ids)
+    return JsonResponse({
+        "results": [
+            serialize_user_data(entries[pk], fields, includes)
+            for pk in ids if pk in entries
+        ],
+        "not_found": [pk for pk in ids if pk not in entries],
+    })
+
+
+@api_view(methods=("POST",))
+def user_data_batch_update(request: HttpRequest) -> JsonResponse:
+    """Apply ``{"updates": [...]}`` edits to the user's entries, see
+    ``apply_user_data_updates``."""
+    try:
+        payload = json.loads(request.body or "{}")
+    except ValueError:
+        raise ApiError("Invalid JSON")
+    updates = payload.get("updates") if isinstance(payload, dict) else None
+    if not isinstance(updates, list):
+        raise ApiError("updates must be a list")
+    if len(updates) > MAX_UPDATES:
+        raise ApiError(f"At most {MAX_UPDATES} updates per request")
+    return JsonResponse(apply_user_data_updates(request.user.id, updates))
+
+
+@api_view
+def feed(request: HttpRequest) -> JsonResponse:
+    return JsonResponse({"results": get_feed(request.user.id)})
@@ -0,0 +1,38 @@
+import asyncio
+from functools import wraps
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
+
+
+async def resolve_user(request):
+    """Load the session user without blocking the event loop and store it
+    on the request, so sync code later in the request (templates,
+    ``LoginRequiredMixin``) does not query for it again."""
+    request.user = await request.auser()
+    return request.user
+
+
+def async_login_required(view):
+    """``login_required`` for coroutine views, which the stock decorator
+    would wrap in a sync function."""
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await resolve_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """``LoginRequiredMixin`` for class-based views with async handlers."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        await resolve_user(request)
+        response = super().dispatch(request, *args, **kwargs)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
@@ -0,0 +1,150 @@
+from django.db import transaction
+from django.utils import timezone
+
+from media.forms import (
+    UserAnimeDataForm,
+    UserCartoonDataForm,
+    UserMovieDataForm,
+    UserSeriesDataForm,
+)
+from media.models import Anime, Cartoon, Movie, Series, user_data_bulk_updated
+
+# Media type names accepted in updates, as in the API URLs.
+USER_DATA_FORMS = {
+    "movies": (Movie, UserMovieDataForm),
+    "anime": (Anime, UserAnimeDataForm),
+    "series": (Series, UserSeriesDataForm),
+    "cartoons": (Cartoon, UserCartoonDataForm),
+}
+EDITABLE_FIELDS = ("rate", "status", "comment")
+BATCH_SIZE = 500
+
+
+def _parse(item) -> tuple:
+    if not isinstance(item, dict):
+        raise ValueError("Each update must be an object")
+    if item.get("media_type") not in USER_DATA_FORMS:
+        raise ValueError(
+            f"media_type must be one of {', '.join(USER_DATA_FORMS)}"
+        )
+    media_id = item.get("media_id")
+    if not isinstance(media_id, int) or isinstance(media_id, bool):
+        raise ValueError("media_id must be an integer")
+    return item["media_type"], media_id
+
+
+def apply_user_data_updates(user_id: int, updates: list) -> dict:
+    """Validate and apply many edits of the user's list entries at once.
+
+    Every update names a ``media_type`` and ``media_id`` plus any of
+    ``rate``, ``status`` and ``comment``; fields left out keep their
+    value. Titles not in the list yet are added. Each edit is checked by
+    the kind's ``UserMediaDataForm``, invalid ones are reported by index
+    and skipped, and the valid ones are written with one bulk query per
+    kind in a single transaction.
+    """
+    errors = []
+    requested = {}
+    for index, item in enumerate(updates):
+        try:
+            media_type, media_id = _parse(item)
+        except ValueError as error:
+            errors.append({
+                "index": index,
+                "errors": {"__all__": [str(error)]},
+            })
+            continue
+        requested.setdefault(media_type, []).append((index, media_id, item))
+
+    updated = created = 0
+    with transaction.atomic():
+        for media_type, items in requested.items():
+            media_model, form_class = USER_DATA_FORMS[media_type]
+            through = media_model.user_data_model()
+            media_field = through.media_field
+            media_ids = {media_id for _, media_id, _ in items}
+            entries = {
+                entry.media_id: entry
+                for entry in through.objects.filter(
+                    user_id=user_id,
+                    **{f"{media_field}__in": media_ids}
+                )
+            }
+            existing_media = set(
+                media_model.objects.filter(
+                    pk__in=media_ids - entries.keys()
+                ).values_list("pk", flat=True)
+            )
+
+            changed = {}
+            values = {}
+            for index, media_id, item in items:
+                entry = entries.get(media_id)
+                if entry is None:
+                    if media_id not in existing_media:
+                        errors.append({
+                            "index": index,
+                            "errors": {"media_id": ["No such title"]}
+                        })
+                        continue
+                    entry = through(
+                        user_id=user_id,
+                        **{f"{media_field}_id": media_id}
+                    )
+                    entries[media_id] = entry
+                # Invalid forms still write their values to the instance,
+                # so later edits of the same title start from a snapshot.
+                data = dict(values.setdefault(media_id, {
+                    field: getattr(entry, field) for field in EDITABLE_FIELDS
+                }))
+                data.update(
+                    (field, item[field])
+                    for field in EDITABLE_FIELDS if field in item
+                )
+                form = form_class(data, instance=entry)
+                if not form.is_valid():
+                    errors.append({
+                        "index": index,
+                        "errors": form.errors.get_json_data()
+                    })
+                    continue
+                changed[media_id] = form.save(commit=False)
+                values[media_id] = {
+                    field: getattr(entry, field) for field in EDITABLE_FIELDS
+                }
+            if not changed:
+                continue
+            for media_id, entry in changed.items():
+                for field, value in values[media_id].items():
+                    setattr(entry, field, value)
+
+            now = timezone.now()
+            new = [entry for entry in changed.values() if entry.pk is None]
+            old = [entry for entry in changed.values() if entry.pk is not None]
+            for entry in old:
+                entry.updated_at = now
+            through.objects.bulk_update(
+                old,
+                [*EDITABLE_FIELDS, "updated_at"],
+                batch_size=BATCH_SIZE
+            )
+            # An entry added by a concurrent request since the read above
+            # takes this request's values instead of failing the batch.
+            through.objects.bulk_create(
+                new,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["user", media_field],
+                update_fields=[*EDITABLE_FIELDS, "updated_at"]
+            )
+            media_model.refresh_rating_aggregates(changed)
+            user_data_bulk_updated.send(
+                sender=through,
+                user_ids=[user_id],
+                media_ids=list(changed)
+            )
+            updated += len(old)
+            created += len(new)
+
+    errors.sort(key=lambda error: error["index"])
+    return {"updated": updated, "created": created, "errors": errors}
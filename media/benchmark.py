@@ -0,0 +1,331 @@
+"""Synthetic data and a view benchmark for the ``benchmark_views`` and
+``explain_hot_queries`` commands.
+
+``seed_catalog`` fills the media tables reproducibly from a seeded random
+generator. ``request_specs`` turns every URL pattern of ``media.urls``
+into a request against the benchmark user's data, ``run_benchmark`` times
+them through the test client and ``compare`` reports the views that got
+slower or run more queries than a stored baseline.
+"""
+import gc
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from media.models import (
+    Anime,
+    Cartoon,
+    Genre,
+    Movie,
+    Series,
+    UserMediaDataMixin,
+)
+from media.urls import urlpatterns
+
+MEDIA_MODELS = (Movie, Anime, Series, Cartoon)
+# URL prefix of every media kind, as in the URL names.
+URL_KINDS = {
+    "movies": Movie,
+    "anime": Anime,
+    "series": Series,
+    "cartoons": Cartoon,
+}
+BATCH_SIZE = 1000
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def seed_catalog(
+        titles: int,
+        users: int,
+        rows: int,
+        rng: random.Random,
+        genres: int = 20,
+        username_prefix: str = "seed_user",
+        log=None
+) -> None:
+    """Add ``titles`` titles of every kind with up to three of ``genres``
+    genres each, ``users`` users and ``rows`` random list entries per
+    kind."""
+    user_model = get_user_model()
+    first_user = user_model.objects.count()
+    user_model.objects.bulk_create(
+        [
+            user_model(username=f"{username_prefix}_{first_user + i}")
+            for i in range(users)
+        ],
+        batch_size=BATCH_SIZE
+    )
+    user_ids = list(user_model.objects.values_list("id", flat=True))
+    statuses = UserMediaDataMixin.Status.values
+    first_genre = Genre.objects.count()
+    Genre.objects.bulk_create(
+        [Genre(name=f"Genre {first_genre + i}") for i in range(genres)]
+    )
+    Genre.assign_bits()
+    genre_ids = list(Genre.objects.values_list("id", flat=True))
+
+    for media_model in MEDIA_MODELS:
+        media_model.objects.bulk_create(
+            (
+                media_model(
+                    title=f"{media_model.__name__} {i}",
+                    year_released=rng.randint(1950, 2024),
+                    seasons=rng.randint(1, 20),
+                    episodes=rng.randint(1, 1000),
+                )
+                for i in range(titles)
+            ),
+            batch_size=BATCH_SIZE
+        )
+        media_ids = list(media_model.objects.values_list("id", flat=True))
+        if genre_ids:
+            through = media_model.genre.through
+            media_column = f"{media_model._meta.model_name}_id"
+            through.objects.bulk_create(
+                (
+                    through(genre_id=genre_id, **{media_column: media_id})
+                    for media_id in media_ids
+                    for genre_id in rng.sample(
+                        genre_ids,
+                        rng.randint(1, min(3, len(genre_ids)))
+                    )
+                ),
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True
+            )
+            media_model.refresh_genre_masks()
+        user_data_model = media_model.user_data_model()
+        pairs = set()
+        while len(pairs) < min(rows, len(user_ids) * len(media_ids)):
+            pairs.add((rng.choice(user_ids), rng.choice(media_ids)))
+        user_data_model.objects.bulk_create(
+            (
+                user_data_model(
+                    user_id=user_id,
+                    rate=rng.choice((None, rng.randint(0, 500) / 100)),
+                    status=rng.choice(statuses),
+                    **{f"{user_data_model.media_field}_id": media_id}
+                )
+                for user_id, media_id in pairs
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True
+        )
+        media_model.refresh_rating_aggregates()
+        if log:
+            log(
+                f"Seeded {media_model._meta.verbose_name_plural}: "
+                f"{titles} titles, {len(pairs)} user rows"
+            )
+    if connection.vendor in ("postgresql", "sqlite"):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+
+def add_to_lists(user, count: int, rng: random.Random) -> None:
+    """Put ``count`` more random titles of every kind in ``user``'s
+    lists."""
+    for media_model in MEDIA_MODELS:
+        user_data_model = media_model.user_data_model()
+        media_field = user_data_model.media_field
+        listed = set(
+            user_data_model.objects.filter(user=user).values_list(
+                f"{media_field}_id", flat=True
+            )
+        )
+        media_ids = [
+            media_id
+            for media_id in media_model.objects.values_list("id", flat=True)
+            if media_id not in listed
+        ]
+        user_data_model.objects.bulk_create(
+            [
+                user_data_model(
+                    user=user,
+                    rate=rng.randint(0, 5),
+                    **{f"{media_field}_id": media_id}
+                )
+                for media_id in rng.sample(
+                    media_ids,
+                    min(count, len(media_ids))
+                )
+            ],
+            batch_size=BATCH_SIZE
+        )
+        media_model.refresh_rating_aggregates()
+
+
+def create_benchmark_user(list_size: int, rng: random.Random):
+    """A staff user with ``list_size`` random titles of every kind in its
+    lists."""
+    user = get_user_model().objects.create_user(
+        username="benchmark_user",
+        password="benchmark_password",
+        is_staff=True
+    )
+    add_to_lists(user, list_size, rng)
+    return user
+
+
+def _kind(name: str) -> str:
+    for kind in URL_KINDS:
+        if name.startswith((kind, f"user-{kind}")):
+            return kind
+    return "movies"
+
+
+def request_specs(user) -> dict:
+    """The request made for every named URL of ``media.urls``, against
+    titles in ``user``'s lists.
+
+    Toggles are sent twice per measurement (add and remove back) so the
+    data stays the same between iterations.
+    """
+    listed = {
+        kind: model.user_data_model().objects.filter(user=user).values_list(
+            f"{model.user_data_model().media_field}_id",
+            flat=True
+        ).order_by("id").first()
+        for kind, model in URL_KINDS.items()
+    }
+    specs = {}
+    for pattern in urlpatterns:
+        name = pattern.name
+        kind = _kind(name.removeprefix("api-"))
+        kwargs = {}
+        if "kind" in pattern.pattern.converters:
+            kwargs["kind"] = kind
+        if "pk" in pattern.pattern.converters:
+            kwargs["pk"] = listed[kind]
+        spec = {
+            "method": "get",
+            "path": reverse(f"media:{name}", kwargs=kwargs),
+            "data": {},
+            "toggle": False,
+        }
+        if name.endswith(("-add", "-toggle")):
+            spec.update(method="post", toggle=True)
+            if name.endswith("-toggle"):
+                spec["data"] = {"ids": [listed[kind]]}
+        elif name.endswith("-batch"):
+            spec["data"] = {"ids": str(listed[kind])}
+        elif name == "api-user-data-batch-update":
+            spec.update(
+                method="post",
+                data=json.dumps({"updates": [{
+                    "media_type": kind,
+                    "media_id": listed[kind],
+                    "rate": 3,
+                }]}),
+                content_type="application/json"
+            )
+        specs[f"media:{name}"] = spec
+    return specs
+
+
+def send(client, spec: dict):
+    extra = {}
+    if "content_type" in spec:
+        extra["content_type"] = spec["content_type"]
+    response = getattr(client, spec["method"])(
+        spec["path"],
+        spec["data"],
+        **extra
+    )
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return response
+
+
+def measure(client, spec: dict) -> tuple[float, int, int]:
+    """Latency in milliseconds, query count and status of one request,
+    or of the add and remove pair for toggles."""
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = send(client, spec)
+        if spec["toggle"]:
+            send(client, spec)
+        elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, len(queries), response.status_code
+
+
+def run_benchmark(client, specs: dict, iterations: int, log=None) -> dict:
+    results = {}
+    for name, spec in specs.items():
+        measure(client, spec)
+        # Collector pauses would land on random requests and dominate p95.
+        gc.collect()
+        gc.disable()
+        try:
+            samples = [measure(client, spec) for _ in range(iterations)]
+        finally:
+            gc.enable()
+        latencies = [latency for latency, _, _ in samples]
+        results[name] = {
+            "path": spec["path"],
+            "method": spec["method"].upper(),
+            "status": samples[-1][2],
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "queries": max(queries for _, queries, _ in samples),
+        }
+        if log:
+            result = results[name]
+            log(
+                f"{name:40} {result['status']} "
+                f"p50 {result['p50_ms']:8.2f}ms "
+                f"p95 {result['p95_ms']:8.2f}ms "
+                f"{result['queries']:4} queries"
+            )
+    return results
+
+
+def compare(
+        results: dict,
+        baseline: dict,
+        tolerance: float,
+        min_delta_ms: float
+) -> list[str]:
+    """Views whose status changed, which run more queries, or whose p50
+    and p95 both grew by more than ``tolerance`` (and ``min_delta_ms``)
+    compared to ``baseline``.
+
+    Requiring both percentiles to move keeps single slow samples from
+    failing the comparison; a real slowdown shifts the whole
+    distribution.
+    """
+    def slower(new: dict, old: dict, key: str) -> bool:
+        return (
+            new[key] - old[key] > min_delta_ms
+            and new[key] > old[key] * (1 + tolerance)
+        )
+
+    regressions = []
+    for name, old in baseline.items():
+        new = results.get(name)
+        if new is None:
+            continue
+        if new["status"] != old["status"]:
+            regressions.append(
+                f"{name}: status {old['status']} -> {new['status']}"
+            )
+        if new["queries"] > old["queries"]:
+            regressions.append(
+                f"{name}: {old['queries']} -> {new['queries']} queries"
+            )
+        if slower(new, old, "p50_ms") and slower(new, old, "p95_ms"):
+            regressions.append(
+                f"{name}: p50 {old['p50_ms']:.2f}ms -> {new['p50_ms']:.2f}ms,"
+                f" p95 {old['p95_ms']:.2f}ms -> {new['p95_ms']:.2f}ms"
+            )
+    return regressions
@@ -0,0 +1,150 @@
+"""Versioned cache namespaces and stampede-safe recomputation.
+
+Keys are built as ``media:<namespace>:<version>:<parts>``. Bumping the
+version of a namespace (the catalog, the genres or one user's data)
+orphans every key of the old version at once; they expire on their own.
+
+Values stored by ``get_or_compute`` carry how long they took to compute
+and when they expire. Readers refresh them a little early with a
+probability that grows as expiry nears (probabilistic early expiration),
+and only the reader holding the recompute lock does the work; the others
+keep serving the current value, or wait briefly for a missing one.
+"""
+import asyncio
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = "media:{namespace}:version"
+LOCK_TIMEOUT = getattr(settings, "MEDIA_CACHE_LOCK_TIMEOUT", 10)
+LOCK_WAIT = getattr(settings, "MEDIA_CACHE_LOCK_WAIT", 1.0)
+LOCK_POLL_INTERVAL = 0.05
+# Higher values refresh earlier; 1 is the usual choice.
+EARLY_REFRESH_BETA = 1.0
+
+
+def user_namespace(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def namespace_version(namespace: str) -> int:
+    key = VERSION_KEY.format(namespace=namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def anamespace_version(namespace: str) -> int:
+    key = VERSION_KEY.format(namespace=namespace)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_namespace(*namespaces: str) -> None:
+    """Invalidate every key of the given namespaces."""
+    cache.set_many(
+        {
+            VERSION_KEY.format(namespace=namespace): time.time_ns()
+            for namespace in namespaces
+        },
+        None
+    )
+
+
+def versioned_key(namespace: str, version: int, *parts) -> str:
+    return ":".join(["media", namespace, str(version), *map(str, parts)])
+
+
+def namespaced_key(namespace: str, *parts) -> str:
+    """A key in the current version of ``namespace``."""
+    return versioned_key(namespace, namespace_version(namespace), *parts)
+
+
+async def anamespaced_key(namespace: str, *parts) -> str:
+    version = await anamespace_version(namespace)
+    return versioned_key(namespace, version, *parts)
+
+
+def _entry(value, compute_time: float, timeout: int | None) -> tuple:
+    expires = math.inf if timeout is None else time.time() + timeout
+    return value, compute_time, expires
+
+
+def _is_fresh(entry: tuple | None) -> bool:
+    if entry is None:
+        return False
+    _, compute_time, expires = entry
+    jitter = compute_time * EARLY_REFRESH_BETA * -math.log(
+        1.0 - random.random()
+    )
+    return time.time() + jitter < expires
+
+
+def get_or_compute(key: str, compute, timeout: int | None):
+    """The cached value of ``key``, calling ``compute()`` to fill or
+    refresh it at most once across processes at a time."""
+    entry = cache.get(key)
+    if _is_fresh(entry):
+        return entry[0]
+    lock_key = f"{key}:lock"
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if not locked:
+        if entry is not None:
+            return entry[0]
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+    try:
+        start = time.monotonic()
+        value = compute()
+        cache.set(
+            key,
+            _entry(value, time.monotonic() - start, timeout),
+            timeout
+        )
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+
+async def aget_or_compute(key: str, compute, timeout: int | None):
+    """Async version of ``get_or_compute``; ``compute`` is a coroutine
+    function."""
+    entry = await cache.aget(key)
+    if _is_fresh(entry):
+        return entry[0]
+    lock_key = f"{key}:lock"
+    locked = await cache.aadd(lock_key, 1, LOCK_TIMEOUT)
+    if not locked:
+        if entry is not None:
+            return entry[0]
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            entry = await cache.aget(key)
+            if entry is not None:
+                return entry[0]
+    try:
+        start = time.monotonic()
+        value = await compute()
+        await cache.aset(
+            key,
+            _entry(value, time.monotonic() - start, timeout),
+            timeout
+        )
+    finally:
+        if locked:
+            await cache.adelete(lock_key)
+    return value
@@ -0,0 +1,157 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from media.models import MediaItem, UserMediaData
+
+MEDIA_ITEM_FIELDS = [
+    "title",
+    "year_released",
+    "seasons",
+    "episodes",
+    "description",
+]
+USER_MEDIA_DATA_FIELDS = ["rate", "status", "comment"]
+BATCH_SIZE = 1000
+
+
+def unified_catalog_enabled() -> bool:
+    return getattr(settings, "MEDIA_UNIFIED_CATALOG", False)
+
+
+def _batches(iterable, size: int = BATCH_SIZE):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def sync_media_items(media_model, pks=None) -> int:
+    """Copy titles (and their genres) of ``media_model`` into
+    ``MediaItem``, dropping items whose title is gone.
+
+    ``pks`` limits the copy to those titles, otherwise the whole kind is
+    rebuilt. Returns the number of items written.
+    """
+    kind = media_model._meta.model_name
+    queryset = media_model.objects.order_by()
+    items = MediaItem.objects.filter(kind=kind)
+    if pks is not None:
+        pks = list(pks)
+        queryset = queryset.filter(pk__in=pks)
+        items = items.filter(source_id__in=pks)
+    genre_through = media_model.genre.through
+    item_genre_through = MediaItem.genre.through
+    media_column = f"{kind}_id"
+
+    synced = 0
+    with transaction.atomic():
+        source_ids = []
+        rows = queryset.values("pk", *MEDIA_ITEM_FIELDS).iterator(
+            chunk_size=BATCH_SIZE
+        )
+        for batch in _batches(rows):
+            ids = [row.pop("pk") for row in batch]
+            source_ids.extend(ids)
+            MediaItem.objects.bulk_create(
+                [
+                    MediaItem(kind=kind, source_id=source_id, **row)
+                    for source_id, row in zip(ids, batch)
+                ],
+                update_conflicts=True,
+                unique_fields=["kind", "source_id"],
+                update_fields=[*MEDIA_ITEM_FIELDS, "updated_at"]
+            )
+            item_ids = dict(
+                MediaItem.objects.filter(
+                    kind=kind,
+                    source_id__in=ids
+                ).values_list("source_id", "pk")
+            )
+            item_genre_through.objects.filter(
+                mediaitem_id__in=item_ids.values()
+            ).delete()
+            item_genre_through.objects.bulk_create([
+                item_genre_through(
+                    mediaitem_id=item_ids[media_id],
+                    genre_id=genre_id
+                )
+                for media_id, genre_id in genre_through.objects.filter(
+                    **{f"{media_column}__in": ids}
+                ).values_list(media_column, "genre_id")
+            ])
+            synced += len(batch)
+        if pks is not None:
+            items.exclude(source_id__in=source_ids).delete()
+        else:
+            items.exclude(
+                source_id__in=queryset.values("pk")
+            ).delete()
+    return synced
+
+
+def sync_user_media_data(
+        user_data_model,
+        user_ids=None,
+        media_ids=None
+) -> int:
+    """Copy list entries of ``user_data_model`` into ``UserMediaData``,
+    dropping mirrored entries that no longer exist.
+
+    ``user_ids`` and ``media_ids`` limit the copy to those users and
+    titles. Titles must already be mirrored by ``sync_media_items``.
+    Returns the number of entries written.
+    """
+    media_field = user_data_model.media_field
+    kind = user_data_model.media_model()._meta.model_name
+    queryset = user_data_model.objects.order_by()
+    mirrored = UserMediaData.objects.filter(kind=kind)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        queryset = queryset.filter(user_id__in=user_ids)
+        mirrored = mirrored.filter(user_id__in=user_ids)
+    if media_ids is not None:
+        media_ids = list(media_ids)
+        queryset = queryset.filter(**{f"{media_field}__in": media_ids})
+        mirrored = mirrored.filter(item__source_id__in=media_ids)
+
+    synced = 0
+    with transaction.atomic():
+        kept = set()
+        rows = queryset.values(
+            "user_id", f"{media_field}_id", *USER_MEDIA_DATA_FIELDS
+        ).iterator(chunk_size=BATCH_SIZE)
+        for batch in _batches(rows):
+            item_ids = dict(
+                MediaItem.objects.filter(
+                    kind=kind,
+                    source_id__in={row[f"{media_field}_id"] for row in batch}
+                ).values_list("source_id", "pk")
+            )
+            entries = [
+                UserMediaData(
+                    user_id=row["user_id"],
+                    item_id=item_ids[row[f"{media_field}_id"]],
+                    kind=kind,
+                    **{field: row[field] for field in USER_MEDIA_DATA_FIELDS}
+                )
+                for row in batch
+                if row[f"{media_field}_id"] in item_ids
+            ]
+            UserMediaData.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=["user", "item"],
+                update_fields=[*USER_MEDIA_DATA_FIELDS, "updated_at"]
+            )
+            kept.update((entry.user_id, entry.item_id) for entry in entries)
+            synced += len(entries)
+        stale = [
+            pk for pk, user_id, item_id in mirrored.values_list(
+                "pk", "user_id", "item_id"
+            ).iterator(chunk_size=BATCH_SIZE)
+            if (user_id, item_id) not in kept
+        ]
+        for batch in _batches(stale):
+            UserMediaData.objects.filter(pk__in=batch).delete()
+    return synced
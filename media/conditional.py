@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max, QuerySet
+from django.db.models.functions import Greatest
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from media.fragments import acatalog_version
+
+
+async def aqueryset_validators(
+        queryset: QuerySet,
+        fields: tuple = ("updated_at",)
+) -> tuple[datetime | None, int]:
+    """The newest of ``fields`` across ``queryset`` and its row count, in
+    one aggregate query.
+
+    The count catches deletions, which leave no timestamp behind.
+    """
+    newest = Max(fields[0]) if len(fields) == 1 else Max(Greatest(*fields))
+    result = await queryset.order_by().aaggregate(
+        last_modified=newest,
+        count=Count("pk", distinct=True)
+    )
+    return result["last_modified"], result["count"]
+
+
+class ConditionalGetMixin:
+    """Answer conditional GETs with 304 Not Modified before any template
+    is rendered.
+
+    Subclasses return ``(last_modified, parts)`` from ``aget_validators``;
+    the ETag hashes those parts together with the request path, the
+    catalog version (genre and catalog changes) and the session, whose
+    key rotates on login along with the CSRF token embedded in pages.
+
+    The handler is async: the validators and the catalog version are
+    fetched concurrently, and only a changed page goes through the sync
+    rendering of the view.
+    """
+
+    # Whether to send Last-Modified, for clients that only revalidate
+    # with If-Modified-Since.
+    send_last_modified = True
+
+    async def aget_validators(self) -> tuple[datetime | None, list]:
+        raise NotImplementedError
+
+    def get_last_modified(
+            self,
+            last_modified: datetime | None,
+            version: int
+    ) -> float | None:
+        """The timestamp, in the whole seconds of HTTP dates, of
+        ``last_modified`` or of the last catalog change, whichever is newer;
+        catalog versions are nanosecond timestamps."""
+        if not self.send_last_modified or last_modified is None:
+            return None
+        return int(max(last_modified.timestamp(), version / 10 ** 9))
+
+    def get_etag(
+            self,
+            last_modified: datetime | None,
+            parts: list,
+            version: int
+    ) -> str:
+        session = getattr(self.request, "session", None)
+        payload = "|".join(str(part) for part in [
+            self.request.get_full_path(),
+            self.request.user.pk,
+            session.session_key if session is not None else "",
+            version,
+            last_modified.isoformat() if last_modified else "",
+            *parts,
+        ])
+        return quote_etag(hashlib.md5(payload.encode()).hexdigest())
+
+    async def get(self, request, *args, **kwargs):
+        (last_modified, parts), version = await asyncio.gather(
+            self.aget_validators(),
+            acatalog_version()
+        )
+        etag = self.get_etag(last_modified, parts, version)
+        timestamp = self.get_last_modified(last_modified, version)
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=timestamp
+        )
+        if response is None:
+            response = await sync_to_async(super().get)(
+                request, *args, **kwargs
+            )
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """Validators of a list view from the newest ``updated_at`` and the
+    row count of its filtered queryset."""
+
+    updated_at_fields = ("updated_at",)
+    # Removed rows leave no newer timestamp behind, only the ETag's count
+    # notices them.
+    send_last_modified = False
+
+    def get_updated_at_fields(self) -> tuple:
+        return self.updated_at_fields
+
+    async def aget_validators(self) -> tuple[datetime | None, list]:
+        # Building the queryset validates forms against the genre registry,
+        # which may have to query, so it runs in a thread.
+        queryset = await sync_to_async(self.get_queryset)()
+        last_modified, count = await aqueryset_validators(
+            queryset,
+            self.get_updated_at_fields()
+        )
+        return last_modified, [count]
+
+
+class ConditionalDetailMixin(ConditionalGetMixin):
+    """Validators of a detail view from the object's ``updated_at``; the
+    object is fetched once and reused for rendering."""
+
+    def get_object(self, queryset=None):
+        if queryset is None and getattr(self, "object", None) is not None:
+            return self.object
+        return super().get_object(queryset)
+
+    async def aget_validators(self) -> tuple[datetime | None, list]:
+        queryset = self.get_queryset()
+        try:
+            self.object = await queryset.aget(
+                pk=self.kwargs.get(self.pk_url_kwarg)
+            )
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                f"No {queryset.model._meta.verbose_name} found matching "
+                "the query"
+            )
+        return self.object.updated_at, [self.object.pk]
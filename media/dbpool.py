@@ -0,0 +1,152 @@
+"""A bounded per-process pool of database connections.
+
+Django 5.0 opens one connection per thread and either closes it after
+the request or keeps it for ``CONN_MAX_AGE`` seconds, so the number of
+server connections follows the number of threads and every close pays
+for a reconnect later. ``ConnectionPool`` keeps at most ``max_size``
+connections per process and hands idle ones to whichever thread needs
+one, making threads wait (up to ``timeout`` seconds) when all of them are
+checked out. It is used by the ``media.pooled_postgresql`` backend;
+from Django 5.1 on the settings use Django's own pool instead, which
+``pool_stats`` does not report.
+"""
+import threading
+import time
+from collections import deque
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, max_size: int, timeout: float, max_idle: float = 600):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._checked_out = 0
+        self._waiting = 0
+        self._checkouts = 0
+        self._opened = 0
+        self._discarded = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    def getconn(self, connect, is_healthy=None):
+        """An idle connection, or a new one from ``connect()``.
+
+        Idle connections that sat unused for longer than ``max_idle`` or
+        fail ``is_healthy`` are closed and replaced.
+        """
+        start = time.monotonic()
+        with self._lock:
+            self._waiting += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        waited = time.monotonic() - start
+        with self._lock:
+            self._waiting -= 1
+            self._wait_time += waited
+            self._max_wait_time = max(self._max_wait_time, waited)
+            if not acquired:
+                self._timeouts += 1
+        if not acquired:
+            raise PoolTimeout(
+                f"No database connection available after {waited:.1f}s "
+                f"({self.max_size} checked out)"
+            )
+
+        try:
+            connection = self._reuse(is_healthy)
+            if connection is None:
+                connection = connect()
+                with self._lock:
+                    self._opened += 1
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._checked_out += 1
+            self._checkouts += 1
+        return connection
+
+    def _reuse(self, is_healthy):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, returned_at = self._idle.pop()
+            stale = time.monotonic() - returned_at > self.max_idle
+            if not stale and not connection.closed and (
+                is_healthy is None or is_healthy(connection)
+            ):
+                return connection
+            self._discard(connection)
+
+    def _discard(self, connection) -> None:
+        with self._lock:
+            self._discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def putconn(self, connection) -> None:
+        """Return a connection, rolling back whatever it left open."""
+        try:
+            reusable = not connection.closed
+            if reusable:
+                connection.rollback()
+        except Exception:
+            reusable = False
+        if reusable:
+            with self._lock:
+                self._idle.append((connection, time.monotonic()))
+        else:
+            self._discard(connection)
+        with self._lock:
+            self._checked_out -= 1
+        self._slots.release()
+
+    def close_idle(self) -> None:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return
+                connection, _ = self._idle.pop()
+            self._discard(connection)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "checked_out": self._checked_out,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "opened": self._opened,
+                "discarded": self._discarded,
+                "timeouts": self._timeouts,
+                "wait_time_total": round(self._wait_time, 6),
+                "wait_time_max": round(self._max_wait_time, 6),
+            }
+
+
+def get_pool(alias: str, max_size: int, timeout: float, max_idle: float):
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(max_size, timeout, max_idle)
+        return _pools[alias]
+
+
+def pool_stats() -> dict:
+    """Stats of every pool of this process, by database alias."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
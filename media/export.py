@@ -0,0 +1,96 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from media.stats import USER_DATA_BY_KIND
+
+EXPORT_FIELDS = [
+    "user",
+    "type",
+    "media_id",
+    "title",
+    "rate",
+    "status",
+    "comment",
+]
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+# Other names accepted for a format.
+FORMAT_ALIASES = {
+    "jsonl": "ndjson",
+}
+EXPORT_FORMATS = [*CONTENT_TYPES, *FORMAT_ALIASES]
+
+CHUNK_SIZE = 2000
+
+
+def canonical_format(export_format: str) -> str:
+    return FORMAT_ALIASES.get(export_format, export_format)
+
+
+class _Echo:
+    """File-like object handing back what csv.writer writes to it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_user_data(user_id: int = None):
+    """Yield the user data rows of one user (or of every user) as dicts.
+
+    Rows are read through server-side cursors ``CHUNK_SIZE`` at a time,
+    so memory use does not depend on the size of the library.
+    """
+    for user_data_model in USER_DATA_BY_KIND.values():
+        media_field = user_data_model.media_field
+        queryset = user_data_model.objects.order_by()
+        if user_id is not None:
+            queryset = queryset.filter(user_id=user_id)
+        rows = queryset.values_list(
+            "user__username",
+            f"{media_field}_id",
+            f"{media_field}__title",
+            "rate",
+            "status",
+            "comment"
+        ).iterator(chunk_size=CHUNK_SIZE)
+        for username, media_id, title, rate, status, comment in rows:
+            yield {
+                "user": username,
+                "type": media_field,
+                "media_id": media_id,
+                "title": title,
+                "rate": str(rate) if rate is not None else None,
+                "status": user_data_model.Status(status).name,
+                "comment": comment,
+            }
+
+
+def render_user_data(rows, export_format: str):
+    """Serialize rows lazily, one line per row."""
+    if canonical_format(export_format) == "csv":
+        writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(row) + "\n"
+
+
+async def aiter_lines(lines, chunk_size: int = CHUNK_SIZE):
+    """Async iterator over the lines of a sync iterator, reading
+    ``chunk_size`` of them per hop to the sync thread.
+
+    ASGI servers need an async iterator to stream a response; Django reads
+    a sync one whole before sending it.
+    """
+    lines = iter(lines)
+    read_chunk = sync_to_async(lambda: "".join(islice(lines, chunk_size)))
+    while chunk := await read_chunk():
+        yield chunk
@@ -0,0 +1,175 @@
+"""The personalized "For you" feed.
+
+Titles the user has not added are scored by how well their genres match
+the genres of the titles the user rated highly, blended with how many
+users have them in their lists.
+
+Every title's stored ``genre_mask`` is kept with its popularity in
+per-kind candidate sets cached in the catalog namespace. Titles share few
+distinct genre combinations, so a user's affinity is computed once per
+mask rather than once per title. The finished feed is cached in the
+user's namespace, which is bumped on every change to the user's lists and
+rates, so a feed request is one cache lookup.
+"""
+import heapq
+import math
+from collections import defaultdict
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import CharField, Value
+
+from media.cache import (
+    aget_or_compute,
+    anamespaced_key,
+    get_or_compute,
+    namespaced_key,
+    user_namespace,
+)
+from media.fragments import (
+    CATALOG_NAMESPACE,
+    acatalog_version,
+    catalog_version,
+)
+from media.models import Anime, Cartoon, MediaDescription, Movie, Series
+
+FEED_KINDS = {
+    "movies": Movie,
+    "anime": Anime,
+    "series": Series,
+    "cartoons": Cartoon,
+}
+FEED_SIZE = getattr(settings, "MEDIA_FEED_SIZE", 30)
+FEED_CACHE_TIMEOUT = getattr(settings, "MEDIA_FEED_CACHE_TIMEOUT", 600)
+CANDIDATES_CACHE_TIMEOUT = getattr(
+    settings, "MEDIA_FEED_CANDIDATES_TIMEOUT", 600
+)
+# Rates from which a title counts as liked.
+HIGH_RATE = Decimal(4)
+# Share of the score from genre affinity; the rest is popularity.
+AFFINITY_WEIGHT = 0.7
+
+
+def compute_candidates(media_model) -> list[tuple[int, str, int, int]]:
+    """``(id, title, genre mask, users listing it)`` of every title of
+    ``media_model``."""
+    status_fields = MediaDescription.STATUS_COUNT_FIELDS.values()
+    return [
+        (media_id, title, mask, sum(counts))
+        for media_id, title, mask, *counts in media_model.objects.order_by(
+            "pk"
+        ).values_list("pk", "title", "genre_mask", *status_fields).iterator()
+    ]
+
+
+def get_candidates(kind: str) -> list[tuple[int, str, int, int]]:
+    return get_or_compute(
+        namespaced_key(CATALOG_NAMESPACE, "feed-candidates", kind),
+        lambda: compute_candidates(FEED_KINDS[kind]),
+        CANDIDATES_CACHE_TIMEOUT
+    )
+
+
+def _user_rows(user_id: int):
+    querysets = []
+    for kind, model in FEED_KINDS.items():
+        through = model.user_data_model()
+        querysets.append(
+            through.objects.filter(user_id=user_id).order_by().annotate(
+                kind=Value(kind, output_field=CharField())
+            ).values_list("kind", f"{through.media_field}_id", "rate")
+        )
+    return querysets[0].union(*querysets[1:], all=True)
+
+
+def genre_affinity(liked_masks: list[int]) -> dict[int, float]:
+    """The share of the liked titles having each genre, keyed by genre
+    bit."""
+    counts = defaultdict(int)
+    for mask in liked_masks:
+        while mask:
+            bit = mask & -mask
+            counts[bit] += 1
+            mask ^= bit
+    return {bit: count / len(liked_masks) for bit, count in counts.items()}
+
+
+def compute_feed(user_id: int, size: int = FEED_SIZE) -> list[dict]:
+    """The ``size`` best scored titles the user has not added yet, of
+    every kind."""
+    listed = defaultdict(set)
+    liked = defaultdict(set)
+    for kind, media_id, rate in _user_rows(user_id):
+        listed[kind].add(media_id)
+        if rate is not None and Decimal(rate) >= HIGH_RATE:
+            liked[kind].add(media_id)
+
+    candidates = {kind: get_candidates(kind) for kind in FEED_KINDS}
+    affinity = genre_affinity([
+        mask
+        for kind, rows in candidates.items()
+        for media_id, _, mask, _ in rows
+        if media_id in liked[kind]
+    ])
+    mask_scores = {}
+    for rows in candidates.values():
+        for _, _, mask, _ in rows:
+            if mask not in mask_scores:
+                mask_scores[mask] = sum(
+                    weight for bit, weight in affinity.items() if mask & bit
+                )
+    max_affinity = max(mask_scores.values(), default=0) or 1
+    max_popularity = math.log1p(max(
+        (
+            popularity
+            for rows in candidates.values()
+            for *_, popularity in rows
+        ),
+        default=0
+    )) or 1
+
+    scored = (
+        (
+            AFFINITY_WEIGHT * mask_scores[mask] / max_affinity
+            + (1 - AFFINITY_WEIGHT) * math.log1p(popularity) / max_popularity,
+            kind,
+            media_id,
+            title,
+        )
+        for kind, rows in candidates.items()
+        for media_id, title, mask, popularity in rows
+        if media_id not in listed[kind]
+    )
+    return [
+        {
+            "kind": kind,
+            "id": media_id,
+            "title": title,
+            "score": round(score, 4),
+        }
+        for score, kind, media_id, title in heapq.nlargest(
+            size, scored, key=lambda row: (row[0], -row[2])
+        )
+    ]
+
+
+def get_feed(user_id: int) -> list[dict]:
+    """The cached feed of the user, recomputed when the user's lists or
+    the catalog change, or after ``FEED_CACHE_TIMEOUT``."""
+    return get_or_compute(
+        namespaced_key(user_namespace(user_id), "feed", catalog_version()),
+        lambda: compute_feed(user_id),
+        FEED_CACHE_TIMEOUT
+    )
+
+
+async def aget_feed(user_id: int) -> list[dict]:
+    """Async version of ``get_feed``."""
+    return await aget_or_compute(
+        await anamespaced_key(
+            user_namespace(user_id), "feed", await acatalog_version()
+        ),
+        lambda: sync_to_async(compute_feed)(user_id),
+        FEED_CACHE_TIMEOUT
+    )
@@ -3,9 +3,9 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
 
+from media.genres import genre_registry
 from media.models import (
     UserMovieData,
-    Genre,
     UserAnimeData,
     UserSeriesData,
     UserCartoonData,
@@ -16,6 +16,32 @@ from media.models import (
 )
 
 
+class GenreMultipleChoiceField(forms.MultipleChoiceField):
+    """Genre picker served from the genre registry instead of a queryset,
+    so neither rendering nor validation queries the genre table."""
+
+    def __init__(self, **kwargs):
+        super().__init__(choices=genre_registry.choices, **kwargs)
+
+    def prepare_value(self, value):
+        if value is None:
+            return value
+        return [getattr(genre, "pk", genre) for genre in value]
+
+    def clean(self, value):
+        pks = super().clean(value)
+        # The registry may have reloaded since the choices were checked.
+        genres = genre_registry.by_id()
+        for pk in pks:
+            if int(pk) not in genres:
+                raise ValidationError(
+                    self.error_messages["invalid_choice"],
+                    code="invalid_choice",
+                    params={"value": pk}
+                )
+        return [genres[int(pk)] for pk in pks]
+
+
 class UserMediaDataForm(forms.ModelForm):
     rate = forms.DecimalField(
         max_digits=3,
@@ -97,8 +123,7 @@ class StatusFilterForm(forms.Form):
 
 
 class MediaFilterForm(forms.Form):
-    genres = forms.ModelMultipleChoiceField(
-        queryset=Genre.objects.all(),
+    genres = GenreMultipleChoiceField(
         widget=forms.CheckboxSelectMultiple(
             attrs={
                 "class": "genres-filter"
@@ -107,6 +132,19 @@ class MediaFilterForm(forms.Form):
         required=False,
         label=""
     )
+    genre_match = forms.ChoiceField(
+        choices=(
+            ("any", "Any selected genre"),
+            ("all", "All selected genres"),
+        ),
+        required=False,
+        label="Match",
+        widget=forms.Select(
+            attrs={
+                "class": "custom-select",
+            }
+        )
+    )
 
 
 class MovieOrderForm(forms.Form):
@@ -140,9 +178,21 @@ class MediaOrderForm(forms.Form):
     )
 
 
+class LibraryOrderForm(forms.Form):
+    order = forms.ChoiceField(
+        choices=(("-rate", "Rate"), ("title", "Title")),
+        required=False,
+        label="Sort by",
+        widget=forms.Select(
+            attrs={
+                "class": "custom-select",
+            }
+        )
+    )
+
+
 class MovieForm(forms.ModelForm):
-    genre = forms.ModelMultipleChoiceField(
-        queryset=Genre.objects.all(),
+    genre = GenreMultipleChoiceField(
         widget=forms.CheckboxSelectMultiple(
             attrs={
                 "class": "genres-filter"
@@ -156,8 +206,7 @@ class MovieForm(forms.ModelForm):
 
 
 class AnimeForm(forms.ModelForm):
-    genre = forms.ModelMultipleChoiceField(
-        queryset=Genre.objects.all(),
+    genre = GenreMultipleChoiceField(
         widget=forms.CheckboxSelectMultiple(
             attrs={
                 "class": "genres-filter"
@@ -178,8 +227,7 @@ class AnimeForm(forms.ModelForm):
 
 
 class SeriesForm(forms.ModelForm):
-    genre = forms.ModelMultipleChoiceField(
-        queryset=Genre.objects.all(),
+    genre = GenreMultipleChoiceField(
         widget=forms.CheckboxSelectMultiple(
             attrs={
                 "class": "genres-filter"
@@ -200,8 +248,7 @@ class SeriesForm(forms.ModelForm):
 
 
 class CartoonForm(forms.ModelForm):
-    genre = forms.ModelMultipleChoiceField(
-        queryset=Genre.objects.all(),
+    genre = GenreMultipleChoiceField(
         widget=forms.CheckboxSelectMultiple(
             attrs={
                 "class": "genres-filter"
@@ -0,0 +1,89 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import transaction
+from django.http import QueryDict
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from media.cache import (
+    anamespace_version,
+    bump_namespace,
+    get_or_compute,
+    namespace_version,
+    namespaced_key,
+)
+
+CATALOG_NAMESPACE = "catalog"
+FRAGMENT_TIMEOUT = getattr(settings, "MEDIA_CATALOG_FRAGMENT_TIMEOUT", 60)
+
+# The query parameters that select what a catalog page lists.
+CATALOG_PARAMS = ("title", "genres", "genre_match", "order", "page", "cursor")
+
+
+def catalog_version() -> int:
+    return namespace_version(CATALOG_NAMESPACE)
+
+
+async def acatalog_version() -> int:
+    return await anamespace_version(CATALOG_NAMESPACE)
+
+
+def bump_catalog_version() -> None:
+    bump_namespace(CATALOG_NAMESPACE)
+
+
+def rows_namespace(model) -> str:
+    """Namespace of the cached catalog rows of one kind, bumped when the
+    stored average rate of one of its titles changes."""
+    return f"{CATALOG_NAMESPACE}-rows-{model._meta.model_name}"
+
+
+def bump_rows_version_on_commit(model) -> None:
+    """Bump the rows version of ``model`` now and again once the
+    transaction commits, so rows cached from the old values in between are
+    dropped."""
+    bump_namespace(rows_namespace(model))
+    transaction.on_commit(lambda: bump_namespace(rows_namespace(model)))
+
+
+def normalized_query(query: QueryDict) -> str:
+    """The catalog parameters of a query string in a canonical form, so
+    equivalent URLs share a cache entry."""
+    params = []
+    for key in CATALOG_PARAMS:
+        values = sorted(
+            value.strip() for value in query.getlist(key) if value.strip()
+        )
+        if key == "title":
+            values = [value.lower() for value in values]
+        params.extend((key, value) for value in dict.fromkeys(values))
+    return urlencode(params)
+
+
+def catalog_fragment_key(model, query: QueryDict) -> str:
+    digest = hashlib.md5(normalized_query(query).encode()).hexdigest()
+    return namespaced_key(rows_namespace(model), catalog_version(), digest)
+
+
+class CatalogRow:
+    def __init__(self, media_id: int, cells: str):
+        self.id = media_id
+        self.cells = mark_safe(cells)
+
+
+def get_catalog_rows(model, query: QueryDict, object_list, template_name: str):
+    """Rendered table cells of a catalog page, minus the per-user column.
+
+    ``object_list`` is only evaluated on a cache miss.
+    """
+    rows = get_or_compute(
+        catalog_fragment_key(model, query),
+        lambda: [
+            (media.id, render_to_string(template_name, {"media": media}))
+            for media in object_list
+        ],
+        FRAGMENT_TIMEOUT
+    )
+    return [CatalogRow(media_id, cells) for media_id, cells in rows]
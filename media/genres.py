@@ -0,0 +1,126 @@
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Exists, F, OuterRef, QuerySet
+
+from media.cache import (
+    bump_namespace,
+    get_or_compute,
+    namespace_version,
+    versioned_key,
+)
+from media.models import Genre
+
+GENRES_NAMESPACE = "genres"
+# Part of the cache key, so rows cached with other columns are not read.
+GENRE_COLUMNS = ("id", "name", "bit")
+
+
+class GenreSnapshot(NamedTuple):
+    version: int | None
+    genres: tuple[Genre, ...]
+    by_id: Mapping[int, Genre]
+
+
+class GenreRegistry:
+    """Process-local copy of the genre table.
+
+    The shared cache holds a version stamp and the genre rows of that
+    version. Every process keeps the rows it last loaded and reloads them
+    only when the stamp changes, so a request costs one cache lookup and no
+    query. ``invalidate`` is called by the Genre save/delete signals.
+
+    The rows live in one immutable snapshot that a reload replaces with a
+    single assignment, so a thread never sees the list of one version with
+    the lookup of another.
+    """
+
+    def __init__(self):
+        self._snapshot = GenreSnapshot(None, (), MappingProxyType({}))
+
+    def _load(self) -> GenreSnapshot:
+        snapshot = self._snapshot
+        version = namespace_version(GENRES_NAMESPACE)
+        if version == snapshot.version:
+            return snapshot
+        rows = get_or_compute(
+            versioned_key(GENRES_NAMESPACE, version, "rows", *GENRE_COLUMNS),
+            lambda: list(
+                Genre.objects.order_by("name").values_list(*GENRE_COLUMNS)
+            ),
+            None
+        )
+        genres = tuple(
+            Genre.from_db(DEFAULT_DB_ALIAS, list(GENRE_COLUMNS), row)
+            for row in rows
+        )
+        snapshot = GenreSnapshot(
+            version,
+            genres,
+            MappingProxyType({genre.id: genre for genre in genres})
+        )
+        self._snapshot = snapshot
+        return snapshot
+
+    def __deepcopy__(self, memo):
+        # Form fields are deep-copied per form along with their bound
+        # ``choices`` callable; they must keep sharing this registry.
+        return self
+
+    def all(self) -> tuple[Genre, ...]:
+        return self._load().genres
+
+    def by_id(self) -> Mapping[int, Genre]:
+        return self._load().by_id
+
+    def choices(self) -> list[tuple[int, str]]:
+        return [(genre.id, genre.name) for genre in self.all()]
+
+    def invalidate(self) -> None:
+        bump_namespace(GENRES_NAMESPACE)
+
+
+genre_registry = GenreRegistry()
+
+
+def genre_mask(genres) -> int:
+    mask = 0
+    for genre in genres:
+        mask |= 1 << genre.bit
+    return mask
+
+
+def filter_by_genres(
+        queryset: QuerySet,
+        genres: list[Genre],
+        match_all: bool = False
+) -> QuerySet:
+    """Titles of ``queryset`` having any (or all) of ``genres``.
+
+    Compares the stored ``genre_mask`` of every title, so there is no join
+    to deduplicate. Genres without a bit fall back to ``EXISTS`` subqueries
+    on the relation.
+    """
+    if all(genre.bit is not None for genre in genres):
+        mask = genre_mask(genres)
+        queryset = queryset.alias(
+            genre_hits=F("genre_mask").bitand(mask)
+        )
+        if match_all:
+            return queryset.filter(genre_hits=mask)
+        return queryset.filter(genre_hits__gt=0)
+
+    through = queryset.model.genre.through
+    media_column = f"{queryset.model._meta.model_name}_id"
+    if match_all:
+        for genre in genres:
+            queryset = queryset.filter(Exists(through.objects.filter(
+                genre_id=genre.pk,
+                **{media_column: OuterRef("pk")}
+            )))
+        return queryset
+    return queryset.filter(Exists(through.objects.filter(
+        genre_id__in=[genre.pk for genre in genres],
+        **{media_column: OuterRef("pk")}
+    )))
@@ -0,0 +1,123 @@
+from django.db.models import CharField, Count, F, Max, QuerySet, Value
+from django.db.models.functions import Greatest
+from django.urls import reverse
+
+from media.catalog import unified_catalog_enabled
+from media.models import UserMediaData, UserMediaDataMixin
+from media.search import SearchBackend, get_search_backend
+from media.stats import USER_DATA_BY_KIND
+
+# Columns shared by every branch of the library query.
+LIBRARY_COLUMNS = (
+    "kind",
+    "id",
+    "media_id",
+    "title",
+    "year_released",
+    "rate",
+    "status",
+    "comment",
+)
+
+# Orderings offered by the library, ``kind`` and ``id`` break ties.
+LIBRARY_ORDERINGS = {
+    "-rate": ["-rate", "kind", "id"],
+    "title": ["title", "kind", "id"],
+}
+
+# URL name prefix of every media kind, e.g. "movies" for "movie".
+URL_PREFIXES = {
+    model.media_field: prefix for prefix, model in USER_DATA_BY_KIND.items()
+}
+
+
+def filter_by_title(queryset: QuerySet, title: str) -> QuerySet:
+    """Restrict per-kind user data to titles matching ``title``."""
+    return get_search_backend().filter(
+        queryset,
+        title,
+        queryset.model.media_field
+    )
+
+
+def library_querysets(
+        user_id: int,
+        status: str = None,
+        title: str = None
+) -> list[QuerySet]:
+    """The user's filtered list entries, one queryset per media kind or a
+    single one over ``UserMediaData`` when the unified catalog is on."""
+    if unified_catalog_enabled():
+        queryset = UserMediaData.objects.filter(user_id=user_id)
+        if title:
+            queryset = SearchBackend().filter(queryset, title, "item")
+        querysets = [queryset]
+    else:
+        querysets = []
+        for model in USER_DATA_BY_KIND.values():
+            queryset = model.objects.filter(user_id=user_id)
+            if title:
+                queryset = filter_by_title(queryset, title)
+            querysets.append(queryset)
+    if status:
+        querysets = [queryset.filter(status=status) for queryset in querysets]
+    return [queryset.order_by() for queryset in querysets]
+
+
+def _media_field(queryset: QuerySet) -> str:
+    return getattr(queryset.model, "media_field", None) or "item"
+
+
+def library_branches(querysets: list[QuerySet]) -> list[QuerySet]:
+    """Shape every queryset into ``LIBRARY_COLUMNS`` rows for one
+    UNION ALL."""
+    branches = []
+    for queryset in querysets:
+        media_field = _media_field(queryset)
+        if media_field == "item":
+            queryset = queryset.annotate(media_id=F("item__source_id"))
+        else:
+            queryset = queryset.annotate(
+                kind=Value(media_field, output_field=CharField()),
+                media_id=F(f"{media_field}_id")
+            )
+        branches.append(
+            queryset.annotate(
+                title=F(f"{media_field}__title"),
+                year_released=F(f"{media_field}__year_released")
+            ).values(*LIBRARY_COLUMNS)
+        )
+    return branches
+
+
+async def alibrary_validators(querysets: list[QuerySet]) -> tuple:
+    """Newest change and row count of the library in one query."""
+    branches = [
+        queryset.values("user_id").annotate(
+            last_modified=Max(
+                Greatest("updated_at", f"{_media_field(queryset)}__updated_at")
+            ),
+            count=Count("id")
+        ).values_list("last_modified", "count")
+        for queryset in querysets
+    ]
+    first, *rest = branches
+    rows = [row async for row in (
+        first.union(*rest, all=True) if rest else first
+    )]
+    timestamps = [last_modified for last_modified, _ in rows if last_modified]
+    return (
+        max(timestamps, default=None),
+        sum(count for _, count in rows)
+    )
+
+
+def prepare_row(row: dict) -> dict:
+    """Add the status label and the links the library table shows."""
+    row["status_display"] = UserMediaDataMixin.Status(row["status"]).label
+    prefix = URL_PREFIXES[row["kind"]]
+    pk = {"pk": row["media_id"]}
+    row["detail_url"] = reverse(f"media:{prefix}-detail", kwargs=pk)
+    row["update_url"] = reverse(f"media:user-{prefix}-data-update", kwargs=pk)
+    row["remove_url"] = reverse(f"media:{prefix}-add", kwargs=pk)
+    return row
@@ -0,0 +1,148 @@
+import json
+import random
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from media.benchmark import (
+    compare,
+    create_benchmark_user,
+    request_specs,
+    run_benchmark,
+    seed_catalog,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with a reproducible synthetic "
+        "catalog, time every URL of the media app through the test client "
+        "and compare p50/p95 latency and query counts with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=2_000,
+                            help="Titles per media kind.")
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--rows", type=int, default=20_000,
+                            help="Random list entries per media kind.")
+        parser.add_argument("--genres", type=int, default=20)
+        parser.add_argument("--list-size", type=int, default=500,
+                            help="Titles per kind in the benchmark user's "
+                                 "lists.")
+        parser.add_argument("--random-seed", type=int, default=42)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--view",
+            action="append",
+            dest="views",
+            help="Only benchmark this URL name (e.g. media:movies-list), "
+                 "repeatable."
+        )
+        parser.add_argument("--output", help="Write the results as JSON.")
+        parser.add_argument(
+            "--baseline",
+            help="Fail when the results regress against this JSON file."
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=1.0,
+            help="Allowed relative p50/p95 growth over the baseline; "
+                 "timings of separate runs easily differ by half."
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=5.0,
+            help="Ignore latency growth smaller than this, which is noise."
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text())
+
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False
+        )
+        try:
+            report = self.benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["output"]:
+            Path(options["output"]).write_text(
+                json.dumps(report, indent=2, sort_keys=True) + "\n"
+            )
+        if baseline is None:
+            return
+        if baseline["scale"] != report["scale"]:
+            self.stderr.write(
+                "The baseline was recorded at another scale, latencies are "
+                "not comparable."
+            )
+        regressions = compare(
+            report["views"],
+            baseline["views"],
+            options["tolerance"],
+            options["min_delta_ms"]
+        )
+        if regressions:
+            raise CommandError(
+                "Regressions against the baseline:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions."))
+
+    def benchmark(self, options) -> dict:
+        cache.clear()
+        rng = random.Random(options["random_seed"])
+        scale = {
+            key: options[key]
+            for key in (
+                "titles",
+                "users",
+                "rows",
+                "genres",
+                "list_size",
+                "random_seed",
+            )
+        }
+        seed_catalog(
+            options["titles"],
+            options["users"],
+            options["rows"],
+            rng,
+            genres=options["genres"],
+            log=self.stdout.write
+        )
+        user = create_benchmark_user(options["list_size"], rng)
+        specs = request_specs(user)
+        if options["views"]:
+            unknown = set(options["views"]) - specs.keys()
+            if unknown:
+                raise CommandError(f"Unknown views: {', '.join(unknown)}")
+            specs = {name: specs[name] for name in options["views"]}
+
+        client = Client()
+        client.force_login(user)
+        # The debug toolbar and query logging would dominate the timings.
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=["testserver"]):
+            views = run_benchmark(
+                client,
+                specs,
+                options["iterations"],
+                log=self.stdout.write
+            )
+        return {
+            "scale": scale,
+            "iterations": options["iterations"],
+            "database": connection.vendor,
+            "views": views,
+        }
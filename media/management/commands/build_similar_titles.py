@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+
+from media.models import Anime, Cartoon, Movie, Series
+from media.recommendations import (
+    DEFAULT_TOP_K,
+    MIN_CORATERS,
+    build_similar_titles,
+    last_built,
+    update_similar_titles,
+)
+
+MEDIA_KINDS = {
+    "movies": Movie,
+    "anime": Anime,
+    "series": Series,
+    "cartoons": Cartoon,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the titles most similar to every title from the users' "
+        "rates (\"users who rated this also liked\") and store them for "
+        "the detail pages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            action="append",
+            dest="kinds",
+            choices=list(MEDIA_KINDS),
+            help="Only build this media kind, repeatable."
+        )
+        parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K,
+                            help="Similar titles stored per title.")
+        parser.add_argument(
+            "--min-coraters",
+            type=int,
+            default=MIN_CORATERS,
+            help="Users who must have rated both titles of a pair."
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only recompute the titles rated since the last build."
+        )
+
+    def handle(self, *args, **options):
+        for kind in options["kinds"] or MEDIA_KINDS:
+            model = MEDIA_KINDS[kind]
+            since = last_built(model) if options["incremental"] else None
+            if since is None:
+                pairs = build_similar_titles(
+                    model,
+                    options["top_k"],
+                    options["min_coraters"]
+                )
+                self.stdout.write(f"{kind}: {pairs} similar pairs stored")
+            else:
+                updated = update_similar_titles(
+                    model,
+                    since,
+                    options["top_k"],
+                    options["min_coraters"]
+                )
+                self.stdout.write(f"{kind}: {updated} titles recomputed")
+        self.stdout.write(self.style.SUCCESS("Similar titles built"))
@@ -0,0 +1,70 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from media.benchmark import MEDIA_MODELS, seed_catalog
+from media.models import Movie, UserMediaDataMixin
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the database query plans of the hot catalog and user list "
+        "queries, optionally seeding synthetic data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed-rows",
+            type=int,
+            default=0,
+            help="Number of user data rows to generate per media type."
+        )
+        parser.add_argument("--seed-titles", type=int, default=100_000)
+        parser.add_argument("--seed-users", type=int, default=1_000)
+        parser.add_argument("--random-seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options["seed_rows"]:
+            seed_catalog(
+                options["seed_titles"],
+                options["seed_users"],
+                options["seed_rows"],
+                random.Random(options["random_seed"]),
+                username_prefix="explain_user",
+                log=self.stdout.write
+            )
+
+        user = get_user_model().objects.order_by("id").first()
+        user_id = user.id if user else 0
+        for media_model in MEDIA_MODELS:
+            user_data_model = media_model.user_data_model()
+            media_field = user_data_model.media_field
+            queries = {
+                f"{media_model.__name__} by title":
+                    media_model.objects.order_by("title")[:50],
+                f"{media_model.__name__} by year":
+                    media_model.objects.order_by("-year_released")[:50],
+                f"{user_data_model.__name__} of user":
+                    user_data_model.objects.filter(user_id=user_id)[:50],
+                f"{user_data_model.__name__} of user with status":
+                    user_data_model.objects.filter(
+                        user_id=user_id,
+                        status=UserMediaDataMixin.Status.watching
+                    )[:50],
+                f"{user_data_model.__name__} of user and title":
+                    user_data_model.objects.filter(
+                        user_id=user_id,
+                        **{f"{media_field}_id": 1}
+                    ),
+            }
+            if media_model is not Movie:
+                queries[f"{media_model.__name__} by seasons"] = (
+                    media_model.objects.order_by("-seasons")[:50]
+                )
+                queries[f"{media_model.__name__} by episodes"] = (
+                    media_model.objects.order_by("-episodes")[:50]
+                )
+            for name, queryset in queries.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(queryset.explain())
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from media.export import EXPORT_FORMATS, iter_user_data, render_user_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the movie, anime, series and cartoon lists of one user, or "
+        "of every user, as CSV or NDJSON (also known as JSONL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Username to export, every user is exported if omitted."
+        )
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            default="csv"
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write to, standard output by default."
+        )
+
+    def handle(self, *args, **options):
+        user_id = None
+        if options["user"]:
+            try:
+                user_id = get_user_model().objects.get(
+                    username=options["user"]
+                ).id
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Unknown user: {options['user']}")
+
+        lines = render_user_data(iter_user_data(user_id), options["format"])
+        if options["output"]:
+            with open(
+                    options["output"], "w", encoding="utf-8", newline=""
+            ) as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,313 @@
+import csv
+import json
+import re
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from media.catalog import sync_media_items, unified_catalog_enabled
+from media.fragments import bump_catalog_version
+from media.genres import genre_registry
+from media.models import Anime, Cartoon, Genre, Movie, Series
+
+MEDIA_TYPES = {
+    "movie": Movie,
+    "anime": Anime,
+    "series": Series,
+    "cartoon": Cartoon,
+}
+
+MEDIA_FIELDS = ["title", "year_released", "seasons", "episodes", "description"]
+INTEGER_FIELDS = ("year_released", "seasons", "episodes")
+
+WHITESPACE = re.compile(r"[\s,]*")
+
+
+def iter_json_array(stream, chunk_size: int = 1 << 16):
+    """Yield the items of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size)
+    position = WHITESPACE.match(buffer).end()
+    if buffer[position:position + 1] != "[":
+        raise CommandError("Expected a JSON array")
+    position += 1
+    eof = False
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if buffer[position:position + 1] == "]":
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError("Malformed JSON array")
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+
+
+def iter_records(path: Path, file_format: str, genre_separator: str):
+    with open(path, encoding="utf-8", newline="") as stream:
+        if file_format == "json":
+            yield from iter_json_array(stream)
+        elif file_format in ("jsonl", "ndjson"):
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(stream):
+                row = {key: value or None for key, value in row.items()}
+                for field in INTEGER_FIELDS:
+                    if row.get(field) is not None:
+                        try:
+                            row[field] = int(row[field])
+                        except ValueError:
+                            raise CommandError(
+                                f"Invalid {field}: {row[field]}"
+                            )
+                genres = row.pop("genres", None) or row.pop("genre", None)
+                row["genres"] = (
+                    genres.split(genre_separator) if genres else []
+                )
+                yield row
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream movies, anime, series and cartoons from JSON, JSONL/NDJSON "
+        "or CSV files (including Django fixtures) and upsert them in "
+        "batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--type",
+            choices=MEDIA_TYPES,
+            help="Media type of records that do not name their model."
+        )
+        parser.add_argument(
+            "--format",
+            choices=("json", "jsonl", "ndjson", "csv"),
+            help="Input format, guessed from the file extension by default."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--genre-separator",
+            default="|",
+            help="Separator of genre names in the CSV genres column."
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in ("json", "jsonl", "ndjson", "csv"):
+            raise CommandError(f"Unknown input format: {file_format}")
+
+        self.default_model = MEDIA_TYPES.get(options["type"])
+        self.batch_size = options["batch_size"]
+        self.genres = {
+            name.lower(): pk
+            for pk, name in Genre.objects.values_list("pk", "name")
+        }
+        self.genre_ids = set(self.genres.values())
+        self.batches = {}
+        self.imported = 0
+        self.duplicates = 0
+        self.unknown_genre_ids = set()
+        self.started = time.perf_counter()
+
+        records = iter_records(path, file_format, options["genre_separator"])
+        for record in records:
+            self.add_record(record)
+        for model in list(self.batches):
+            self.flush(model)
+        self.reset_sequences()
+        genre_registry.invalidate()
+        bump_catalog_version()
+        self.report(final=True)
+
+    @staticmethod
+    def reset_sequences() -> None:
+        """Move pk sequences past explicitly imported ids, like loaddata."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(),
+            [Genre, *MEDIA_TYPES.values()]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def add_record(self, record: dict) -> None:
+        if "fields" in record and "model" in record:
+            model_name = record["model"].split(".")[-1]
+            pk = record.get("pk")
+            record = dict(record["fields"])
+            if model_name == "genre":
+                self.import_genre(pk, record["name"])
+                return
+            model = MEDIA_TYPES.get(model_name)
+            if model is None:
+                raise CommandError(f"Unknown model: {model_name}")
+        else:
+            model = self.default_model
+            pk = record.get("id", record.get("pk"))
+            if model is None:
+                raise CommandError(
+                    "Records do not name their model, pass --type"
+                )
+
+        batch = self.batches.setdefault(model, [])
+        batch.append((pk, record))
+        if len(batch) >= self.batch_size:
+            self.flush(model)
+
+    def import_genre(self, pk, name: str) -> None:
+        genre, _ = Genre.objects.update_or_create(
+            pk=pk,
+            defaults={"name": name}
+        )
+        self.genres[name.lower()] = genre.pk
+        self.genre_ids.add(genre.pk)
+
+    def resolve_genres(self, values: list) -> set:
+        """Map genre pks and names to pks, creating unknown names."""
+        names = {
+            str(value).strip() for value in values
+            if not isinstance(value, int)
+        } - {""}
+        missing = sorted(
+            name for name in names if name.lower() not in self.genres
+        )
+        if missing:
+            for genre in Genre.objects.bulk_create(
+                    [Genre(name=name) for name in missing]
+            ):
+                self.genres[genre.name.lower()] = genre.pk
+                self.genre_ids.add(genre.pk)
+            Genre.assign_bits()
+
+        genre_ids = {self.genres[name.lower()] for name in names}
+        for value in values:
+            if not isinstance(value, int):
+                continue
+            if value in self.genre_ids:
+                genre_ids.add(value)
+            else:
+                self.unknown_genre_ids.add(value)
+        return genre_ids
+
+    @staticmethod
+    def natural_key(model, record: dict) -> tuple:
+        """``(title, year_released)`` of a record without a pk, with the
+        year coerced like the stored column so it matches existing rows."""
+        year = record.get("year_released")
+        try:
+            year = model._meta.get_field("year_released").to_python(year)
+        except ValidationError:
+            raise CommandError(f"Invalid year_released: {year}")
+        return record["title"], year
+
+    def flush(self, model) -> None:
+        batch = self.batches.pop(model, [])
+        if not batch:
+            return
+
+        unkeyed_titles = {
+            record["title"] for pk, record in batch if pk is None
+        }
+        existing = {}
+        if unkeyed_titles:
+            existing = {
+                (title, year): pk
+                for pk, title, year in model.objects.filter(
+                    title__in=unkeyed_titles
+                ).values_list("pk", "title", "year_released")
+            }
+
+        # Records naming the same row (by pk, or by title and year when
+        # they have none) collapse into the last one, so a batch never
+        # inserts a title twice or upserts one row twice.
+        records = {}
+        for pk, record in batch:
+            key = pk
+            if pk is None:
+                key = self.natural_key(model, record)
+                pk = existing.get(key)
+            if pk is not None:
+                key = pk
+            records.pop(key, None)
+            records[key] = (pk, record)
+        self.duplicates += len(batch) - len(records)
+
+        objects = []
+        genres = []
+        for pk, record in records.values():
+            objects.append(model(
+                pk=pk,
+                **{field: record.get(field) for field in MEDIA_FIELDS}
+            ))
+            genres.append(record.get("genres", record.get("genre")))
+
+        genre_through = model.genre.through
+        media_column = f"{model._meta.model_name}_id"
+        with transaction.atomic():
+            keyed = [obj for obj in objects if obj.pk is not None]
+            new = [obj for obj in objects if obj.pk is None]
+            if keyed:
+                model.objects.bulk_create(
+                    keyed,
+                    update_conflicts=True,
+                    unique_fields=["id"],
+                    update_fields=[*MEDIA_FIELDS, "updated_at"]
+                )
+            if new:
+                model.objects.bulk_create(new)
+
+            with_genres = [
+                (obj, names) for obj, names in zip(objects, genres)
+                if names is not None
+            ]
+            genre_through.objects.filter(**{
+                f"{media_column}__in": [obj.pk for obj, _ in with_genres]
+            }).delete()
+            genre_through.objects.bulk_create(
+                [
+                    genre_through(**{
+                        media_column: obj.pk,
+                        "genre_id": genre_id,
+                    })
+                    for obj, names in with_genres
+                    for genre_id in self.resolve_genres(names)
+                ],
+                ignore_conflicts=True
+            )
+            model.refresh_genre_masks([obj.pk for obj, _ in with_genres])
+            if unified_catalog_enabled():
+                sync_media_items(model, [obj.pk for obj in objects])
+
+        self.imported += len(objects)
+        self.report()
+
+    def report(self, final: bool = False) -> None:
+        elapsed = time.perf_counter() - self.started
+        rate = self.imported / elapsed if elapsed else 0
+        message = f"{self.imported} rows imported, {rate:.0f} rows/s"
+        if not final:
+            self.stdout.write(message)
+            return
+        if self.duplicates:
+            message += f", {self.duplicates} duplicate rows merged"
+        self.stdout.write(self.style.SUCCESS(message))
+        if self.unknown_genre_ids:
+            ids = ", ".join(map(str, sorted(self.unknown_genre_ids)))
+            self.stdout.write(
+                self.style.WARNING(f"Skipped unknown genre ids: {ids}")
+            )
@@ -0,0 +1,137 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from media.benchmark import percentile
+from media.models import Movie
+
+
+def default_paths() -> list[str]:
+    paths = [
+        reverse("media:index"),
+        reverse("media:movies-list"),
+        reverse("media:user-movies-list"),
+    ]
+    movie = Movie.objects.order_by("id").first()
+    if movie is not None:
+        paths.append(reverse("media:movies-detail", kwargs={"pk": movie.pk}))
+    return paths
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the same concurrent workload of logged-in page requests to "
+        "one or more running servers (e.g. gunicorn and uvicorn) and "
+        "compare their throughput and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "targets",
+            nargs="+",
+            help="Base URLs to test, optionally named: wsgi=http://..."
+        )
+        parser.add_argument(
+            "--username",
+            required=True,
+            help="User whose session the requests are sent with."
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Path to request, repeatable. Defaults to the dashboard, "
+                 "the movie catalog, the user's movies and a movie page."
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--timeout", type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['username']}")
+        paths = options["paths"] or default_paths()
+        session = self.create_session(user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+        try:
+            for target in options["targets"]:
+                name, _, url = target.rpartition("=")
+                self.run_target(
+                    name or url,
+                    url.rstrip("/"),
+                    paths,
+                    cookie,
+                    options
+                )
+        finally:
+            session.delete()
+
+    @staticmethod
+    def create_session(user):
+        """A session logged in as ``user``, shared by every request."""
+        engine = import_module(settings.SESSION_ENGINE)
+        session = engine.SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session
+
+    @staticmethod
+    def fetch(url: str, cookie: str, timeout: float) -> tuple[float, int]:
+        request = Request(url, headers={"Cookie": cookie})
+        start = time.perf_counter()
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except (URLError, OSError):
+            status = 0
+        return time.perf_counter() - start, status
+
+    def run_target(self, name, base_url, paths, cookie, options):
+        urls = [
+            base_url + paths[index % len(paths)]
+            for index in range(options["requests"])
+        ]
+        # Warm up every page once so the first requests do not pay for
+        # cold caches and lazy imports.
+        for path in paths:
+            self.fetch(base_url + path, cookie, options["timeout"])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(pool.map(
+                lambda url: self.fetch(url, cookie, options["timeout"]),
+                urls
+            ))
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency * 1000 for latency, _ in results]
+        errors = sum(1 for _, status in results if status != 200)
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(
+            f"  {len(results)} requests in {elapsed:.2f}s: "
+            f"{len(results) / elapsed:.1f} req/s, {errors} errors\n"
+            f"  latency ms: mean {statistics.mean(latencies):.1f}, "
+            f"p50 {percentile(latencies, 0.5):.1f}, "
+            f"p95 {percentile(latencies, 0.95):.1f}, "
+            f"p99 {percentile(latencies, 0.99):.1f}"
+        )
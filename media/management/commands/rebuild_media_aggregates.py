@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from media.models import Anime, Cartoon, Genre, Movie, Series
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the stored rating and status aggregates of movies, anime, "
+        "series and cartoons from the users' data, and their genre masks "
+        "from their genres."
+    )
+
+    def handle(self, *args, **options):
+        Genre.assign_bits()
+        for model in (Movie, Anime, Series, Cartoon):
+            updated = model.refresh_rating_aggregates()
+            masks = model.refresh_genre_masks()
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {updated} rebuilt, "
+                f"{masks} genre masks fixed"
+            )
+        self.stdout.write(self.style.SUCCESS("Aggregates rebuilt"))
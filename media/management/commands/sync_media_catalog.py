@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from media.catalog import sync_media_items, sync_user_media_data
+from media.models import (
+    Anime,
+    Cartoon,
+    Movie,
+    Series,
+    UserAnimeData,
+    UserCartoonData,
+    UserMovieData,
+    UserSeriesData,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the unified MediaItem and UserMediaData tables from the "
+        "movie, anime, series and cartoon tables."
+    )
+
+    def handle(self, *args, **options):
+        for model in (Movie, Anime, Series, Cartoon):
+            synced = sync_media_items(model)
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {synced} synced"
+            )
+        for model in (
+                UserMovieData,
+                UserAnimeData,
+                UserSeriesData,
+                UserCartoonData
+        ):
+            synced = sync_user_media_data(model)
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {synced} synced"
+            )
+        self.stdout.write(self.style.SUCCESS("Unified catalog synced"))
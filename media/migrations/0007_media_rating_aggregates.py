@@ -0,0 +1,210 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:53
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+MEDIA_USER_DATA = {
+    "movie": "usermoviedata",
+    "anime": "useranimedata",
+    "series": "userseriesdata",
+    "cartoon": "usercartoondata",
+}
+
+STATUS_COUNT_FIELDS = {
+    "1": "watching_count",
+    "2": "want_to_watch_count",
+    "3": "dropped_count",
+    "4": "finished_count",
+}
+
+
+def populate_rating_aggregates(apps, schema_editor):
+    for media_name, user_data_name in MEDIA_USER_DATA.items():
+        media_model = apps.get_model("media", media_name)
+        user_data_model = apps.get_model("media", user_data_name)
+
+        def subquery(aggregate):
+            return Subquery(
+                user_data_model.objects.filter(
+                    **{media_name: OuterRef("pk")}
+                ).order_by().values(
+                    media_name
+                ).annotate(value=aggregate).values("value")
+            )
+
+        media_model.objects.update(
+            rating_sum=Coalesce(
+                subquery(Sum("rate")), 0, output_field=models.DecimalField()
+            ),
+            rating_count=Coalesce(subquery(Count("rate")), 0),
+            average_rate=subquery(Avg("rate")),
+            **{
+                field: Coalesce(
+                    subquery(Count("id", filter=Q(status=status))), 0
+                )
+                for status, field in STATUS_COUNT_FIELDS.items()
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media", "0006_alter_useranimedata_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="anime",
+            name="average_rate",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=3, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="anime",
+            name="dropped_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="anime",
+            name="finished_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="anime",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="anime",
+            name="rating_sum",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="anime",
+            name="want_to_watch_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="anime",
+            name="watching_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cartoon",
+            name="average_rate",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=3, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="cartoon",
+            name="dropped_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cartoon",
+            name="finished_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cartoon",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cartoon",
+            name="rating_sum",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="cartoon",
+            name="want_to_watch_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cartoon",
+            name="watching_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="average_rate",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=3, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="dropped_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="finished_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="rating_sum",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="want_to_watch_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="watching_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="series",
+            name="average_rate",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=3, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="series",
+            name="dropped_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="series",
+            name="finished_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="series",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="series",
+            name="rating_sum",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name="series",
+            name="want_to_watch_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="series",
+            name="watching_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(
+            populate_rating_aggregates,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,170 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:55
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+rating_aggregates = import_module(
+    "media.migrations.0007_media_rating_aggregates"
+)
+
+
+def remove_duplicate_user_data(apps, schema_editor):
+    removed = 0
+    for media_name, user_data_name in (
+        rating_aggregates.MEDIA_USER_DATA.items()
+    ):
+        user_data_model = apps.get_model("media", user_data_name)
+        duplicates = user_data_model.objects.order_by().values(
+            "user", media_name
+        ).annotate(keep_id=Min("id"), rows=Count("id")).filter(rows__gt=1)
+        for duplicate in duplicates:
+            removed += user_data_model.objects.filter(
+                user=duplicate["user"],
+                **{media_name: duplicate[media_name]}
+            ).exclude(id=duplicate["keep_id"]).delete()[0]
+    if removed:
+        rating_aggregates.populate_rating_aggregates(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media", "0007_media_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_user_data,
+            migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name="anime",
+            index=models.Index(fields=["title"], name="anime_title"),
+        ),
+        migrations.AddIndex(
+            model_name="anime",
+            index=models.Index(fields=["-year_released"], name="anime_year"),
+        ),
+        migrations.AddIndex(
+            model_name="anime",
+            index=models.Index(fields=["-seasons"], name="anime_seasons"),
+        ),
+        migrations.AddIndex(
+            model_name="anime",
+            index=models.Index(fields=["-episodes"], name="anime_episodes"),
+        ),
+        migrations.AddIndex(
+            model_name="cartoon",
+            index=models.Index(fields=["title"], name="cartoon_title"),
+        ),
+        migrations.AddIndex(
+            model_name="cartoon",
+            index=models.Index(fields=["-year_released"], name="cartoon_year"),
+        ),
+        migrations.AddIndex(
+            model_name="cartoon",
+            index=models.Index(fields=["-seasons"], name="cartoon_seasons"),
+        ),
+        migrations.AddIndex(
+            model_name="cartoon",
+            index=models.Index(fields=["-episodes"], name="cartoon_episodes"),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(fields=["title"], name="movie_title"),
+        ),
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(fields=["-year_released"], name="movie_year"),
+        ),
+        migrations.AddIndex(
+            model_name="series",
+            index=models.Index(fields=["title"], name="series_title"),
+        ),
+        migrations.AddIndex(
+            model_name="series",
+            index=models.Index(fields=["-year_released"], name="series_year"),
+        ),
+        migrations.AddIndex(
+            model_name="series",
+            index=models.Index(fields=["-seasons"], name="series_seasons"),
+        ),
+        migrations.AddIndex(
+            model_name="series",
+            index=models.Index(fields=["-episodes"], name="series_episodes"),
+        ),
+        migrations.AddIndex(
+            model_name="useranimedata",
+            index=models.Index(
+                fields=["user", "-rate"], name="useranimedata_user_rate"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="useranimedata",
+            index=models.Index(
+                fields=["user", "status", "-rate"], name="useranimedata_user_st_rate"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usercartoondata",
+            index=models.Index(
+                fields=["user", "-rate"], name="usercartoondata_user_rate"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usercartoondata",
+            index=models.Index(
+                fields=["user", "status", "-rate"], name="usercartoondata_user_st_rate"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usermoviedata",
+            index=models.Index(
+                fields=["user", "-rate"], name="usermoviedata_user_rate"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usermoviedata",
+            index=models.Index(
+                fields=["user", "status", "-rate"], name="usermoviedata_user_st_rate"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userseriesdata",
+            index=models.Index(
+                fields=["user", "-rate"], name="userseriesdata_user_rate"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userseriesdata",
+            index=models.Index(
+                fields=["user", "status", "-rate"], name="userseriesdata_user_st_rate"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="useranimedata",
+            constraint=models.UniqueConstraint(
+                fields=("user", "anime"), name="unique_user_anime"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="usercartoondata",
+            constraint=models.UniqueConstraint(
+                fields=("user", "cartoon"), name="unique_user_cartoon"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="usermoviedata",
+            constraint=models.UniqueConstraint(
+                fields=("user", "movie"), name="unique_user_movie"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="userseriesdata",
+            constraint=models.UniqueConstraint(
+                fields=("user", "series"), name="unique_user_series"
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+import sqlite3
+
+from django.db import migrations
+
+MEDIA_TABLES = ("media_movie", "media_anime", "media_series", "media_cartoon")
+
+# The trigram tokenizer used for substring matching needs SQLite 3.34.
+SQLITE_TRIGRAM_VERSION = (3, 34, 0)
+
+
+def sqlite_statements(table):
+    fts = f"{table}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5("
+        f"title, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, title) VALUES (new.id, new.title); END",
+        f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, title) "
+        f"VALUES ('delete', old.id, old.title); END",
+        f"CREATE TRIGGER {fts}_update AFTER UPDATE OF title ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, title) "
+        f"VALUES ('delete', old.id, old.title); "
+        f"INSERT INTO {fts}(rowid, title) VALUES (new.id, new.title); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table in MEDIA_TABLES:
+            schema_editor.execute(
+                f"CREATE INDEX {table}_title_trgm ON {table} "
+                f"USING gin (UPPER(title::text) gin_trgm_ops)"
+            )
+    elif vendor == "sqlite" and (
+            sqlite3.sqlite_version_info >= SQLITE_TRIGRAM_VERSION
+    ):
+        for table in MEDIA_TABLES:
+            for statement in sqlite_statements(table):
+                schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in MEDIA_TABLES:
+        if vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_title_trgm")
+        elif vendor == "sqlite":
+            for action in ("insert", "delete", "update"):
+                schema_editor.execute(
+                    f"DROP TRIGGER IF EXISTS {table}_fts_{action}"
+                )
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media", "0008_media_indexes_and_unique_user_data"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
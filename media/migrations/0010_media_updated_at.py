@@ -0,0 +1,105 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:16
+
+import sqlite3
+
+from django.db import migrations, models
+
+# A frozen copy of the search tables of 0009_media_title_search, so this
+# migration does not depend on code that may change later.
+MEDIA_TABLES = ("media_movie", "media_anime", "media_series", "media_cartoon")
+
+# The trigram tokenizer used for substring matching needs SQLite 3.34.
+SQLITE_TRIGRAM_VERSION = (3, 34, 0)
+
+
+def sqlite_statements(table):
+    fts = f"{table}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5("
+        f"title, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, title) VALUES (new.id, new.title); END",
+        f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, title) "
+        f"VALUES ('delete', old.id, old.title); END",
+        f"CREATE TRIGGER {fts}_update AFTER UPDATE OF title ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, title) "
+        f"VALUES ('delete', old.id, old.title); "
+        f"INSERT INTO {fts}(rowid, title) VALUES (new.id, new.title); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def rebuild_sqlite_search_indexes(apps, schema_editor):
+    """Recreate the FTS5 tables and triggers, which SQLite loses when this
+    migration remakes the media tables to alter their columns."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for table in MEDIA_TABLES:
+        for action in ("insert", "delete", "update"):
+            schema_editor.execute(
+                f"DROP TRIGGER IF EXISTS {table}_fts_{action}"
+            )
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+    if sqlite3.sqlite_version_info >= SQLITE_TRIGRAM_VERSION:
+        for table in MEDIA_TABLES:
+            for statement in sqlite_statements(table):
+                schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media", "0009_media_title_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop,
+            rebuild_sqlite_search_indexes
+        ),
+        migrations.AddField(
+            model_name="anime",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="cartoon",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="series",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="useranimedata",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="usercartoondata",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="usermoviedata",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="userseriesdata",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(
+            rebuild_sqlite_search_indexes,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,267 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+MEDIA_USER_DATA = {
+    "movie": "UserMovieData",
+    "anime": "UserAnimeData",
+    "series": "UserSeriesData",
+    "cartoon": "UserCartoonData",
+}
+MEDIA_ITEM_FIELDS = ["title", "year_released", "seasons", "episodes", "description"]
+BATCH_SIZE = 1000
+
+
+def copy_to_unified_catalog(apps, schema_editor):
+    # With the catalog off nothing reads or updates the mirror, so a copy
+    # would only go stale; "manage.py sync_media_catalog" fills it once
+    # MEDIA_UNIFIED_CATALOG is switched on.
+    if not getattr(settings, "MEDIA_UNIFIED_CATALOG", False):
+        return
+    media_item_model = apps.get_model("media", "MediaItem")
+    user_media_data_model = apps.get_model("media", "UserMediaData")
+    item_genre_through = media_item_model.genre.through
+    for kind, user_data_name in MEDIA_USER_DATA.items():
+        media_model = apps.get_model("media", kind)
+        user_data_model = apps.get_model("media", user_data_name)
+
+        media_item_model.objects.bulk_create(
+            [
+                media_item_model(kind=kind, source_id=row.pop("pk"), **row)
+                for row in media_model.objects.values(
+                    "pk", *MEDIA_ITEM_FIELDS
+                ).iterator(chunk_size=BATCH_SIZE)
+            ],
+            batch_size=BATCH_SIZE
+        )
+        item_ids = dict(
+            media_item_model.objects.filter(kind=kind).values_list(
+                "source_id", "pk"
+            )
+        )
+        item_genre_through.objects.bulk_create(
+            [
+                item_genre_through(
+                    mediaitem_id=item_ids[media_id],
+                    genre_id=genre_id
+                )
+                for media_id, genre_id in (
+                    media_model.genre.through.objects.values_list(
+                        f"{kind}_id", "genre_id"
+                    ).iterator(chunk_size=BATCH_SIZE)
+                )
+            ],
+            batch_size=BATCH_SIZE
+        )
+        user_media_data_model.objects.bulk_create(
+            [
+                user_media_data_model(
+                    user_id=user_id,
+                    item_id=item_ids[media_id],
+                    kind=kind,
+                    rate=rate,
+                    status=status,
+                    comment=comment
+                )
+                for user_id, media_id, rate, status, comment in (
+                    user_data_model.objects.values_list(
+                        "user_id", f"{kind}_id", "rate", "status", "comment"
+                    ).iterator(chunk_size=BATCH_SIZE)
+                )
+            ],
+            batch_size=BATCH_SIZE
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media", "0010_media_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("movie", "movie"),
+                            ("anime", "anime"),
+                            ("series", "series"),
+                            ("cartoon", "cartoon"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("source_id", models.BigIntegerField()),
+                ("title", models.CharField(max_length=255)),
+                ("year_released", models.IntegerField(blank=True, null=True)),
+                ("seasons", models.IntegerField(blank=True, null=True)),
+                ("episodes", models.IntegerField(blank=True, null=True)),
+                ("description", models.TextField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "genre",
+                    models.ManyToManyField(
+                        related_name="media_items", to="media.genre"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("title",),
+            },
+        ),
+        migrations.CreateModel(
+            name="AnimeItem",
+            fields=[],
+            options={
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("media.mediaitem",),
+        ),
+        migrations.CreateModel(
+            name="CartoonItem",
+            fields=[],
+            options={
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("media.mediaitem",),
+        ),
+        migrations.CreateModel(
+            name="MovieItem",
+            fields=[],
+            options={
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("media.mediaitem",),
+        ),
+        migrations.CreateModel(
+            name="SeriesItem",
+            fields=[],
+            options={
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("media.mediaitem",),
+        ),
+        migrations.CreateModel(
+            name="UserMediaData",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("movie", "movie"),
+                            ("anime", "anime"),
+                            ("series", "series"),
+                            ("cartoon", "cartoon"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "rate",
+                    models.DecimalField(decimal_places=2, max_digits=3, null=True),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("1", "watching"),
+                            ("2", "want to watch"),
+                            ("3", "dropped"),
+                            ("4", "finished"),
+                        ],
+                        default="2",
+                        max_length=15,
+                    ),
+                ),
+                ("comment", models.TextField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="user_data",
+                        to="media.mediaitem",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="media_data",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-rate"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="mediaitem",
+            index=models.Index(fields=["title"], name="mediaitem_title"),
+        ),
+        migrations.AddIndex(
+            model_name="mediaitem",
+            index=models.Index(fields=["kind", "title"], name="mediaitem_kind_title"),
+        ),
+        migrations.AddConstraint(
+            model_name="mediaitem",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "source_id"), name="unique_media_item_source"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usermediadata",
+            index=models.Index(
+                fields=["user", "status", "-rate"], name="usermediadata_user_st_rate"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usermediadata",
+            index=models.Index(
+                fields=["user", "-updated_at"], name="usermediadata_user_updated"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="usermediadata",
+            constraint=models.UniqueConstraint(
+                fields=("user", "item"), name="unique_user_media_item"
+            ),
+        ),
+        migrations.RunPython(
+            copy_to_unified_catalog,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,206 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media", "0011_unified_media_catalog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarCartoon",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "cartoon",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_titles",
+                        to="media.cartoon",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="media.cartoon",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-score"],
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="SimilarMovie",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "movie",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_titles",
+                        to="media.movie",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="media.movie",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-score"],
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="SimilarSeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "series",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_titles",
+                        to="media.series",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="media.series",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "similar series",
+                "ordering": ["-score"],
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="SimilarAnime",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "anime",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_titles",
+                        to="media.anime",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="media.anime",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-score"],
+                "abstract": False,
+                "indexes": [
+                    models.Index(
+                        fields=["anime", "-score"], name="similaranime_anime_score"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="similaranime",
+            constraint=models.UniqueConstraint(
+                fields=("anime", "similar"), name="unique_similar_anime"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="similarcartoon",
+            index=models.Index(
+                fields=["cartoon", "-score"], name="similarcartoon_cartoon_score"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="similarcartoon",
+            constraint=models.UniqueConstraint(
+                fields=("cartoon", "similar"), name="unique_similar_cartoon"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="similarmovie",
+            index=models.Index(
+                fields=["movie", "-score"], name="similarmovie_movie_score"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="similarmovie",
+            constraint=models.UniqueConstraint(
+                fields=("movie", "similar"), name="unique_similar_movie"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="similarseries",
+            index=models.Index(
+                fields=["series", "-score"], name="similarseries_series_score"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="similarseries",
+            constraint=models.UniqueConstraint(
+                fields=("series", "similar"), name="unique_similar_series"
+            ),
+        ),
+    ]
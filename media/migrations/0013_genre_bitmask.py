@@ -0,0 +1,126 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:16
+
+import sqlite3
+from collections import defaultdict
+
+from django.db import migrations, models
+
+MEDIA_MODELS = ["Movie", "Anime", "Series", "Cartoon"]
+GENRE_MASK_BITS = 63
+BATCH_SIZE = 1000
+
+# A frozen copy of the search tables of 0009_media_title_search, so this
+# migration does not depend on code that may change later.
+MEDIA_TABLES = ("media_movie", "media_anime", "media_series", "media_cartoon")
+
+# The trigram tokenizer used for substring matching needs SQLite 3.34.
+SQLITE_TRIGRAM_VERSION = (3, 34, 0)
+
+
+def sqlite_statements(table):
+    fts = f"{table}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5("
+        f"title, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, title) VALUES (new.id, new.title); END",
+        f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, title) "
+        f"VALUES ('delete', old.id, old.title); END",
+        f"CREATE TRIGGER {fts}_update AFTER UPDATE OF title ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, title) "
+        f"VALUES ('delete', old.id, old.title); "
+        f"INSERT INTO {fts}(rowid, title) VALUES (new.id, new.title); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def rebuild_sqlite_search_indexes(apps, schema_editor):
+    """Recreate the FTS5 tables and triggers, which SQLite loses when this
+    migration remakes the media tables to alter their columns."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for table in MEDIA_TABLES:
+        for action in ("insert", "delete", "update"):
+            schema_editor.execute(
+                f"DROP TRIGGER IF EXISTS {table}_fts_{action}"
+            )
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+    if sqlite3.sqlite_version_info >= SQLITE_TRIGRAM_VERSION:
+        for table in MEDIA_TABLES:
+            for statement in sqlite_statements(table):
+                schema_editor.execute(statement)
+
+
+def fill_genre_masks(apps, schema_editor):
+    genre_model = apps.get_model("media", "Genre")
+    genres = list(genre_model.objects.order_by("pk")[:GENRE_MASK_BITS])
+    for bit, genre in enumerate(genres):
+        genre.bit = bit
+    genre_model.objects.bulk_update(genres, ["bit"])
+    bits = {genre.pk: genre.bit for genre in genres}
+
+    for model_name in MEDIA_MODELS:
+        media_model = apps.get_model("media", model_name)
+        media_column = f"{model_name.lower()}_id"
+        masks = defaultdict(int)
+        through = media_model.genre.through
+        for media_id, genre_id in through.objects.values_list(
+                media_column, "genre_id"
+        ).iterator():
+            if genre_id in bits:
+                masks[media_id] |= 1 << bits[genre_id]
+        media_model.objects.bulk_update(
+            [
+                media_model(pk=pk, genre_mask=mask)
+                for pk, mask in masks.items()
+            ],
+            ["genre_mask"],
+            batch_size=BATCH_SIZE
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media", "0012_similar_titles"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop,
+            rebuild_sqlite_search_indexes
+        ),
+        migrations.AddField(
+            model_name="anime",
+            name="genre_mask",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="cartoon",
+            name="genre_mask",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="genre",
+            name="bit",
+            field=models.PositiveSmallIntegerField(
+                blank=True, editable=False, null=True, unique=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="genre_mask",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="series",
+            name="genre_mask",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_genre_masks, migrations.RunPython.noop),
+        migrations.RunPython(
+            rebuild_sqlite_search_indexes,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -1,6 +1,35 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Now
+from django.dispatch import Signal
+
+from media.fragments import bump_rows_version_on_commit
+
+# Sent after User*Data rows are inserted without per-row save() calls.
+user_data_bulk_created = Signal()
+# Sent after User*Data rows are bulk updated (and possibly inserted).
+user_data_bulk_updated = Signal()
+
+# Genre bits of ``genre_mask``, which is a signed 64-bit column.
+GENRE_MASK_BITS = 63
 
 
 class User(AbstractUser):
@@ -23,30 +52,105 @@ class UserMediaDataMixin(models.Model):
         max_length=15
     )
     comment = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    media_field = None
 
     class Meta:
         abstract = True
         ordering = ["-rate"]
+        indexes = [
+            models.Index(
+                fields=["user", "-rate"],
+                name="%(class)s_user_rate"
+            ),
+            models.Index(
+                fields=["user", "status", "-rate"],
+                name="%(class)s_user_st_rate"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    @property
+    def media_id(self):
+        return getattr(self, f"{self.media_field}_id")
+
+    @classmethod
+    def media_model(cls):
+        return cls._meta.get_field(cls.media_field).related_model
 
 
 class UserMovieData(UserMediaDataMixin):
     movie = models.ForeignKey("Movie", on_delete=models.CASCADE)
 
+    media_field = "movie"
+
+    class Meta(UserMediaDataMixin.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "movie"],
+                name="unique_user_movie"
+            ),
+        ]
+
 
 class UserAnimeData(UserMediaDataMixin):
     anime = models.ForeignKey("Anime", on_delete=models.CASCADE)
 
+    media_field = "anime"
+
+    class Meta(UserMediaDataMixin.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "anime"],
+                name="unique_user_anime"
+            ),
+        ]
+
 
 class UserCartoonData(UserMediaDataMixin):
     cartoon = models.ForeignKey("Cartoon", on_delete=models.CASCADE)
 
+    media_field = "cartoon"
+
+    class Meta(UserMediaDataMixin.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "cartoon"],
+                name="unique_user_cartoon"
+            ),
+        ]
+
 
 class UserSeriesData(UserMediaDataMixin):
     series = models.ForeignKey("Series", on_delete=models.CASCADE)
 
+    media_field = "series"
+
+    class Meta(UserMediaDataMixin.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "series"],
+                name="unique_user_series"
+            ),
+        ]
+
 
 class Genre(models.Model):
     name = models.CharField(max_length=25)
+    # Position in the titles' ``genre_mask``; genres past the last bit
+    # have none and are only filtered through the relation.
+    bit = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ["name", ]
@@ -54,6 +158,38 @@ class Genre(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            used = set(
+                Genre.objects.exclude(pk=self.pk).filter(
+                    bit__isnull=False
+                ).values_list("bit", flat=True)
+            )
+            self.bit = next(
+                (bit for bit in range(GENRE_MASK_BITS) if bit not in used),
+                None
+            )
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def assign_bits(cls) -> None:
+        """Give the free bits to the genres without one, oldest first;
+        for genres inserted with ``bulk_create``, which skips ``save``."""
+        used = set(
+            cls.objects.filter(bit__isnull=False).values_list(
+                "bit", flat=True
+            )
+        )
+        free = (bit for bit in range(GENRE_MASK_BITS) if bit not in used)
+        genres = []
+        for genre, bit in zip(
+                cls.objects.filter(bit__isnull=True).order_by("pk"),
+                free
+        ):
+            genre.bit = bit
+            genres.append(genre)
+        cls.objects.bulk_update(genres, ["bit"])
+
 
 class MediaDescription(models.Model):
     title = models.CharField(max_length=255)
@@ -61,9 +197,276 @@ class MediaDescription(models.Model):
     seasons = models.IntegerField(null=True, blank=True)
     episodes = models.IntegerField(null=True, blank=True)
     description = models.TextField(null=True, blank=True)
+    rating_sum = models.DecimalField(
+        default=0,
+        decimal_places=2,
+        max_digits=12
+    )
+    rating_count = models.PositiveIntegerField(default=0)
+    average_rate = models.DecimalField(
+        null=True,
+        blank=True,
+        decimal_places=2,
+        max_digits=3
+    )
+    watching_count = models.PositiveIntegerField(default=0)
+    want_to_watch_count = models.PositiveIntegerField(default=0)
+    dropped_count = models.PositiveIntegerField(default=0)
+    finished_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    # ``1 << genre.bit`` of every genre, so genre filters need no join.
+    genre_mask = models.BigIntegerField(default=0, editable=False)
+
+    STATUS_COUNT_FIELDS = {
+        UserMediaDataMixin.Status.watching: "watching_count",
+        UserMediaDataMixin.Status.want_to_watch: "want_to_watch_count",
+        UserMediaDataMixin.Status.dropped: "dropped_count",
+        UserMediaDataMixin.Status.finished: "finished_count",
+    }
 
     class Meta:
         abstract = True
+        indexes = [
+            models.Index(fields=["title"], name="%(class)s_title"),
+            models.Index(fields=["-year_released"], name="%(class)s_year"),
+        ]
+
+    @classmethod
+    def user_data_model(cls):
+        return cls._meta.get_field("user").remote_field.through
+
+    @classmethod
+    def similar_model(cls):
+        return cls._meta.get_field("similar_titles").related_model
+
+    @classmethod
+    def apply_rating_delta(
+            cls,
+            pk: int,
+            rate_delta=0,
+            rate_count_delta: int = 0,
+            status_deltas: dict = None
+    ) -> None:
+        """Shift the stored aggregates of one row by the given deltas.
+
+        The cached catalog rows of the kind are only dropped when the
+        average rate changes.
+        """
+        changes = {}
+        if rate_count_delta or rate_delta:
+            changes["rating_sum"] = F("rating_sum") + rate_delta
+            changes["rating_count"] = F("rating_count") + rate_count_delta
+        for status, delta in (status_deltas or {}).items():
+            if delta:
+                field = cls.STATUS_COUNT_FIELDS[status]
+                changes[field] = F(field) + delta
+        if not changes:
+            return
+        changes["updated_at"] = Now()
+        queryset = cls.objects.filter(pk=pk)
+        if "rating_count" in changes:
+            # Runs first, as both sides compare the stored sum and count
+            # with the shifted ones.
+            if cls._shift_average_rate(
+                    queryset,
+                    rate_delta,
+                    rate_count_delta
+            ):
+                bump_rows_version_on_commit(cls)
+        queryset.update(**changes)
+
+    @classmethod
+    def toggle_in_user_list(cls, user_id: int, pks) -> dict:
+        """Add the titles missing from the user's list and remove the ones
+        already in it.
+
+        Returns a mapping of every existing pk to whether it is in the list
+        afterwards; unknown pks are left out.
+
+        The titles are locked, in pk order, for the whole toggle, so
+        concurrent toggles of the same titles run one after the other and
+        never apply the same aggregate change twice.
+        """
+        through = cls.user_data_model()
+        media_field = through.media_field
+        with transaction.atomic():
+            in_list = dict(
+                cls.objects.select_for_update().filter(pk__in=pks).annotate(
+                    in_list=Exists(
+                        through.objects.filter(
+                            user_id=user_id,
+                            **{media_field: OuterRef("pk")}
+                        )
+                    )
+                ).order_by("pk").values_list("pk", "in_list")
+            )
+            removed = [pk for pk, present in in_list.items() if present]
+            added = [pk for pk, present in in_list.items() if not present]
+            if removed:
+                through.objects.filter(
+                    user_id=user_id,
+                    **{f"{media_field}__in": removed}
+                ).delete()
+            if added:
+                through.objects.bulk_create(
+                    [
+                        through(user_id=user_id, **{f"{media_field}_id": pk})
+                        for pk in added
+                    ],
+                    ignore_conflicts=True
+                )
+                # The new entries have no rate yet.
+                cls.refresh_rating_aggregates(added, ratings=False)
+                user_data_bulk_created.send(
+                    sender=through,
+                    user_ids=[user_id],
+                    media_ids=added
+                )
+        return {pk: not present for pk, present in in_list.items()}
+
+    @classmethod
+    def refresh_genre_masks(cls, pks=None) -> int:
+        """Recompute ``genre_mask`` from the genre relation.
+
+        When ``pks`` is given only those rows are rebuilt, otherwise the
+        whole table is. Returns the number of rows changed.
+        """
+        through = cls.genre.through
+        media_column = f"{cls._meta.model_name}_id"
+        links = through.objects.filter(genre__bit__isnull=False)
+        titles = cls.objects.all()
+        if pks is not None:
+            pks = list(pks)
+            links = links.filter(**{f"{media_column}__in": pks})
+            titles = titles.filter(pk__in=pks)
+        masks = defaultdict(int)
+        for media_id, bit in links.values_list(
+                media_column, "genre__bit"
+        ).iterator():
+            masks[media_id] |= 1 << bit
+        changed = [
+            cls(pk=pk, genre_mask=masks[pk])
+            for pk, mask in titles.values_list("pk", "genre_mask").iterator()
+            if mask != masks[pk]
+        ]
+        cls.objects.bulk_update(changed, ["genre_mask"], batch_size=1000)
+        return len(changed)
+
+    @classmethod
+    def clear_genre_bit(cls, bit: int) -> int:
+        """Unset ``bit`` in every ``genre_mask`` that has it."""
+        value = 1 << bit
+        return cls.objects.alias(
+            has_genre=F("genre_mask").bitand(value)
+        ).filter(has_genre=value).update(
+            genre_mask=F("genre_mask").bitand(~value)
+        )
+
+    @classmethod
+    def refresh_rating_aggregates(cls, pks=None, ratings: bool = True) -> int:
+        """Recompute the stored aggregates from the user data table.
+
+        When ``pks`` is given only those rows are rebuilt, otherwise the
+        whole table is. Returns the number of rows updated. The cached
+        catalog rows of the kind are only dropped when an average rate
+        changes; pass ``ratings=False`` when no rate changed to only
+        recompute the status counts.
+        """
+        queryset = cls.objects.all()
+        if pks is not None:
+            queryset = queryset.filter(pk__in=list(pks))
+        status_counts = {
+            field: Coalesce(
+                cls._user_data_subquery(
+                    Count("id", filter=Q(status=status))
+                ),
+                0
+            )
+            for status, field in cls.STATUS_COUNT_FIELDS.items()
+        }
+        if not ratings:
+            return queryset.update(updated_at=Now(), **status_counts)
+        rating_sum = Coalesce(
+            cls._user_data_subquery(Sum("rate")),
+            0,
+            output_field=models.DecimalField()
+        )
+        rating_count = Coalesce(cls._user_data_subquery(Count("rate")), 0)
+        average_rate = cls._user_data_subquery(Avg("rate"))
+        # Runs first, as it compares the stored sum and count with the
+        # recomputed ones: sum / count != new sum / new count, without
+        # dividing, or one of the counts is zero.
+        if queryset.alias(
+            new_count=rating_count,
+            sum_times_new_count=ExpressionWrapper(
+                F("rating_sum") * rating_count,
+                output_field=models.DecimalField()
+            ),
+            new_sum_times_count=ExpressionWrapper(
+                rating_sum * F("rating_count"),
+                output_field=models.DecimalField()
+            ),
+        ).filter(
+            Q(rating_count=0, new_count__gt=0)
+            | Q(rating_count__gt=0, new_count=0)
+            | ~Q(sum_times_new_count=F("new_sum_times_count"))
+        ).update(average_rate=average_rate):
+            bump_rows_version_on_commit(cls)
+        return queryset.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            average_rate=average_rate,
+            updated_at=Now(),
+            **status_counts
+        )
+
+    @classmethod
+    def _user_data_subquery(cls, aggregate) -> Subquery:
+        through = cls.user_data_model()
+        return Subquery(
+            through.objects.filter(
+                **{through.media_field: OuterRef("pk")}
+            ).order_by().values(
+                through.media_field
+            ).annotate(value=aggregate).values("value")
+        )
+
+    @staticmethod
+    def _shift_average_rate(queryset, rate_delta, rate_count_delta) -> int:
+        """Set ``average_rate`` from the stored sum and count shifted by
+        the deltas, on the rows whose average changes by it. Returns the
+        number of those rows."""
+        if not rate_count_delta:
+            if not rate_delta:
+                return 0
+            average_changed = Q()
+        else:
+            # sum / count != (sum + Δsum) / (count + Δcount), without
+            # dividing, or one of the counts is zero.
+            average_changed = (
+                Q(rating_count=0)
+                | Q(rating_count=-rate_count_delta)
+                | ~Q(sum_times_count_delta=F("count_times_rate_delta"))
+            )
+        new_count = F("rating_count") + rate_count_delta
+        return queryset.alias(
+            sum_times_count_delta=ExpressionWrapper(
+                F("rating_sum") * rate_count_delta,
+                output_field=models.DecimalField()
+            ),
+            count_times_rate_delta=ExpressionWrapper(
+                F("rating_count") * Value(rate_delta),
+                output_field=models.DecimalField()
+            ),
+        ).filter(average_changed).update(
+            average_rate=Case(
+                When(rating_count=-rate_count_delta, then=None),
+                default=Cast(
+                    F("rating_sum") + rate_delta, FloatField()
+                ) / new_count,
+                output_field=FloatField()
+            )
+        )
 
 
 class Movie(MediaDescription):
@@ -74,7 +477,7 @@ class Movie(MediaDescription):
         related_name="movies"
     )
 
-    class Meta:
+    class Meta(MediaDescription.Meta):
         ordering = ("title", )
 
     def __str__(self):
@@ -89,8 +492,12 @@ class Series(MediaDescription):
         related_name="series"
     )
 
-    class Meta:
+    class Meta(MediaDescription.Meta):
         ordering = ("title", )
+        indexes = MediaDescription.Meta.indexes + [
+            models.Index(fields=["-seasons"], name="%(class)s_seasons"),
+            models.Index(fields=["-episodes"], name="%(class)s_episodes"),
+        ]
         verbose_name_plural = "series"
 
     def __str__(self):
@@ -105,8 +512,12 @@ class Anime(MediaDescription):
         related_name="anime"
     )
 
-    class Meta:
+    class Meta(MediaDescription.Meta):
         ordering = ("title", )
+        indexes = MediaDescription.Meta.indexes + [
+            models.Index(fields=["-seasons"], name="%(class)s_seasons"),
+            models.Index(fields=["-episodes"], name="%(class)s_episodes"),
+        ]
         verbose_name_plural = "anime"
 
     def __str__(self):
@@ -121,8 +532,283 @@ class Cartoon(MediaDescription):
         related_name="cartoons"
     )
 
+    class Meta(MediaDescription.Meta):
+        ordering = ("title", )
+        indexes = MediaDescription.Meta.indexes + [
+            models.Index(fields=["-seasons"], name="%(class)s_seasons"),
+            models.Index(fields=["-episodes"], name="%(class)s_episodes"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class SimilarMediaMixin(models.Model):
+    """A precomputed "users who rated this also liked" pair, built by the
+    ``build_similar_titles`` command."""
+
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    media_field = None
+
+    class Meta:
+        abstract = True
+        ordering = ["-score"]
+
+
+class SimilarMovie(SimilarMediaMixin):
+    movie = models.ForeignKey(
+        Movie,
+        on_delete=models.CASCADE,
+        related_name="similar_titles"
+    )
+    similar = models.ForeignKey(
+        Movie,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+
+    media_field = "movie"
+
+    class Meta(SimilarMediaMixin.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["movie", "similar"],
+                name="unique_similar_movie"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["movie", "-score"],
+                name="similarmovie_movie_score"
+            ),
+        ]
+
+
+class SimilarAnime(SimilarMediaMixin):
+    anime = models.ForeignKey(
+        Anime,
+        on_delete=models.CASCADE,
+        related_name="similar_titles"
+    )
+    similar = models.ForeignKey(
+        Anime,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+
+    media_field = "anime"
+
+    class Meta(SimilarMediaMixin.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["anime", "similar"],
+                name="unique_similar_anime"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["anime", "-score"],
+                name="similaranime_anime_score"
+            ),
+        ]
+
+
+class SimilarSeries(SimilarMediaMixin):
+    series = models.ForeignKey(
+        Series,
+        on_delete=models.CASCADE,
+        related_name="similar_titles"
+    )
+    similar = models.ForeignKey(
+        Series,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+
+    media_field = "series"
+
+    class Meta(SimilarMediaMixin.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["series", "similar"],
+                name="unique_similar_series"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["series", "-score"],
+                name="similarseries_series_score"
+            ),
+        ]
+        verbose_name_plural = "similar series"
+
+
+class SimilarCartoon(SimilarMediaMixin):
+    cartoon = models.ForeignKey(
+        Cartoon,
+        on_delete=models.CASCADE,
+        related_name="similar_titles"
+    )
+    similar = models.ForeignKey(
+        Cartoon,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+
+    media_field = "cartoon"
+
+    class Meta(SimilarMediaMixin.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cartoon", "similar"],
+                name="unique_similar_cartoon"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["cartoon", "-score"],
+                name="similarcartoon_cartoon_score"
+            ),
+        ]
+
+
+class MediaItem(models.Model):
+    """Every title of every kind in one table.
+
+    Mirrors the per-kind tables, which stay authoritative, when
+    ``MEDIA_UNIFIED_CATALOG`` is enabled, so cross-kind queries are a
+    single indexed scan instead of four queries glued with UNION. Nothing
+    is written while it is off; ``manage.py sync_media_catalog`` fills the
+    table when it is switched on.
+    """
+
+    class Kind(models.TextChoices):
+        movie = "movie", "movie"
+        anime = "anime", "anime"
+        series = "series", "series"
+        cartoon = "cartoon", "cartoon"
+
+    kind = models.CharField(choices=Kind.choices, max_length=10)
+    source_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    year_released = models.IntegerField(null=True, blank=True)
+    seasons = models.IntegerField(null=True, blank=True)
+    episodes = models.IntegerField(null=True, blank=True)
+    description = models.TextField(null=True, blank=True)
+    genre = models.ManyToManyField(Genre, related_name="media_items")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    proxy_kind = None
+
     class Meta:
         ordering = ("title", )
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "source_id"],
+                name="unique_media_item_source"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["title"], name="mediaitem_title"),
+            models.Index(
+                fields=["kind", "title"], name="mediaitem_kind_title"
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        if self.proxy_kind:
+            self.kind = self.proxy_kind
+        super().save(*args, **kwargs)
+
+    def media_model(self):
+        return self._meta.apps.get_model(self._meta.app_label, self.kind)
+
+
+class MediaItemKindManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(kind=self.model.proxy_kind)
+
+
+class MovieItem(MediaItem):
+    proxy_kind = MediaItem.Kind.movie
+
+    objects = MediaItemKindManager()
+
+    class Meta:
+        proxy = True
+
+
+class AnimeItem(MediaItem):
+    proxy_kind = MediaItem.Kind.anime
+
+    objects = MediaItemKindManager()
+
+    class Meta:
+        proxy = True
+
+
+class SeriesItem(MediaItem):
+    proxy_kind = MediaItem.Kind.series
+
+    objects = MediaItemKindManager()
+
+    class Meta:
+        proxy = True
+
+
+class CartoonItem(MediaItem):
+    proxy_kind = MediaItem.Kind.cartoon
+
+    objects = MediaItemKindManager()
+
+    class Meta:
+        proxy = True
+
+
+class UserMediaData(models.Model):
+    """Every user's list entries of every kind, mirrored like
+    ``MediaItem``."""
+
+    user = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="media_data"
+    )
+    item = models.ForeignKey(
+        MediaItem,
+        on_delete=models.CASCADE,
+        related_name="user_data"
+    )
+    kind = models.CharField(choices=MediaItem.Kind.choices, max_length=10)
+    rate = models.DecimalField(null=True, decimal_places=2, max_digits=3)
+    status = models.CharField(
+        choices=UserMediaDataMixin.Status.choices,
+        default=UserMediaDataMixin.Status.want_to_watch,
+        max_length=15
+    )
+    comment = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-rate"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "item"],
+                name="unique_user_media_item"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "status", "-rate"],
+                name="usermediadata_user_st_rate"
+            ),
+            models.Index(
+                fields=["user", "-updated_at"],
+                name="usermediadata_user_updated"
+            ),
+        ]
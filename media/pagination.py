@@ -0,0 +1,292 @@
+import base64
+import binascii
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+
+def encode_cursor(
+        ordering: list[str],
+        values: list,
+        backwards: bool = False
+) -> str:
+    payload = json.dumps(
+        {"o": ordering, "v": values, "b": backwards},
+        default=str,
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, ordering: list[str]) -> tuple[list, bool]:
+    """The sort key and direction of a cursor made for ``ordering``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["o"] != ordering:
+            raise ValueError("Cursor of another ordering")
+        values = payload["v"]
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError("Cursor of another ordering")
+        return values, bool(payload["b"])
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise Http404("Invalid cursor")
+
+
+def _key_field(queryset: QuerySet, name: str):
+    if name == "pk":
+        return queryset.model._meta.pk
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    return queryset.model._meta.get_field(name)
+
+
+def coerce_key(queryset: QuerySet, ordering: list[str], values: list) -> list:
+    """Cursor values converted to the types of their ordering fields, so a
+    forged cursor fails here rather than in the query."""
+    try:
+        return [
+            None if value is None
+            else _key_field(queryset, field.lstrip("-")).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except (ValidationError, ValueError, TypeError):
+        raise Http404("Invalid cursor")
+
+
+def keyset_ordering(queryset: QuerySet) -> list[str] | None:
+    """The queryset ordering with ``id`` appended as a tie breaker, or
+    ``None`` when it can not be used for keyset pagination."""
+    ordering = list(
+        queryset.query.order_by or queryset.model._meta.ordering
+    )
+    if not all(
+            isinstance(field, str) and "__" not in field
+            for field in ordering
+    ):
+        return None
+    if not {"id", "-id", "pk", "-pk"} & set(ordering):
+        ordering.append("id")
+    return ordering
+
+
+def _keyset_filter(
+        ordering: list[str],
+        values: list,
+        nulls_largest: bool
+) -> Q:
+    """Rows strictly after ``values`` in ``ordering``, following the
+    database's own placement of NULLs."""
+    after = Q(pk__in=[])
+    equal = Q()
+    for field, value in zip(ordering, values):
+        descending = field.startswith("-")
+        name = field.lstrip("-")
+        nulls_after = descending != nulls_largest
+        if value is None:
+            key_after = (
+                Q(pk__in=[]) if nulls_after
+                else Q(**{f"{name}__isnull": False})
+            )
+            key_equal = Q(**{f"{name}__isnull": True})
+        else:
+            lookup = "lt" if descending else "gt"
+            key_after = Q(**{f"{name}__{lookup}": value})
+            if nulls_after:
+                key_after |= Q(**{f"{name}__isnull": True})
+            key_equal = Q(**{name: value})
+        after |= equal & key_after
+        equal &= key_equal
+    return after
+
+
+def _reverse(field: str) -> str:
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def estimate_count(queryset: QuerySet) -> int | None:
+    """Planner row estimate of an unfiltered table on PostgreSQL."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql" or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class KeysetPage:
+    """One page of a queryset sliced by the sort key of its last row
+    instead of an OFFSET, so deep pages cost as much as the first one."""
+
+    is_keyset = True
+
+    def __init__(
+            self,
+            queryset: QuerySet,
+            ordering: list[str],
+            per_page: int,
+            cursor: str = None
+    ):
+        values, backwards = [], False
+        if cursor:
+            values, backwards = decode_cursor(cursor, ordering)
+            values = coerce_key(self.key_queryset(queryset), ordering, values)
+        self.ordering = ordering
+        direction = ordering
+        if backwards:
+            direction = [_reverse(field) for field in ordering]
+        connection = connections[self.get_db(queryset)]
+        key_filter = None
+        if values:
+            key_filter = _keyset_filter(
+                direction,
+                values,
+                connection.features.nulls_order_largest
+            )
+        rows = self.fetch(queryset, direction, key_filter, per_page + 1)
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+
+        self.object_list = rows
+        self.estimated_count = None
+        self._has_next = has_more if not backwards else bool(values)
+        self._has_previous = bool(values) if not backwards else has_more
+
+    @staticmethod
+    def get_db(queryset: QuerySet) -> str:
+        return queryset.db
+
+    @staticmethod
+    def key_queryset(queryset: QuerySet) -> QuerySet:
+        """The queryset whose fields type the sort key."""
+        return queryset
+
+    @staticmethod
+    def fetch(
+            queryset: QuerySet,
+            direction: list[str],
+            key_filter: Q | None,
+            limit: int
+    ) -> list:
+        queryset = queryset.order_by(*direction)
+        if key_filter is not None:
+            queryset = queryset.filter(key_filter)
+        return list(queryset[:limit])
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _key(self, obj) -> list:
+        values = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+            values.append(str(value) if isinstance(value, Decimal) else value)
+        return values
+
+    def has_next(self) -> bool:
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self) -> bool:
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self) -> str | None:
+        if not self.has_next():
+            return None
+        return encode_cursor(self.ordering, self._key(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self) -> str | None:
+        if not self.has_previous():
+            return None
+        return encode_cursor(
+            self.ordering,
+            self._key(self.object_list[0]),
+            backwards=True
+        )
+
+
+class UnionKeysetPage(KeysetPage):
+    """A keyset page over the UNION ALL of several ``values()`` querysets
+    sharing the same columns.
+
+    The key filter is pushed into every branch, and on databases that
+    allow it so are the ordering and the limit, so each branch reads at
+    most one page from its own index.
+    """
+
+    @staticmethod
+    def get_db(branches: list[QuerySet]) -> str:
+        return branches[0].db
+
+    @staticmethod
+    def key_queryset(branches: list[QuerySet]) -> QuerySet:
+        return branches[0]
+
+    @staticmethod
+    def fetch(
+            branches: list[QuerySet],
+            direction: list[str],
+            key_filter: Q | None,
+            limit: int
+    ) -> list:
+        if key_filter is not None:
+            branches = [branch.filter(key_filter) for branch in branches]
+        connection = connections[branches[0].db]
+        if connection.features.supports_slicing_ordering_in_compound:
+            branches = [
+                branch.order_by(*direction)[:limit] for branch in branches
+            ]
+        first, *rest = branches
+        if rest:
+            first = first.union(*rest, all=True)
+        return list(first.order_by(*direction)[:limit])
+
+
+class KeysetPaginationMixin:
+    """Opt-in keyset pagination for list views.
+
+    Enabled per view with ``keyset_pagination = True`` or for every view
+    with the ``MEDIA_KEYSET_PAGINATION`` setting. Views ordered by
+    anything other than plain field names keep offset pagination.
+    """
+
+    keyset_pagination = None
+    cursor_kwarg = "cursor"
+
+    def use_keyset_pagination(self) -> bool:
+        if self.keyset_pagination is not None:
+            return self.keyset_pagination
+        return getattr(settings, "MEDIA_KEYSET_PAGINATION", False)
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = keyset_ordering(queryset)
+        if not self.use_keyset_pagination() or ordering is None:
+            return super().paginate_queryset(queryset, page_size)
+        page = KeysetPage(
+            queryset,
+            ordering,
+            page_size,
+            self.request.GET.get(self.cursor_kwarg)
+        )
+        page.estimated_count = estimate_count(queryset)
+        return None, page, page.object_list, page.has_other_pages()
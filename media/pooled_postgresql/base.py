@@ -0,0 +1,74 @@
+"""PostgreSQL backend that takes its connections from a per-process
+``media.dbpool.ConnectionPool`` instead of opening and closing them.
+
+Configured by the ``POOL`` entry of the database settings::
+
+    "POOL": {"MAX_SIZE": 4, "TIMEOUT": 30, "MAX_IDLE": 600}
+
+Use it with ``CONN_MAX_AGE = 0`` so every request hands its connection
+back; with ``CONN_HEALTH_CHECKS`` idle connections are pinged before they
+are reused.
+
+Django 5.1 ships its own pool (``OPTIONS["pool"]``, backed by psycopg_pool)
+and the settings switch to it there; this backend is for older versions.
+Its pool is ``connection_pool`` so it does not shadow the ``pool`` the
+stock wrapper defines from 5.1 on.
+"""
+from django.db.backends.postgresql.base import (
+    Database,
+    DatabaseWrapper as PostgreSQLDatabaseWrapper,
+)
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from media.dbpool import PoolTimeout, get_pool
+
+
+def _is_healthy(connection) -> bool:
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    @property
+    def connection_pool(self):
+        options = self.settings_dict.get("POOL", {})
+        return get_pool(
+            self.alias,
+            max_size=options.get("MAX_SIZE", 4),
+            timeout=options.get("TIMEOUT", 30),
+            max_idle=options.get("MAX_IDLE", 600)
+        )
+
+    def get_new_connection(self, conn_params):
+        health_check = (
+            _is_healthy if self.settings_dict["CONN_HEALTH_CHECKS"] else None
+        )
+        try:
+            connection = self.connection_pool.getconn(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    conn_params
+                ),
+                health_check
+            )
+        except PoolTimeout as error:
+            raise Database.OperationalError(str(error)) from error
+        if not hasattr(self, "isolation_level"):
+            # The parent records the isolation level while connecting; a
+            # reused connection was opened with the same OPTIONS.
+            self.isolation_level = IsolationLevel(
+                self.settings_dict["OPTIONS"].get(
+                    "isolation_level",
+                    IsolationLevel.READ_COMMITTED
+                )
+            )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.connection_pool.putconn(self.connection)
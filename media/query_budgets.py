@@ -0,0 +1,40 @@
+"""Upper bound on the SQL queries of one request to every named URL of
+``media.urls``, with cold caches.
+
+The bounds do not depend on page size or on how many titles a user has:
+``media/tests/test_query_budgets.py`` checks every route against them with
+a small and a multi-page dataset. Lower a bound when a view gets cheaper;
+raising one needs a reason in the commit.
+"""
+
+QUERY_BUDGETS = {
+    "media:index": 3,
+    "media:user-library-export": 6,
+    "media:metrics": 2,
+    "media:db-pool-stats": 2,
+    "media:user-library-list": 4,
+    "media:for-you": 7,
+    "media:api-feed": 7,
+    "media:api-user-data-batch-update": 8,
+    "media:api-user-data-list": 3,
+    "media:api-user-data-batch": 3,
+    "media:api-user-data-detail": 3,
+    "media:api-media-list": 4,
+    "media:api-media-batch": 3,
+    "media:api-media-detail": 3,
+    "media:users-create": 2,
+}
+
+# The routes every media kind has, with the same budget for each kind.
+for kind in ("movies", "anime", "series", "cartoons"):
+    QUERY_BUDGETS.update({
+        f"media:user-{kind}-list": 9,
+        f"media:user-{kind}-data-update": 4,
+        f"media:{kind}-list": 8,
+        f"media:{kind}-add": 9,
+        f"media:{kind}-toggle": 7,
+        f"media:{kind}-create": 3,
+        f"media:{kind}-detail": 5,
+        f"media:{kind}-update": 5,
+        f"media:{kind}-delete": 3,
+    })
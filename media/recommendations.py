@@ -0,0 +1,221 @@
+"""Item-to-item collaborative filtering: "users who rated this also
+liked".
+
+The users' rates of one media kind form a sparse user x title matrix,
+each rate centered on the user's mean so generous and harsh raters weigh
+the same. Two titles are similar when the users who rated both rated them
+the same way (adjusted cosine), shrunk towards zero while few users rated
+both. The top-K similar titles of every title are stored in the
+``Similar*`` tables by ``build_similar_titles``, so detail pages read them
+with one indexed lookup.
+"""
+import heapq
+from collections import Counter, defaultdict
+from datetime import datetime
+from math import sqrt
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from media.fragments import bump_catalog_version
+
+DEFAULT_TOP_K = 10
+MIN_CORATERS = 2
+# Co-raters needed for half of the raw similarity to count.
+SHRINKAGE = 5
+BATCH_SIZE = 1000
+
+
+class RatingMatrix:
+    """The centered rates of one media kind, indexed both by user and by
+    title."""
+
+    def __init__(self, rates):
+        by_user = defaultdict(dict)
+        for user_id, media_id, rate in rates:
+            by_user[user_id][media_id] = float(rate)
+        self.users = {}
+        self.items = defaultdict(dict)
+        for user_id, user_rates in by_user.items():
+            mean = sum(user_rates.values()) / len(user_rates)
+            centered = {
+                media_id: rate - mean
+                for media_id, rate in user_rates.items()
+                if rate != mean
+            }
+            self.users[user_id] = centered
+            for media_id, value in centered.items():
+                self.items[media_id][user_id] = value
+        self.norms = {
+            media_id: sqrt(sum(value * value for value in column.values()))
+            for media_id, column in self.items.items()
+        }
+
+    @classmethod
+    def load(cls, media_model) -> "RatingMatrix":
+        through = media_model.user_data_model()
+        return cls(
+            through.objects.filter(rate__isnull=False).order_by().values_list(
+                "user_id",
+                f"{through.media_field}_id",
+                "rate"
+            ).iterator(chunk_size=BATCH_SIZE)
+        )
+
+    def scores(
+            self,
+            media_id: int,
+            min_coraters: int = MIN_CORATERS
+    ) -> dict[int, float]:
+        """The positive similarity of ``media_id`` to every title rated by
+        at least ``min_coraters`` of the same users."""
+        dots = defaultdict(float)
+        coraters = Counter()
+        for user_id, value in self.items.get(media_id, {}).items():
+            for other_id, other_value in self.users[user_id].items():
+                dots[other_id] += value * other_value
+                coraters[other_id] += 1
+        dots.pop(media_id, None)
+        scores = {}
+        for other_id, dot in dots.items():
+            count = coraters[other_id]
+            if count < min_coraters or dot <= 0:
+                continue
+            cosine = dot / (self.norms[media_id] * self.norms[other_id])
+            scores[other_id] = cosine * count / (count + SHRINKAGE)
+        return scores
+
+    def neighbours(
+            self,
+            media_id: int,
+            top_k: int = DEFAULT_TOP_K,
+            min_coraters: int = MIN_CORATERS
+    ) -> list[tuple[int, float]]:
+        return heapq.nlargest(
+            top_k,
+            self.scores(media_id, min_coraters).items(),
+            key=itemgetter(1)
+        )
+
+
+def _similar_row(similar_model, media_id, similar_id, score, computed_at):
+    return similar_model(
+        similar_id=similar_id,
+        score=score,
+        computed_at=computed_at,
+        **{f"{similar_model.media_field}_id": media_id}
+    )
+
+
+def build_similar_titles(
+        media_model,
+        top_k: int = DEFAULT_TOP_K,
+        min_coraters: int = MIN_CORATERS
+) -> int:
+    """Replace the similar titles of every title of ``media_model``.
+
+    Returns the number of pairs stored.
+    """
+    computed_at = timezone.now()
+    matrix = RatingMatrix.load(media_model)
+    similar_model = media_model.similar_model()
+    rows = [
+        _similar_row(similar_model, media_id, other_id, score, computed_at)
+        for media_id in matrix.items
+        for other_id, score in matrix.neighbours(media_id, top_k, min_coraters)
+    ]
+    with transaction.atomic():
+        similar_model.objects.all().delete()
+        similar_model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    bump_catalog_version()
+    return len(rows)
+
+
+def last_built(media_model) -> datetime | None:
+    return media_model.similar_model().objects.aggregate(
+        last_built=Max("computed_at")
+    )["last_built"]
+
+
+def update_similar_titles(
+        media_model,
+        since: datetime,
+        top_k: int = DEFAULT_TOP_K,
+        min_coraters: int = MIN_CORATERS
+) -> int:
+    """Recompute the similar titles of the titles whose rates changed
+    since ``since``, and their place in the lists of other titles.
+
+    A changed rate bumps the title's ``updated_at`` through its stored
+    aggregates. Pairs are symmetric, so each new score is also offered to
+    the other title, whose list is then cut back to ``top_k``; a pair that
+    a change pushed out of such a list only comes back with a full build.
+
+    Returns the number of titles recomputed.
+    """
+    changed = set(
+        media_model.objects.filter(updated_at__gte=since).values_list(
+            "pk", flat=True
+        )
+    )
+    if not changed:
+        return 0
+    computed_at = timezone.now()
+    matrix = RatingMatrix.load(media_model)
+    similar_model = media_model.similar_model()
+    media_field = similar_model.media_field
+
+    pairs = {}
+    for media_id in changed:
+        scores = matrix.scores(media_id, min_coraters)
+        for other_id, score in heapq.nlargest(
+                top_k, scores.items(), key=itemgetter(1)
+        ):
+            pairs[media_id, other_id] = score
+        for other_id, score in scores.items():
+            pairs[other_id, media_id] = score
+    touched = {media_id for media_id, _ in pairs}
+
+    with transaction.atomic():
+        similar_model.objects.filter(
+            **{f"{media_field}_id__in": changed}
+        ).delete()
+        similar_model.objects.filter(similar_id__in=changed).delete()
+        similar_model.objects.bulk_create(
+            [
+                _similar_row(
+                    similar_model, media_id, other_id, score, computed_at
+                )
+                for (media_id, other_id), score in pairs.items()
+            ],
+            batch_size=BATCH_SIZE
+        )
+        kept = defaultdict(int)
+        overflow = []
+        for pk, media_id in similar_model.objects.filter(
+                **{f"{media_field}_id__in": touched}
+        ).order_by(media_field, "-score").values_list(
+                "pk", f"{media_field}_id"
+        ):
+            kept[media_id] += 1
+            if kept[media_id] > top_k:
+                overflow.append(pk)
+        for start in range(0, len(overflow), BATCH_SIZE):
+            similar_model.objects.filter(
+                pk__in=overflow[start:start + BATCH_SIZE]
+            ).delete()
+    bump_catalog_version()
+    return len(changed)
+
+
+def similar_titles(media, limit: int = DEFAULT_TOP_K) -> list:
+    """The stored similar titles of ``media``, most similar first."""
+    similar_model = type(media).similar_model()
+    return [
+        row.similar
+        for row in similar_model.objects.filter(
+            **{similar_model.media_field: media}
+        ).select_related("similar")[:limit]
+    ]
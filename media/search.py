@@ -0,0 +1,132 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import (
+    Case,
+    FloatField,
+    IntegerField,
+    QuerySet,
+    Value,
+    When,
+)
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from media.models import Movie
+
+# Shortest term the SQLite trigram tokenizer can match.
+TRIGRAM_LENGTH = 3
+
+
+def fts_table(model) -> str:
+    return f"{model._meta.db_table}_fts"
+
+
+class SearchBackend:
+    """Portable title search: substring match ranked by match position.
+
+    Used on databases without a dedicated backend and for terms the
+    indexed backends can not handle.
+    """
+
+    def filter(
+            self,
+            queryset: QuerySet,
+            term: str,
+            related_field: str = None
+    ) -> QuerySet:
+        """Restrict ``queryset`` to rows whose title contains ``term``.
+
+        ``related_field`` names the foreign key to the media model when
+        ``queryset`` is a user data queryset.
+        """
+        prefix = f"{related_field}__" if related_field else ""
+        return queryset.filter(**{f"{prefix}title__icontains": term})
+
+    def rank(self, queryset: QuerySet, term: str) -> QuerySet:
+        """Order a filtered media queryset by relevance, best first."""
+        return queryset.annotate(
+            search_rank=Case(
+                When(title__iexact=term, then=Value(2)),
+                When(title__istartswith=term, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField()
+            )
+        ).order_by("-search_rank", "title")
+
+
+class TrigramSearchBackend(SearchBackend):
+    """PostgreSQL search backed by a pg_trgm GIN index on UPPER(title).
+
+    ``icontains`` compiles to ``UPPER(title) LIKE UPPER(%term%)`` which the
+    index serves directly, so filtering keeps its exact semantics.
+    """
+
+    def rank(self, queryset: QuerySet, term: str) -> QuerySet:
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        return queryset.annotate(
+            search_rank=TrigramSimilarity("title", term)
+        ).order_by("-search_rank", "title")
+
+
+class FTS5SearchBackend(SearchBackend):
+    """SQLite search through trigram FTS5 tables mirroring the titles.
+
+    The ``<table>_fts`` tables are created and kept in sync by triggers in
+    the migrations, so bulk inserts and raw updates are covered as well.
+    """
+
+    @staticmethod
+    def _match(term: str) -> str:
+        return '"{}"'.format(term.replace('"', '""'))
+
+    def filter(
+            self,
+            queryset: QuerySet,
+            term: str,
+            related_field: str = None
+    ) -> QuerySet:
+        if len(term) < TRIGRAM_LENGTH:
+            return super().filter(queryset, term, related_field)
+        model = queryset.model
+        if related_field:
+            model = model._meta.get_field(related_field).related_model
+        table = fts_table(model)
+        return queryset.filter(**{
+            f"{related_field or 'id'}__in": RawSQL(
+                f"SELECT rowid FROM {table} WHERE {table} MATCH %s",
+                (self._match(term),)
+            )
+        })
+
+    def rank(self, queryset: QuerySet, term: str) -> QuerySet:
+        if len(term) < TRIGRAM_LENGTH:
+            return super().rank(queryset, term)
+        table = fts_table(queryset.model)
+        db_table = queryset.model._meta.db_table
+        return queryset.annotate(
+            search_rank=RawSQL(
+                f"SELECT -rank FROM {table} WHERE {table} MATCH %s "
+                f"AND rowid = {db_table}.id",
+                (self._match(term),),
+                output_field=FloatField()
+            )
+        ).order_by("-search_rank", "title")
+
+
+@lru_cache
+def get_search_backend() -> SearchBackend:
+    """Return the backend from ``MEDIA_SEARCH_BACKEND`` or the best one
+    available for the default database."""
+    backend = getattr(settings, "MEDIA_SEARCH_BACKEND", None)
+    if backend:
+        return import_string(backend)()
+    if connection.vendor == "postgresql":
+        return TrigramSearchBackend()
+    if connection.vendor == "sqlite":
+        tables = connection.introspection.table_names()
+        if fts_table(Movie) in tables:
+            return FTS5SearchBackend()
+    return SearchBackend()
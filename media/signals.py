@@ -0,0 +1,315 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.utils import timezone
+
+from media.catalog import (
+    sync_media_items,
+    sync_user_media_data,
+    unified_catalog_enabled,
+)
+from media.fragments import bump_catalog_version
+from media.genres import genre_registry
+from media.models import (
+    Anime,
+    Cartoon,
+    Genre,
+    MediaItem,
+    Movie,
+    Series,
+    UserAnimeData,
+    UserCartoonData,
+    UserMediaData,
+    UserMediaDataMixin,
+    UserMovieData,
+    UserSeriesData,
+    user_data_bulk_created,
+    user_data_bulk_updated,
+)
+from media.stats import invalidate_user_stats
+
+USER_DATA_MODELS = (
+    UserMovieData,
+    UserAnimeData,
+    UserSeriesData,
+    UserCartoonData,
+)
+MEDIA_MODELS = (Movie, Anime, Series, Cartoon)
+
+
+def _current_state(instance: UserMediaDataMixin) -> tuple:
+    rate = instance.rate
+    if rate is not None:
+        rate = Decimal(str(rate))
+    return instance.media_id, rate, instance.status
+
+
+def _stored_state(instance: UserMediaDataMixin) -> tuple | None:
+    if instance._state.adding or instance.pk is None:
+        return None
+    media_attname = instance._meta.get_field(instance.media_field).attname
+    loaded = getattr(instance, "_loaded_values", {})
+    if {media_attname, "rate", "status"} <= loaded.keys():
+        return loaded[media_attname], loaded["rate"], loaded["status"]
+    return type(instance).objects.filter(pk=instance.pk).values_list(
+        media_attname, "rate", "status"
+    ).first()
+
+
+def _apply_state_change(sender, old_state, new_state) -> None:
+    deltas = {}
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if state is None:
+            continue
+        media_id, rate, status = state
+        delta = deltas.setdefault(
+            media_id,
+            {
+                "rate_delta": 0,
+                "rate_count_delta": 0,
+                "status_deltas": Counter(),
+            }
+        )
+        if rate is not None:
+            delta["rate_delta"] += sign * rate
+            delta["rate_count_delta"] += sign
+        delta["status_deltas"][status] += sign
+
+    media_model = sender.media_model()
+    for media_id, delta in deltas.items():
+        media_model.apply_rating_delta(media_id, **delta)
+
+
+def stamp_raw_save(sender, instance, raw=False, **kwargs):
+    """Fixtures are saved raw, which skips ``auto_now``."""
+    if raw and instance.updated_at is None:
+        instance.updated_at = timezone.now()
+
+
+def remember_stored_state(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._aggregate_state = _stored_state(instance)
+
+
+def update_aggregates_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = getattr(instance, "_aggregate_state", None)
+    new_state = _current_state(instance)
+    if old_state != new_state:
+        _apply_state_change(sender, old_state, new_state)
+    media_attname = instance._meta.get_field(instance.media_field).attname
+    instance._loaded_values = {
+        media_attname: new_state[0],
+        "rate": new_state[1],
+        "status": new_state[2],
+    }
+
+
+def update_aggregates_on_delete(sender, instance, **kwargs):
+    old_state = _stored_state(instance) or _current_state(instance)
+    _apply_state_change(sender, old_state, None)
+
+
+def refresh_aggregates_on_add(
+        sender,
+        instance,
+        action,
+        reverse,
+        model,
+        pk_set,
+        **kwargs
+):
+    """``add()`` on a through relation bulk-inserts rows without post_save."""
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        model.refresh_rating_aggregates(pk_set)
+    else:
+        type(instance).refresh_rating_aggregates([instance.pk])
+
+
+def invalidate_stats_on_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_user_stats(instance.user_id)
+
+
+def invalidate_stats_on_add(
+        sender,
+        instance,
+        action,
+        reverse,
+        pk_set,
+        **kwargs
+):
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        invalidate_user_stats(instance.pk)
+    else:
+        invalidate_user_stats(*pk_set)
+
+
+def invalidate_stats_on_bulk_create(sender, user_ids, **kwargs):
+    invalidate_user_stats(*user_ids)
+
+
+def invalidate_genre_registry(sender, raw=False, **kwargs):
+    if raw:
+        return
+    genre_registry.invalidate()
+    bump_catalog_version()
+    transaction.on_commit(genre_registry.invalidate)
+
+
+def update_genre_masks_on_change(
+        sender,
+        instance,
+        action,
+        reverse,
+        model,
+        pk_set,
+        **kwargs
+):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        type(instance).refresh_genre_masks([instance.pk])
+    elif pk_set:
+        model.refresh_genre_masks(pk_set)
+    elif action == "post_clear" and instance.bit is not None:
+        model.clear_genre_bit(instance.bit)
+
+
+def clear_genre_masks_on_delete(sender, instance, **kwargs):
+    if instance.bit is None:
+        return
+    for media_model in MEDIA_MODELS:
+        media_model.clear_genre_bit(instance.bit)
+
+
+def mirror_media_on_save(sender, instance, raw=False, **kwargs):
+    if raw or not unified_catalog_enabled():
+        return
+    sync_media_items(sender, [instance.pk])
+
+
+def mirror_media_on_delete(sender, instance, **kwargs):
+    if not unified_catalog_enabled():
+        return
+    MediaItem.objects.filter(
+        kind=sender._meta.model_name,
+        source_id=instance.pk
+    ).delete()
+
+
+def mirror_genres_on_change(
+        sender,
+        instance,
+        action,
+        reverse,
+        model,
+        pk_set,
+        **kwargs
+):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not unified_catalog_enabled():
+        return
+    if not reverse:
+        sync_media_items(type(instance), [instance.pk])
+    elif pk_set:
+        sync_media_items(model, pk_set)
+    elif action == "post_clear":
+        MediaItem.genre.through.objects.filter(
+            genre=instance,
+            mediaitem__kind=model._meta.model_name
+        ).delete()
+
+
+def mirror_user_data_on_change(sender, instance, raw=False, **kwargs):
+    if raw or not unified_catalog_enabled():
+        return
+    sync_user_media_data(sender, [instance.user_id], [instance.media_id])
+
+
+def mirror_user_data_on_add(
+        sender,
+        instance,
+        action,
+        reverse,
+        model,
+        pk_set,
+        **kwargs
+):
+    if action != "post_add" or not pk_set or not unified_catalog_enabled():
+        return
+    if reverse:
+        sync_user_media_data(sender, [instance.pk], pk_set)
+    else:
+        sync_user_media_data(sender, pk_set, [instance.pk])
+
+
+def mirror_user_data_on_bulk_create(sender, user_ids, media_ids, **kwargs):
+    if unified_catalog_enabled():
+        sync_user_media_data(sender, user_ids, media_ids)
+
+
+def connect_signals() -> None:
+    for model in (*MEDIA_MODELS, *USER_DATA_MODELS, MediaItem, UserMediaData):
+        pre_save.connect(stamp_raw_save, sender=model)
+    for user_data_model in USER_DATA_MODELS:
+        pre_save.connect(remember_stored_state, sender=user_data_model)
+        post_save.connect(update_aggregates_on_save, sender=user_data_model)
+        post_delete.connect(
+            update_aggregates_on_delete,
+            sender=user_data_model
+        )
+        post_save.connect(invalidate_stats_on_change, sender=user_data_model)
+        post_delete.connect(
+            invalidate_stats_on_change,
+            sender=user_data_model
+        )
+        post_save.connect(mirror_user_data_on_change, sender=user_data_model)
+        post_delete.connect(
+            mirror_user_data_on_change,
+            sender=user_data_model
+        )
+    for bulk_signal in (user_data_bulk_created, user_data_bulk_updated):
+        bulk_signal.connect(invalidate_stats_on_bulk_create)
+        bulk_signal.connect(mirror_user_data_on_bulk_create)
+    post_save.connect(invalidate_genre_registry, sender=Genre)
+    post_delete.connect(invalidate_genre_registry, sender=Genre)
+    post_delete.connect(clear_genre_masks_on_delete, sender=Genre)
+    for media_model in MEDIA_MODELS:
+        m2m_changed.connect(
+            refresh_aggregates_on_add,
+            sender=media_model.user.through
+        )
+        m2m_changed.connect(
+            invalidate_stats_on_add,
+            sender=media_model.user.through
+        )
+        m2m_changed.connect(
+            mirror_user_data_on_add,
+            sender=media_model.user.through
+        )
+        post_save.connect(mirror_media_on_save, sender=media_model)
+        post_delete.connect(mirror_media_on_delete, sender=media_model)
+        m2m_changed.connect(
+            update_genre_masks_on_change,
+            sender=media_model.genre.through
+        )
+        m2m_changed.connect(
+            mirror_genres_on_change,
+            sender=media_model.genre.through
+        )
@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, Count, Value
+
+from media.cache import (
+    aget_or_compute,
+    anamespaced_key,
+    bump_namespace,
+    get_or_compute,
+    namespaced_key,
+    user_namespace,
+)
+from media.models import (
+    UserAnimeData,
+    UserCartoonData,
+    UserMediaDataMixin,
+    UserMovieData,
+    UserSeriesData,
+)
+
+USER_DATA_BY_KIND = {
+    "movies": UserMovieData,
+    "anime": UserAnimeData,
+    "series": UserSeriesData,
+    "cartoons": UserCartoonData,
+}
+
+STATS_CACHE_TIMEOUT = getattr(settings, "MEDIA_STATS_CACHE_TIMEOUT", 300)
+
+
+def user_stats_cache_key(user_id: int) -> str:
+    return namespaced_key(user_namespace(user_id), "stats")
+
+
+def _empty_counts() -> dict:
+    counts = {"total": 0}
+    counts.update(
+        {status.name: 0 for status in UserMediaDataMixin.Status}
+    )
+    return counts
+
+
+def _stats_rows(user_id: int):
+    querysets = [
+        model.objects.filter(user_id=user_id).order_by().values(
+            "status"
+        ).annotate(
+            kind=Value(kind, output_field=CharField()),
+            count=Count("id")
+        ).values_list("kind", "status", "count")
+        for kind, model in USER_DATA_BY_KIND.items()
+    ]
+    return querysets[0].union(*querysets[1:], all=True)
+
+
+def _collect_stats(rows) -> dict:
+    stats = {kind: _empty_counts() for kind in [*USER_DATA_BY_KIND, "total"]}
+    for kind, status, count in rows:
+        status_name = UserMediaDataMixin.Status(status).name
+        for counts in (stats[kind], stats["total"]):
+            counts["total"] += count
+            counts[status_name] += count
+    return stats
+
+
+def compute_user_stats(user_id: int) -> dict:
+    """Count the user's titles per media type and status in one query."""
+    return _collect_stats(_stats_rows(user_id))
+
+
+async def acompute_user_stats(user_id: int) -> dict:
+    return _collect_stats([row async for row in _stats_rows(user_id)])
+
+
+def get_user_stats(user_id: int) -> dict:
+    """Return the cached statistics of the user, computing them on a miss.
+
+    The result maps every media type and ``"total"`` to a dict with a
+    ``"total"`` count and one count per status name.
+    """
+    return get_or_compute(
+        user_stats_cache_key(user_id),
+        lambda: compute_user_stats(user_id),
+        STATS_CACHE_TIMEOUT
+    )
+
+
+async def aget_user_stats(user_id: int) -> dict:
+    """Async version of ``get_user_stats``."""
+    return await aget_or_compute(
+        await anamespaced_key(user_namespace(user_id), "stats"),
+        lambda: acompute_user_stats(user_id),
+        STATS_CACHE_TIMEOUT
+    )
+
+
+def invalidate_user_stats(*user_ids: int) -> None:
+    """Drop the cached stats, and every other per-user value, of the
+    users.
+
+    The namespaces are bumped again once the transaction commits, so
+    values computed from the old rows in the meantime are dropped too.
+    """
+    namespaces = [user_namespace(user_id) for user_id in user_ids]
+    bump_namespace(*namespaces)
+    transaction.on_commit(lambda: bump_namespace(*namespaces))
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase, Client
 
 from media.models import Movie, Anime, Series, Cartoon
@@ -6,6 +7,7 @@ from media.models import Movie, Anime, Series, Cartoon
 
 class TestBaseSetUp(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user = get_user_model().objects.create_user(
             username="Test_user",
@@ -0,0 +1,68 @@
+import re
+import traceback
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+
+PROJECT_DIR = str(Path(settings.BASE_DIR).resolve())
+TESTS_DIR = str(Path(__file__).resolve().parent)
+MANAGE_PY = f"{PROJECT_DIR}/manage.py"
+
+
+def fingerprint(sql: str) -> str:
+    """``sql`` with literals and IN lists collapsed, so the queries of an
+    N+1 share one fingerprint."""
+    sql = re.sub(r"\s+", " ", sql)
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+\b", "?", sql)
+    return re.sub(r"IN \((?:[^()]*)\)", "IN (...)", sql)
+
+
+def _project_frames() -> list[str]:
+    return [
+        f"{frame.filename.removeprefix(PROJECT_DIR + '/')}:{frame.lineno} "
+        f"in {frame.name}"
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(PROJECT_DIR)
+        and not frame.filename.startswith(TESTS_DIR)
+        and frame.filename != MANAGE_PY
+        and "site-packages" not in frame.filename
+    ]
+
+
+class QueryLog:
+    """Every query run inside the block with the project code that ran
+    it."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, _project_frames()))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def report(self, frames: int = 4) -> str:
+        """The queries grouped by fingerprint, most frequent first, each
+        with the last project frames of its first occurrence."""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        stacks = {}
+        for sql, stack in self.queries:
+            stacks.setdefault(fingerprint(sql), stack)
+        lines = []
+        for sql, count in counts.most_common():
+            lines.append(f"  {count}x {sql}")
+            lines.extend(f"      {frame}" for frame in stacks[sql][-frames:])
+        return "\n".join(lines)
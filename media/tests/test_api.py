@@ -0,0 +1,301 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from media.models import Genre, Movie, UserMovieData
+from media.pagination import encode_cursor
+from media.stats import get_user_stats
+from media.tests.base import TestBaseSetUp
+
+
+class TestMediaApi(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.genre = Genre.objects.create(name="Drama")
+        self.movie = Movie.objects.get(title="Test3")
+        self.movie.year_released = 1999
+        self.movie.save()
+        self.movie.genre.add(self.genre)
+        self.list_url = reverse("media:api-media-list", args=["movies"])
+
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, 401)
+
+    def test_sparse_fields(self):
+        response = self.client.get(
+            self.list_url,
+            {"fields": "title,year_released", "title": "Test3"}
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": self.movie.id, "title": "Test3", "year_released": 1999}]
+        )
+
+    def test_sparse_fields_are_loaded_alone(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.list_url, {"fields": "title"})
+        listing = [
+            query["sql"] for query in queries
+            if "media_movie" in query["sql"] and "LIMIT" in query["sql"]
+        ]
+        self.assertEqual(len(listing), 1)
+        self.assertNotIn("description", listing[0])
+
+    def test_unknown_field(self):
+        response = self.client.get(self.list_url, {"fields": "password"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["unknown"], ["password"])
+
+    def test_includes(self):
+        url = reverse("media:api-media-detail", args=["movies", self.movie.id])
+        data = self.client.get(
+            url,
+            {"fields": "title", "include": "genres,aggregates"}
+        ).json()
+        self.assertEqual(
+            data["genres"], [{"id": self.genre.id, "name": "Drama"}]
+        )
+        self.assertEqual(data["aggregates"]["want_to_watch_count"], 1)
+
+    def test_genre_filter_and_order_use_the_forms(self):
+        response = self.client.get(
+            self.list_url,
+            {"genres": [self.genre.id], "order": "-year_released"}
+        )
+        self.assertEqual(
+            [item["title"] for item in response.json()["results"]],
+            ["Test3"]
+        )
+        response = self.client.get(self.list_url, {"order": "-seasons"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_keyset_pages(self):
+        titles = []
+        params = {"fields": "title", "limit": 4}
+        while True:
+            data = self.client.get(self.list_url, params).json()
+            titles.extend(item["title"] for item in data["results"])
+            if not data["next"]:
+                break
+            params["cursor"] = data["next"]
+        self.assertEqual(titles, [f"Test{i}" for i in range(10)])
+
+    def test_cursor_of_another_ordering(self):
+        cursor = self.client.get(
+            self.list_url,
+            {"order": "title", "limit": 4}
+        ).json()["next"]
+        response = self.client.get(
+            self.list_url,
+            {"order": "-year_released", "cursor": cursor}
+        )
+        self.assertEqual(response.status_code, 400)
+        cursor = encode_cursor(["title", "id"], ["Test1", {"id": 1}])
+        response = self.client.get(self.list_url, {"cursor": cursor})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_keeps_order_and_reports_missing(self):
+        first, second = Movie.objects.all()[:2]
+        url = reverse("media:api-media-batch", args=["movies"])
+        data = self.client.get(
+            url,
+            {"ids": f"{second.id},9999,{first.id}", "fields": "title"}
+        ).json()
+        self.assertEqual(
+            [item["id"] for item in data["results"]],
+            [second.id, first.id]
+        )
+        self.assertEqual(data["not_found"], [9999])
+
+    def test_unknown_kind(self):
+        response = self.client.get(
+            reverse("media:api-media-list", args=["books"])
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class TestUserDataApi(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.movie = Movie.objects.get(title="Test3")
+        UserMovieData.objects.filter(movie=self.movie).update(rate=8)
+
+    def test_list_with_media(self):
+        response = self.client.get(
+            reverse("media:api-user-data-list", args=["movies"]),
+            {"fields": "rate", "include": "media", "limit": 1}
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{
+                "id": UserMovieData.objects.get(movie=self.movie).id,
+                "rate": "8.00",
+                "media": {
+                    "id": self.movie.id,
+                    "title": "Test3",
+                    "year_released": None,
+                },
+            }]
+        )
+
+    def test_status_filter_uses_the_form(self):
+        response = self.client.get(
+            reverse("media:api-user-data-list", args=["movies"]),
+            {"show_only": "9"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_and_batch(self):
+        url = reverse(
+            "media:api-user-data-detail",
+            args=["movies", self.movie.id]
+        )
+        self.assertEqual(
+            self.client.get(url, {"fields": "media_id"}).json()["media_id"],
+            self.movie.id
+        )
+        other = Movie.objects.create(title="Not listed")
+        response = self.client.get(
+            reverse("media:api-user-data-batch", args=["movies"]),
+            {"ids": f"{self.movie.id},{other.id}", "fields": "status"}
+        )
+        self.assertEqual(response.json()["not_found"], [other.id])
+        self.assertEqual(
+            self.client.get(
+                reverse(
+                    "media:api-user-data-detail",
+                    args=["movies", other.id]
+                )
+            ).status_code,
+            404
+        )
+
+
+class TestUserDataBatchUpdate(TestBaseSetUp):
+    url = reverse("media:api-user-data-batch-update")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.movies = list(Movie.objects.all()[:3])
+
+    def post(self, updates):
+        return self.client.post(
+            self.url,
+            json.dumps({"updates": updates}),
+            content_type="application/json"
+        )
+
+    def test_updates_in_bulk(self):
+        updates = [
+            {"media_type": "movies", "media_id": movie.id, "rate": 4}
+            for movie in self.movies
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(updates)
+        self.assertEqual(
+            response.json(),
+            {"updated": 3, "created": 0, "errors": []}
+        )
+        self.assertEqual(
+            UserMovieData.objects.filter(user=self.user, rate=4).count(),
+            3
+        )
+        self.assertLess(len(queries), 15)
+        movie = Movie.objects.get(pk=self.movies[0].pk)
+        self.assertEqual(movie.rating_count, 1)
+        self.assertEqual(movie.average_rate, 4)
+
+    def test_partial_update_keeps_other_fields(self):
+        UserMovieData.objects.filter(movie=self.movies[0]).update(
+            rate=3,
+            comment="Keep me"
+        )
+        self.post([{
+            "media_type": "movies",
+            "media_id": self.movies[0].id,
+            "status": "4",
+        }])
+        entry = UserMovieData.objects.get(movie=self.movies[0])
+        self.assertEqual(
+            (entry.rate, entry.status, entry.comment),
+            (3, "4", "Keep me")
+        )
+
+    def test_per_item_errors(self):
+        response = self.post([
+            {"media_type": "movies", "media_id": self.movies[0].id, "rate": 9},
+            {"media_type": "books", "media_id": 1},
+            {"media_type": "movies", "media_id": 9999, "rate": 1},
+            {"media_type": "movies", "media_id": self.movies[1].id, "rate": 2},
+        ])
+        data = response.json()
+        self.assertEqual(data["updated"], 1)
+        self.assertEqual(
+            [error["index"] for error in data["errors"]],
+            [0, 1, 2]
+        )
+        self.assertIn("Rate must be between 0 and 5", str(data["errors"][0]))
+        self.assertIsNone(
+            UserMovieData.objects.get(movie=self.movies[0]).rate
+        )
+
+    def test_entry_added_concurrently(self):
+        movie = Movie.objects.create(title="Added twice")
+        bulk_update = QuerySet.bulk_update
+
+        def add_concurrently(queryset, *args, **kwargs):
+            UserMovieData.objects.get_or_create(
+                user=self.user,
+                movie=movie,
+                defaults={"rate": 1}
+            )
+            return bulk_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(
+                QuerySet,
+                "bulk_update",
+                autospec=True,
+                side_effect=add_concurrently
+        ):
+            response = self.post([
+                {"media_type": "movies", "media_id": movie.id, "rate": 5}
+            ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            UserMovieData.objects.get(user=self.user, movie=movie).rate,
+            5
+        )
+        movie.refresh_from_db()
+        self.assertEqual(movie.average_rate, 5)
+
+    def test_adds_missing_entries_and_invalidates_stats(self):
+        self.assertEqual(get_user_stats(self.user.id)["movies"]["total"], 10)
+        movie = Movie.objects.create(title="Watched elsewhere")
+        response = self.post([{
+            "media_type": "movies",
+            "media_id": movie.id,
+            "status": "4",
+            "rate": 5,
+        }])
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(get_user_stats(self.user.id)["movies"]["total"], 11)
+        movie.refresh_from_db()
+        self.assertEqual(movie.finished_count, 1)
+
+    def test_rejects_get_and_bad_bodies(self):
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        response = self.client.post(
+            self.url,
+            "{",
+            content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,102 @@
+import random
+
+from django.test import Client, TestCase
+
+from media.benchmark import (
+    compare,
+    create_benchmark_user,
+    request_specs,
+    run_benchmark,
+    seed_catalog,
+)
+from media.models import Movie, UserMovieData
+from media.urls import urlpatterns
+
+
+class TestBenchmark(TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        seed_catalog(titles=20, users=5, rows=30, rng=rng, genres=3)
+        self.user = create_benchmark_user(list_size=5, rng=rng)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_seeding_is_reproducible(self):
+        self.assertEqual(Movie.objects.count(), 20)
+        self.assertEqual(
+            UserMovieData.objects.filter(user=self.user).count(),
+            5
+        )
+        years = list(Movie.objects.order_by("id").values_list(
+            "year_released", flat=True
+        ))
+        Movie.objects.all().delete()
+        seed_catalog(titles=20, users=0, rows=0, rng=random.Random(1))
+        self.assertEqual(
+            list(Movie.objects.order_by("id").values_list(
+                "year_released", flat=True
+            )),
+            years
+        )
+
+    def test_every_url_is_benchmarked_and_answers(self):
+        specs = request_specs(self.user)
+        self.assertEqual(
+            set(specs),
+            {f"media:{pattern.name}" for pattern in urlpatterns}
+        )
+        listed = set(
+            UserMovieData.objects.filter(user=self.user).values_list(
+                "movie_id", flat=True
+            )
+        )
+        results = run_benchmark(self.client, specs, iterations=1)
+        for name, result in results.items():
+            self.assertLess(result["status"], 400, name)
+            self.assertGreaterEqual(result["p95_ms"], result["p50_ms"])
+        self.assertEqual(
+            set(
+                UserMovieData.objects.filter(user=self.user).values_list(
+                    "movie_id", flat=True
+                )
+            ),
+            listed
+        )
+
+
+class TestCompare(TestCase):
+    baseline = {
+        "media:index": {
+            "status": 200, "p50_ms": 10.0, "p95_ms": 20.0, "queries": 1,
+        },
+    }
+
+    def result(self, **changes) -> dict:
+        return {"media:index": {**self.baseline["media:index"], **changes}}
+
+    def test_more_queries_is_a_regression(self):
+        self.assertEqual(
+            compare(self.result(queries=2), self.baseline, 0.5, 5),
+            ["media:index: 1 -> 2 queries"]
+        )
+
+    def test_latency_needs_both_percentiles_to_regress(self):
+        self.assertEqual(
+            compare(self.result(p95_ms=60.0), self.baseline, 0.5, 5),
+            []
+        )
+        self.assertEqual(
+            len(compare(
+                self.result(p50_ms=30.0, p95_ms=60.0),
+                self.baseline,
+                0.5,
+                5
+            )),
+            1
+        )
+
+    def test_status_change(self):
+        self.assertIn(
+            "media:index: status 200 -> 500",
+            compare(self.result(status=500), self.baseline, 0.5, 5)
+        )
@@ -0,0 +1,72 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from media.cache import (
+    bump_namespace,
+    get_or_compute,
+    namespaced_key,
+    user_namespace,
+)
+
+
+class TestNamespaces(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_changes_only_that_namespace(self):
+        catalog = namespaced_key("catalog", "movie")
+        user = namespaced_key(user_namespace(1), "stats")
+        self.assertEqual(namespaced_key("catalog", "movie"), catalog)
+        bump_namespace(user_namespace(1))
+        self.assertEqual(namespaced_key("catalog", "movie"), catalog)
+        self.assertNotEqual(namespaced_key(user_namespace(1), "stats"), user)
+
+
+class TestGetOrCompute(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_computes_once(self):
+        self.assertEqual(get_or_compute("key", self.compute, 60), 1)
+        self.assertEqual(get_or_compute("key", self.compute, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_refreshes_early_near_expiry(self):
+        cache.set("key", ("old", 1.0, time.time() + 0.1), 60)
+        with mock.patch("media.cache.random.random", return_value=0.5):
+            self.assertEqual(get_or_compute("key", self.compute, 60), 1)
+
+    def test_serves_current_value_while_locked(self):
+        cache.set("key", ("old", 1.0, time.time() - 1), 60)
+        cache.add("key:lock", 1)
+        self.assertEqual(get_or_compute("key", self.compute, 60), "old")
+        self.assertEqual(self.calls, 0)
+
+    def test_waits_for_the_lock_holder_on_a_miss(self):
+        cache.add("key:lock", 1)
+
+        def sleep(seconds):
+            cache.set("key", ("filled", 0.1, time.time() + 60), 60)
+
+        with mock.patch("media.cache.time.sleep", sleep):
+            self.assertEqual(
+                get_or_compute("key", self.compute, 60),
+                "filled"
+            )
+        self.assertEqual(self.calls, 0)
+
+    def test_releases_the_lock_on_errors(self):
+        def fail():
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            get_or_compute("key", fail, 60)
+        self.assertIsNone(cache.get("key:lock"))
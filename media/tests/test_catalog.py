@@ -0,0 +1,113 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from media.models import (
+    Anime,
+    Genre,
+    MediaItem,
+    Movie,
+    MovieItem,
+    UserMediaData,
+    UserMovieData,
+)
+from media.tests.base import TestBaseSetUp
+
+
+class TestUnifiedCatalogDisabled(TestBaseSetUp):
+    def test_nothing_is_mirrored(self):
+        Movie.objects.create(title="Untracked")
+        self.assertFalse(MediaItem.objects.filter(title="Untracked").exists())
+
+    def test_migrations_leave_the_mirror_empty(self):
+        self.assertFalse(MediaItem.objects.exists())
+        self.assertFalse(UserMediaData.objects.exists())
+
+
+@override_settings(MEDIA_UNIFIED_CATALOG=True)
+class TestUnifiedCatalog(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        call_command("sync_media_catalog", stdout=StringIO())
+
+    def test_sync_mirrors_every_kind(self):
+        self.assertEqual(MovieItem.objects.count(), Movie.objects.count())
+        self.assertEqual(
+            MediaItem.objects.filter(kind="anime").count(),
+            Anime.objects.count()
+        )
+        self.assertEqual(
+            UserMediaData.objects.filter(user=self.user).count(),
+            10 + 9 + 8 + 7
+        )
+
+    def test_saved_title_is_mirrored_with_genres(self):
+        genre = Genre.objects.create(name="Drama")
+        movie = Movie.objects.create(title="Mirrored")
+        movie.genre.add(genre)
+        item = MovieItem.objects.get(source_id=movie.pk)
+        self.assertEqual(item.title, "Mirrored")
+        self.assertEqual(list(item.genre.all()), [genre])
+
+        movie.title = "Renamed"
+        movie.save()
+        item.refresh_from_db()
+        self.assertEqual(item.title, "Renamed")
+
+    def test_deleted_title_is_removed(self):
+        movie = Movie.objects.first()
+        movie.delete()
+        self.assertFalse(
+            MovieItem.objects.filter(source_id=movie.pk).exists()
+        )
+
+    def test_user_data_changes_are_mirrored(self):
+        user_data = UserMovieData.objects.filter(user=self.user).first()
+        user_data.rate = 7
+        user_data.status = UserMovieData.Status.watching
+        user_data.save()
+        entry = UserMediaData.objects.get(
+            user=self.user,
+            item__kind="movie",
+            item__source_id=user_data.movie_id
+        )
+        self.assertEqual(entry.rate, 7)
+        self.assertEqual(entry.status, UserMovieData.Status.watching)
+
+        user_data.delete()
+        self.assertFalse(UserMediaData.objects.filter(pk=entry.pk).exists())
+
+    def test_bulk_toggle_is_mirrored(self):
+        movies = [Movie.objects.create(title=f"New{i}") for i in range(3)]
+        Movie.toggle_in_user_list(self.user.id, [movie.pk for movie in movies])
+        self.assertEqual(
+            UserMediaData.objects.filter(
+                user=self.user,
+                item__source_id__in=[movie.pk for movie in movies],
+                kind="movie"
+            ).count(),
+            3
+        )
+
+    def test_cross_kind_list_is_one_query(self):
+        UserMovieData.objects.filter(user=self.user).update(
+            status=UserMovieData.Status.watching
+        )
+        call_command("sync_media_catalog", stdout=StringIO())
+        with CaptureQueriesContext(connection) as queries:
+            titles = list(
+                UserMediaData.objects.filter(
+                    user=self.user,
+                    status=UserMovieData.Status.watching
+                ).values_list("item__title", flat=True)
+            )
+        self.assertEqual(len(titles), 10)
+        self.assertEqual(len(queries), 1)
+
+    def test_proxy_sets_kind(self):
+        item = MovieItem.objects.create(title="Proxy", source_id=10 ** 6)
+        self.assertEqual(item.kind, MediaItem.Kind.movie)
+        self.assertEqual(item.media_model(), Movie)
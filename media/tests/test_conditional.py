@@ -0,0 +1,108 @@
+import time
+from unittest import mock
+
+from django.urls import reverse
+
+from media.fragments import bump_catalog_version
+from media.models import Movie, UserMovieData
+from media.tests.base import TestBaseSetUp
+
+
+class TestConditionalGet(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.movie = Movie.objects.first()
+
+    def revalidate(self, url: str):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_unchanged_detail_is_not_modified(self):
+        url = reverse("media:movies-detail", kwargs={"pk": self.movie.pk})
+        response = self.revalidate(url)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_detail_changes_with_object(self):
+        url = reverse("media:movies-detail", kwargs={"pk": self.movie.pk})
+        etag = self.client.get(url)["ETag"]
+        self.movie.title = "Renamed"
+        self.movie.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Renamed")
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.revalidate(reverse("media:movies-list"))
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_changes_on_delete(self):
+        url = reverse("media:movies-list")
+        etag = self.client.get(url)["ETag"]
+        Movie.objects.filter(pk=self.movie.pk).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_list_changes_with_rating(self):
+        url = reverse("media:user-movies-list")
+        etag = self.client.get(url)["ETag"]
+        user_data = UserMovieData.objects.get(
+            user=self.user,
+            movie=self.movie
+        )
+        user_data.rate = 5
+        user_data.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_aggregate_updates_touch_media(self):
+        before = self.movie.updated_at
+        UserMovieData.objects.filter(
+            user=self.user,
+            movie=self.movie
+        ).delete()
+        self.movie.refresh_from_db()
+        self.assertGreater(self.movie.updated_at, before)
+
+    def test_etag_is_per_user(self):
+        url = reverse("media:movies-list")
+        etag = self.client.get(url)["ETag"]
+        self.client.force_login(
+            self.user.__class__.objects.create_user(
+                username="Other",
+                password="Other_password"
+            )
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_raw_saves_are_stamped(self):
+        movie = Movie(pk=10 ** 6, title="From a fixture")
+        movie.save_base(raw=True)
+        movie.refresh_from_db()
+        self.assertIsNotNone(movie.updated_at)
+
+    def test_lists_send_no_last_modified(self):
+        for name in ("media:movies-list", "media:user-library-list"):
+            response = self.client.get(reverse(name))
+            self.assertIn("ETag", response)
+            self.assertNotIn("Last-Modified", response)
+
+    def test_detail_last_modified_covers_catalog_changes(self):
+        url = reverse("media:movies-detail", kwargs={"pk": self.movie.pk})
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+        later = time.time_ns() + 60 * 10 ** 9
+        with mock.patch("media.cache.time.time_ns", return_value=later):
+            bump_catalog_version()
+        response = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,122 @@
+import threading
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from media.dbpool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(SimpleTestCase):
+    def setUp(self):
+        self.pool = ConnectionPool(max_size=2, timeout=0.05)
+
+    def test_reuses_returned_connections(self):
+        first = self.pool.getconn(FakeConnection)
+        self.pool.putconn(first)
+        self.assertIs(self.pool.getconn(FakeConnection), first)
+        self.assertEqual(first.rollbacks, 1)
+        stats = self.pool.stats()
+        self.assertEqual(stats["opened"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["checked_out"], 1)
+
+    def test_times_out_when_exhausted(self):
+        self.pool.getconn(FakeConnection)
+        self.pool.getconn(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            self.pool.getconn(FakeConnection)
+        stats = self.pool.stats()
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreater(stats["wait_time_max"], 0)
+
+    def test_waiter_gets_the_returned_connection(self):
+        pool = ConnectionPool(max_size=1, timeout=5)
+        held = pool.getconn(FakeConnection)
+        result = []
+        waiter = threading.Thread(
+            target=lambda: result.append(pool.getconn(FakeConnection))
+        )
+        waiter.start()
+        pool.putconn(held)
+        waiter.join()
+        self.assertEqual(result, [held])
+
+    def test_replaces_unhealthy_and_closed_connections(self):
+        broken = self.pool.getconn(FakeConnection)
+        closed = self.pool.getconn(FakeConnection)
+        self.pool.putconn(broken)
+        closed.closed = True
+        self.pool.putconn(closed)
+        self.assertEqual(self.pool.stats()["idle"], 1)
+
+        fresh = self.pool.getconn(FakeConnection, is_healthy=lambda c: False)
+        self.assertNotIn(fresh, (broken, closed))
+        self.assertTrue(broken.closed)
+        self.assertEqual(self.pool.stats()["discarded"], 2)
+
+    def test_failed_connect_frees_the_slot(self):
+        def connect():
+            raise OSError
+
+        for _ in range(3):
+            with self.assertRaises(OSError):
+                self.pool.getconn(connect)
+        self.assertEqual(self.pool.stats()["checked_out"], 0)
+
+
+class TestDbPoolStatsView(TestCase):
+    def test_staff_only(self):
+        url = reverse("media:db-pool-stats")
+        user = get_user_model().objects.create_user(
+            username="Staff",
+            password="Staff_password"
+        )
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get(url).json(), {})
+
+
+@skipUnless(
+    connection.vendor == "postgresql" and connection.settings_dict.get("POOL"),
+    "needs PostgreSQL with DATABASE_POOL_SIZE set on Django < 5.1"
+)
+class TestPooledPostgreSQLBackend(TestCase):
+    def setUp(self):
+        # A second wrapper, so closing it leaves the test transaction alone.
+        self.wrapper = connections.create_connection("default")
+        self.addCleanup(self.wrapper.close)
+
+    def test_closed_connection_is_reused(self):
+        self.wrapper.ensure_connection()
+        raw = self.wrapper.connection
+        checked_out = self.wrapper.connection_pool.stats()["checked_out"]
+        self.wrapper.close()
+        self.assertEqual(
+            self.wrapper.connection_pool.stats()["checked_out"],
+            checked_out - 1
+        )
+        self.wrapper.ensure_connection()
+        self.assertIs(self.wrapper.connection, raw)
+        with self.wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            self.assertEqual(cursor.fetchone(), (1,))
+
+    def test_does_not_shadow_the_stock_pool(self):
+        self.assertNotIn("pool", type(self.wrapper).__dict__)
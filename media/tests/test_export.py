@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from media.models import UserMovieData
+from media.tests.base import TestBaseSetUp
+
+
+class TestExportUserLibrary(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("media:user-library-export")
+        user_movie = UserMovieData.objects.get(
+            user=self.user,
+            movie__title="Test1"
+        )
+        user_movie.rate = 4
+        user_movie.status = UserMovieData.Status.finished
+        user_movie.comment = "Good, but long"
+        user_movie.save()
+
+    def test_login_required(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 302)
+
+    def test_csv_export_is_streamed(self):
+        self.client.force_login(self.user)
+        res = self.client.get(self.url)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(
+            b"".join(res.streaming_content).decode()
+        )))
+        self.assertEqual(len(rows), 34)
+        movie = next(row for row in rows if row["title"] == "Test1"
+                     and row["type"] == "movie")
+        self.assertEqual(movie["rate"], "4.00")
+        self.assertEqual(movie["status"], "finished")
+        self.assertEqual(movie["comment"], "Good, but long")
+
+    def test_ndjson_export(self):
+        self.client.force_login(self.user)
+        res = self.client.get(self.url, {"format": "ndjson"})
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 34)
+        self.assertEqual(json.loads(lines[0])["user"], self.user.username)
+
+    def test_jsonl_is_an_alias_of_ndjson(self):
+        self.client.force_login(self.user)
+        ndjson = self.client.get(self.url, {"format": "ndjson"})
+        jsonl = self.client.get(self.url, {"format": "jsonl"})
+        self.assertEqual(jsonl["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            b"".join(jsonl.streaming_content),
+            b"".join(ndjson.streaming_content)
+        )
+
+    async def test_asgi_export_is_streamed_asynchronously(self):
+        await self.async_client.aforce_login(self.user)
+        res = await self.async_client.get(self.url, {"format": "ndjson"})
+        self.assertTrue(res.is_async)
+        lines = b"".join(
+            [chunk async for chunk in res.streaming_content]
+        ).decode().splitlines()
+        self.assertEqual(len(lines), 34)
+
+    def test_unknown_format(self):
+        self.client.force_login(self.user)
+        res = self.client.get(self.url, {"format": "xml"})
+        self.assertEqual(res.status_code, 400)
+
+    def test_unknown_format_is_not_reflected(self):
+        self.client.force_login(self.user)
+        payload = "<script>alert(1)</script>"
+        res = self.client.get(self.url, {"format": payload})
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertNotIn(payload, res.content.decode())
+        self.assertEqual(res.json()["formats"], ["csv", "ndjson", "jsonl"])
+
+    def test_export_command(self):
+        out = io.StringIO()
+        call_command(
+            "export_user_data",
+            user=self.user.username,
+            format="jsonl",
+            stdout=out
+        )
+        self.assertEqual(len(out.getvalue().splitlines()), 34)
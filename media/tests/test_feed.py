@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from media.feed import compute_feed, genre_affinity, get_feed
+from media.models import Anime, Genre, Movie, UserAnimeData, UserMovieData
+
+
+class TestFeed(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="feed_user",
+            password="feed_password"
+        )
+        self.drama = Genre.objects.create(name="Drama")
+        self.comedy = Genre.objects.create(name="Comedy")
+        self.liked = Movie.objects.create(title="Liked drama")
+        self.liked.genre.add(self.drama)
+        self.drama_movie = Movie.objects.create(title="Other drama")
+        self.drama_movie.genre.add(self.drama)
+        self.comedy_anime = Anime.objects.create(title="Comedy anime")
+        self.comedy_anime.genre.add(self.comedy)
+        UserMovieData.objects.create(user=self.user, movie=self.liked, rate=5)
+
+    def titles(self, feed: list) -> list:
+        return [entry["title"] for entry in feed]
+
+    def test_genre_affinity_is_the_share_of_liked_titles(self):
+        drama, comedy = 1 << self.drama.bit, 1 << self.comedy.bit
+        self.assertEqual(
+            genre_affinity([drama, drama | comedy]),
+            {drama: 1.0, comedy: 0.5}
+        )
+
+    def test_unlisted_titles_of_liked_genres_come_first(self):
+        feed = compute_feed(self.user.id)
+        self.assertEqual(
+            self.titles(feed),
+            ["Other drama", "Comedy anime"]
+        )
+        self.assertEqual(feed[0]["kind"], "movies")
+
+    def test_popularity_ranks_titles_without_affinity(self):
+        UserMovieData.objects.filter(user=self.user).update(rate=2)
+        fan = get_user_model().objects.create_user(username="fan")
+        UserAnimeData.objects.create(user=fan, anime=self.comedy_anime)
+        self.assertEqual(
+            self.titles(compute_feed(self.user.id)),
+            ["Comedy anime", "Other drama"]
+        )
+
+    def test_feed_is_cached_until_the_user_rates(self):
+        self.assertEqual(get_feed(self.user.id)[0]["title"], "Other drama")
+        with self.assertNumQueries(0):
+            get_feed(self.user.id)
+        UserAnimeData.objects.create(
+            user=self.user,
+            anime=self.comedy_anime,
+            rate=5
+        )
+        self.assertEqual(self.titles(get_feed(self.user.id)), ["Other drama"])
+
+    def test_page_and_api(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("media:for-you"))
+        self.assertContains(
+            response,
+            reverse("media:movies-detail", kwargs={"pk": self.drama_movie.pk})
+        )
+        response = self.client.get(reverse("media:api-feed"))
+        self.assertEqual(
+            self.titles(response.json()["results"]),
+            ["Other drama", "Comedy anime"]
+        )
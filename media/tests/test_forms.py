@@ -1,7 +1,12 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
 
 from media.forms import UserMovieDataForm, UserAnimeDataForm, UserCartoonDataForm, UserSeriesDataForm, \
-    NewUserCreationForm
+    NewUserCreationForm, MediaFilterForm, MovieForm
+from media.genres import genre_registry
+from media.models import Genre
 
 
 class TestUserMediaDataForm(TestCase):
@@ -71,3 +76,58 @@ class TestUserCreationForm(TestCase):
         self.assertIn("email", self.form.fields)
         self.assertIn("password1", self.form.fields)
         self.assertIn("password2", self.form.fields)
+
+
+class TestGenreForms(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.drama = Genre.objects.create(name="Drama")
+        self.action = Genre.objects.create(name="Action")
+
+    def test_genre_choices_come_from_registry(self):
+        MediaFilterForm().as_p()
+        with self.assertNumQueries(0):
+            form = MediaFilterForm({"genres": [self.drama.id]})
+            form.as_p()
+            self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["genres"], [self.drama])
+
+    def test_registry_is_invalidated_on_genre_change(self):
+        self.assertNotIn("Comedy", MediaFilterForm().as_p())
+        comedy = Genre.objects.create(name="Comedy")
+        self.assertIn("Comedy", MediaFilterForm().as_p())
+        comedy.delete()
+        self.assertFalse(
+            MediaFilterForm({"genres": [comedy.id]}).is_valid()
+        )
+
+    def test_reload_swaps_the_whole_snapshot(self):
+        genres = genre_registry.all()
+        by_id = genre_registry.by_id()
+        comedy = Genre.objects.create(name="Comedy")
+        self.assertNotIn(comedy, genres)
+        self.assertNotIn(comedy.id, by_id)
+        self.assertIn(comedy, genre_registry.all())
+        self.assertEqual(
+            set(genre_registry.by_id()),
+            {genre.id for genre in genre_registry.all()}
+        )
+        with self.assertRaises(TypeError):
+            genre_registry.by_id()[0] = comedy
+
+    def test_genre_removed_during_validation_is_invalid(self):
+        form = MediaFilterForm({"genres": [self.drama.id]})
+        reloaded = {self.action.id: self.action}
+        with mock.patch.object(genre_registry, "by_id", return_value=reloaded):
+            self.assertFalse(form.is_valid())
+        self.assertIn("genres", form.errors)
+
+    def test_movie_form_saves_genres(self):
+        form = MovieForm(
+            {"title": "New", "genre": [self.drama.id, self.action.id]}
+        )
+        self.assertTrue(form.is_valid(), msg=form.errors)
+        movie = form.save()
+        self.assertEqual(set(movie.genre.all()), {self.drama, self.action})
+        form = MovieForm(instance=movie)
+        self.assertEqual(form.as_p().count(" checked>"), 2)
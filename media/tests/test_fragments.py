@@ -0,0 +1,144 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import QueryDict
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from media.cache import namespace_version
+from media.fragments import (
+    catalog_version,
+    normalized_query,
+    rows_namespace,
+)
+from media.models import Anime, Genre, Movie, UserMovieData
+from media.tests.base import TestBaseSetUp
+
+
+class TestNormalizedQuery(SimpleTestCase):
+    def test_equivalent_queries_match(self):
+        self.assertEqual(
+            normalized_query(QueryDict("genres=2&genres=1&title=Dune&x=1")),
+            normalized_query(QueryDict("title=dune+&genres=1&genres=2")),
+        )
+
+    def test_different_pages_differ(self):
+        self.assertNotEqual(
+            normalized_query(QueryDict("page=1")),
+            normalized_query(QueryDict("page=2")),
+        )
+
+
+class TestCatalogFragmentCache(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.url = reverse("media:movies-list")
+
+    def count_queries(self) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        return len(queries)
+
+    def test_cached_rows_skip_list_queries(self):
+        cold = self.count_queries()
+        warm = self.count_queries()
+        self.assertLess(warm, cold)
+
+    def test_user_column_is_not_cached(self):
+        self.client.get(self.url)
+        self.user.movies.remove(Movie.objects.get(title="Test1"))
+        res = self.client.get(self.url)
+        self.assertEqual(res.content.decode().count("Add to list"), 1)
+
+    def test_create_view_bumps_catalog_version(self):
+        genre = Genre.objects.create(name="Drama")
+        self.client.get(self.url)
+        Movie.objects.create(title="Also new")
+        res = self.client.post(
+            reverse("media:movies-create"),
+            {"title": "Brand new", "genre": [genre.id]}
+        )
+        self.assertEqual(res.status_code, 302)
+        res = self.client.get(self.url)
+        self.assertIn("Brand new", res.content.decode())
+        self.assertIn("Also new", res.content.decode())
+
+    def test_rating_bumps_rows_version(self):
+        self.client.get(self.url)
+        user_movie = UserMovieData.objects.get(
+            user=self.user,
+            movie__title="Test1"
+        )
+        user_movie.rate = 4.5
+        with self.captureOnCommitCallbacks(execute=True):
+            user_movie.save()
+        res = self.client.get(self.url)
+        self.assertIn("4.50", res.content.decode())
+
+
+class TestRowsVersion(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.movie = Movie.objects.get(title="Test1")
+        self.user_movie = UserMovieData.objects.get(
+            user=self.user,
+            movie=self.movie
+        )
+        self.user_movie.rate = 4
+        self.user_movie.save()
+        self.other = get_user_model().objects.create_user(
+            username="Other_user",
+            password="Other_user_password"
+        )
+
+    def assertRowsBumped(self, bumped: bool, change):
+        movie_rows = namespace_version(rows_namespace(Movie))
+        anime_rows = namespace_version(rows_namespace(Anime))
+        catalog = catalog_version()
+        change()
+        self.assertEqual(
+            namespace_version(rows_namespace(Movie)) != movie_rows,
+            bumped
+        )
+        self.assertEqual(namespace_version(rows_namespace(Anime)), anime_rows)
+        self.assertEqual(catalog_version(), catalog)
+
+    def test_new_average_bumps_the_kind_only(self):
+        self.assertRowsBumped(True, lambda: UserMovieData.objects.create(
+            user=self.other, movie=self.movie, rate=2
+        ))
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.average_rate, Decimal("3"))
+
+    def test_same_average_does_not_bump(self):
+        self.assertRowsBumped(False, lambda: UserMovieData.objects.create(
+            user=self.other, movie=self.movie, rate=4
+        ))
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.rating_count, 2)
+
+    def test_status_change_does_not_bump(self):
+        def change():
+            self.user_movie.status = UserMovieData.Status.finished
+            self.user_movie.save()
+        self.assertRowsBumped(False, change)
+
+    def test_toggle_does_not_bump(self):
+        self.assertRowsBumped(False, lambda: Movie.toggle_in_user_list(
+            self.other.id, [self.movie.id]
+        ))
+
+    def test_removing_the_last_rate_bumps(self):
+        self.assertRowsBumped(True, self.user_movie.delete)
+        self.movie.refresh_from_db()
+        self.assertIsNone(self.movie.average_rate)
+
+    def test_refresh_bumps_only_on_new_average(self):
+        self.assertRowsBumped(False, Movie.refresh_rating_aggregates)
+        UserMovieData.objects.filter(pk=self.user_movie.pk).update(rate=5)
+        self.assertRowsBumped(True, Movie.refresh_rating_aggregates)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.average_rate, Decimal("5"))
@@ -0,0 +1,131 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from media.management.commands.import_media import iter_json_array
+from media.models import Anime, Genre, Movie, Series
+
+
+class TestImportMedia(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name: str, content: str) -> Path:
+        path = Path(self.directory.name) / name
+        path.write_text(content, encoding="utf-8")
+        return path
+
+    def import_media(self, *args, **options):
+        call_command("import_media", *args, stdout=io.StringIO(), **options)
+
+    def test_iter_json_array_reads_across_chunks(self):
+        items = [{"title": f"Title {i}", "text": "x" * i} for i in range(50)]
+        stream = io.StringIO(json.dumps(items))
+        self.assertEqual(list(iter_json_array(stream, chunk_size=7)), items)
+
+    def test_import_django_fixture(self):
+        self.import_media(
+            str(settings.BASE_DIR / "initial_data.json"),
+            batch_size=3
+        )
+        inception = Movie.objects.get(pk=1)
+        self.assertEqual(inception.title, "Inception")
+        self.assertEqual(
+            set(inception.genre.values_list("pk", flat=True)),
+            {1, 8}
+        )
+        self.assertTrue(Series.objects.exists())
+
+    def test_import_plain_json_is_idempotent(self):
+        path = str(settings.BASE_DIR / "anime_fixture.json")
+        self.import_media(path, type="anime")
+        self.import_media(path, type="anime")
+        self.assertEqual(Anime.objects.count(), 37)
+        self.assertTrue(Anime.objects.filter(title="Naruto").exists())
+
+    def test_import_csv_resolves_genre_names(self):
+        Genre.objects.create(name="Drama")
+        path = self.write(
+            "movies.csv",
+            "title,year_released,genres\n"
+            "First,2001,Drama|Noir\n"
+            "Second,,\n"
+        )
+        self.import_media(str(path), type="movie")
+        first = Movie.objects.get(title="First")
+        self.assertEqual(first.year_released, 2001)
+        self.assertEqual(
+            set(first.genre.values_list("name", flat=True)),
+            {"Drama", "Noir"}
+        )
+        self.assertEqual(Genre.objects.filter(name="Drama").count(), 1)
+
+    def test_import_jsonl_updates_existing_title(self):
+        Movie.objects.create(title="Same", year_released=2000)
+        path = self.write(
+            "movies.jsonl",
+            '{"title": "Same", "year_released": 2000, "description": "New"}\n'
+        )
+        self.import_media(str(path), type="movie")
+        self.assertEqual(Movie.objects.get(title="Same").description, "New")
+        self.assertEqual(Movie.objects.count(), 1)
+
+    def test_import_csv_is_idempotent(self):
+        path = self.write(
+            "series.csv",
+            "title,year_released,seasons,episodes\n"
+            "First,2001,2,20\n"
+            "Second,,,\n"
+        )
+        self.import_media(str(path), type="series")
+        self.import_media(str(path), type="series")
+        self.assertEqual(Series.objects.count(), 2)
+        first = Series.objects.get(title="First")
+        self.assertEqual((first.seasons, first.episodes), (2, 20))
+
+    def test_import_csv_rejects_invalid_numbers(self):
+        path = self.write("movies.csv", "title,year_released\nFirst,soon\n")
+        with self.assertRaisesMessage(CommandError, "year_released"):
+            self.import_media(str(path), type="movie")
+
+    def test_import_merges_duplicate_records(self):
+        existing = Movie.objects.create(title="Kept", year_released=2000)
+        path = self.write(
+            "movies.jsonl",
+            '{"title": "Twice", "description": "First"}\n'
+            '{"title": "Twice", "description": "Second"}\n'
+            '{"title": "Kept", "year_released": "2000"}\n'
+            f'{{"id": {existing.pk}, "title": "Kept", "year_released": 2000, '
+            '"description": "Last"}\n'
+        )
+        out = io.StringIO()
+        call_command("import_media", str(path), type="movie", stdout=out)
+        call_command("import_media", str(path), type="movie", stdout=out)
+        self.assertEqual(Movie.objects.filter(title="Twice").count(), 1)
+        self.assertEqual(
+            Movie.objects.get(title="Twice").description,
+            "Second"
+        )
+        self.assertEqual(Movie.objects.filter(title="Kept").count(), 1)
+        self.assertEqual(Movie.objects.get(title="Kept").description, "Last")
+        self.assertIn("2 duplicate rows merged", out.getvalue())
+
+    def test_import_reports_unknown_genre_ids(self):
+        genre = Genre.objects.create(name="Drama")
+        path = self.write(
+            "movies.jsonl",
+            f'{{"title": "First", "genres": [{genre.pk}, 9999]}}\n'
+        )
+        out = io.StringIO()
+        call_command("import_media", str(path), type="movie", stdout=out)
+        self.assertEqual(
+            list(Movie.objects.get(title="First").genre.all()),
+            [genre]
+        )
+        self.assertIn("Skipped unknown genre ids: 9999", out.getvalue())
@@ -0,0 +1,136 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from media.models import (
+    Anime,
+    Movie,
+    UserAnimeData,
+    UserMediaDataMixin,
+    UserMovieData,
+)
+from media.pagination import encode_cursor
+from media.tests.base import TestBaseSetUp
+
+LIBRARY_URL = reverse("media:user-library-list")
+
+
+class TestUserLibrary(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        UserMovieData.objects.filter(
+            user=self.user,
+            movie__title="Test1"
+        ).update(rate=9, status=UserMediaDataMixin.Status.watching)
+        UserAnimeData.objects.filter(
+            user=self.user,
+            anime__title="Test2"
+        ).update(rate=8, status=UserMediaDataMixin.Status.watching)
+
+    def titles(self, **params) -> list:
+        response = self.client.get(LIBRARY_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [
+            (entry["kind"], entry["title"])
+            for entry in response.context["library"]
+        ]
+
+    def walk(self, **params) -> list:
+        """Every entry of the library, following the next cursors."""
+        entries = []
+        while True:
+            response = self.client.get(LIBRARY_URL, params)
+            page = response.context["page_obj"]
+            entries.extend(page.object_list)
+            if not page.has_next():
+                return entries
+            params["cursor"] = page.next_cursor
+
+    def test_cursor_of_another_ordering(self):
+        cursor = encode_cursor(["title", "kind", "id"], ["Test1", "movie", 1])
+        response = self.client.get(
+            LIBRARY_URL,
+            {"order": "-rate", "cursor": cursor}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_lists_every_kind(self):
+        entries = self.walk()
+        self.assertEqual(len(entries), 10 + 9 + 8 + 7)
+        self.assertEqual(
+            {entry["kind"] for entry in entries},
+            {"movie", "anime", "series", "cartoon"}
+        )
+
+    def test_status_filter(self):
+        self.assertEqual(
+            self.titles(show_only=UserMediaDataMixin.Status.watching),
+            [("movie", "Test1"), ("anime", "Test2")]
+        )
+
+    def test_title_search(self):
+        self.assertEqual(
+            sorted(self.titles(title="Test8")),
+            [("anime", "Test8"), ("movie", "Test8")]
+        )
+
+    def test_order_by_title(self):
+        titles = [title for _, title in self.titles(order="title")]
+        self.assertEqual(titles, sorted(titles))
+
+    def test_page_is_one_query(self):
+        self.client.get(LIBRARY_URL)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(LIBRARY_URL, HTTP_IF_NONE_MATCH='"stale"')
+        unions = [
+            query for query in queries
+            if "UNION ALL" in query["sql"] and "LIMIT" in query["sql"]
+        ]
+        self.assertEqual(len(unions), 1)
+
+    def test_keyset_pages_do_not_overlap(self):
+        Movie.toggle_in_user_list(
+            self.user.id,
+            [Movie.objects.create(title=f"Extra{i}").pk for i in range(60)]
+        )
+        entries = self.walk(order="title")
+        keys = [(entry["kind"], entry["id"]) for entry in entries]
+        self.assertEqual(len(keys), len(set(keys)))
+        self.assertEqual(len(keys), 10 + 9 + 8 + 7 + 60)
+
+    def test_links_point_to_the_right_kind(self):
+        response = self.client.get(LIBRARY_URL, {"title": "Test2"})
+        anime = Anime.objects.get(title="Test2")
+        self.assertContains(
+            response,
+            reverse("media:anime-detail", kwargs={"pk": anime.pk})
+        )
+
+    def test_not_modified(self):
+        etag = self.client.get(LIBRARY_URL)["ETag"]
+        response = self.client.get(LIBRARY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(MEDIA_UNIFIED_CATALOG=True)
+class TestUnifiedUserLibrary(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        call_command("sync_media_catalog", stdout=StringIO())
+
+    def test_reads_the_unified_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(LIBRARY_URL, {"title": "Test3"})
+        self.assertEqual(
+            sorted(entry["kind"] for entry in response.context["library"]),
+            ["anime", "cartoon", "movie", "series"]
+        )
+        self.assertFalse(
+            any("UNION" in query["sql"] for query in queries)
+        )
@@ -0,0 +1,76 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from media.metrics import registry
+from media.tests.base import TestBaseSetUp
+
+METRICS_URL = reverse("media:metrics")
+
+
+@override_settings(MEDIA_METRICS_ENABLED=True, MEDIA_METRICS_TOKEN="secret")
+class TestRequestMetrics(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.client.force_login(self.user)
+
+    def scrape(self) -> str:
+        response = self.client.get(
+            METRICS_URL,
+            HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_records_queries_and_timings_by_view(self):
+        self.client.get(reverse("media:movies-list"))
+        self.client.get(reverse("media:movies-list"))
+        text = self.scrape()
+        label = 'view="media:movies-list"'
+        self.assertIn(f"media_request_queries_count{{{label}}} 2", text)
+        self.assertIn(
+            f"media_request_duration_seconds_count{{{label}}} 2", text
+        )
+        self.assertIn(
+            f'media_request_queries_bucket{{{label},le="+Inf"}} 2', text
+        )
+        render_sum = next(
+            line for line in text.splitlines()
+            if line.startswith(f"media_request_render_seconds_sum{{{label}}}")
+        )
+        self.assertGreater(float(render_sum.split()[-1]), 0)
+
+    def test_async_views_are_counted(self):
+        self.client.get(reverse("media:index"))
+        text = self.scrape()
+        queries = next(
+            line for line in text.splitlines()
+            if line.startswith('media_request_queries_sum{view="media:index"}')
+        )
+        self.assertGreater(float(queries.split()[-1]), 0)
+
+    @override_settings(MEDIA_METRICS_SAMPLE_RATE=0)
+    def test_sampling(self):
+        self.client.get(reverse("media:movies-list"))
+        self.assertNotIn("media:movies-list", self.scrape())
+
+    def test_requires_token_or_staff(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        self.assertEqual(
+            self.client.get(
+                METRICS_URL,
+                HTTP_AUTHORIZATION="Bearer wrong"
+            ).status_code,
+            403
+        )
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 200)
+
+
+class TestMetricsDisabled(TestBaseSetUp):
+    def test_nothing_is_recorded(self):
+        registry.reset()
+        self.client.force_login(self.user)
+        self.client.get(reverse("media:movies-list"))
+        self.assertNotIn("media:movies-list", registry.render())
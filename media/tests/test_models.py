@@ -0,0 +1,181 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.db.models import QuerySet
+
+from media.genres import filter_by_genres
+from media.models import Genre, Movie, UserMovieData, Anime
+from media.tests.base import TestBaseSetUp
+
+
+class TestRatingAggregates(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.movie = Movie.objects.get(title="Test1")
+        self.user_movie = UserMovieData.objects.get(
+            user=self.user,
+            movie=self.movie
+        )
+
+    def test_add_counts_want_to_watch(self):
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.want_to_watch_count, 1)
+        self.assertEqual(self.movie.rating_count, 0)
+        self.assertIsNone(self.movie.average_rate)
+
+    def test_rate_and_status_update(self):
+        self.user_movie.rate = Decimal("4.5")
+        self.user_movie.status = UserMovieData.Status.finished
+        self.user_movie.save()
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.rating_sum, Decimal("4.5"))
+        self.assertEqual(self.movie.rating_count, 1)
+        self.assertEqual(self.movie.average_rate, Decimal("4.5"))
+        self.assertEqual(self.movie.finished_count, 1)
+        self.assertEqual(self.movie.want_to_watch_count, 0)
+
+        self.user_movie.rate = 3
+        self.user_movie.save()
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.rating_count, 1)
+        self.assertEqual(self.movie.average_rate, Decimal("3"))
+
+    def test_average_over_several_users(self):
+        self.user_movie.rate = 5
+        self.user_movie.save()
+        other = self.user.__class__.objects.create_user(
+            username="Other_user",
+            password="Other_user_password"
+        )
+        UserMovieData.objects.create(user=other, movie=self.movie, rate=2)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.rating_count, 2)
+        self.assertEqual(self.movie.average_rate, Decimal("3.5"))
+
+    def test_remove_from_list(self):
+        self.user_movie.rate = 4
+        self.user_movie.save()
+        self.user.movies.remove(self.movie)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.rating_count, 0)
+        self.assertEqual(self.movie.rating_sum, 0)
+        self.assertIsNone(self.movie.average_rate)
+        self.assertEqual(self.movie.want_to_watch_count, 0)
+
+    def test_toggle_locks_the_titles(self):
+        select_for_update = QuerySet.select_for_update
+        with mock.patch.object(
+                QuerySet,
+                "select_for_update",
+                autospec=True,
+                side_effect=select_for_update
+        ) as locked:
+            in_list = Movie.toggle_in_user_list(self.user.id, [self.movie.pk])
+        locked.assert_called_once()
+        self.assertEqual(locked.call_args.args[0].model, Movie)
+        self.assertEqual(in_list, {self.movie.pk: False})
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.want_to_watch_count, 0)
+
+    def test_rebuild_command(self):
+        self.user_movie.rate = 2
+        self.user_movie.save()
+        Movie.objects.update(
+            rating_sum=0,
+            rating_count=0,
+            average_rate=None,
+            want_to_watch_count=0
+        )
+        call_command("rebuild_media_aggregates", stdout=open("/dev/null", "w"))
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.rating_count, 1)
+        self.assertEqual(self.movie.average_rate, Decimal("2"))
+        self.assertEqual(self.movie.want_to_watch_count, 1)
+        self.assertEqual(
+            Anime.objects.get(title="Test0").want_to_watch_count, 1
+        )
+
+
+class TestUserDataConstraints(TestBaseSetUp):
+    def test_user_can_not_add_same_movie_twice(self):
+        movie = Movie.objects.get(title="Test1")
+        with self.assertRaises(IntegrityError):
+            UserMovieData.objects.create(user=self.user, movie=movie)
+
+
+class TestGenreMasks(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.drama = Genre.objects.create(name="Drama")
+        self.comedy = Genre.objects.create(name="Comedy")
+        self.both = Movie.objects.get(title="Test1")
+        self.both.genre.add(self.drama, self.comedy)
+        self.drama_only = Movie.objects.get(title="Test2")
+        self.drama_only.genre.add(self.drama)
+
+    def mask(self, movie: Movie) -> int:
+        movie.refresh_from_db(fields=["genre_mask"])
+        return movie.genre_mask
+
+    def test_genres_get_distinct_bits(self):
+        self.assertNotEqual(self.drama.bit, self.comedy.bit)
+        self.assertEqual(
+            self.mask(self.both),
+            (1 << self.drama.bit) | (1 << self.comedy.bit)
+        )
+
+    def test_masks_follow_relation_changes(self):
+        self.both.genre.remove(self.comedy)
+        self.assertEqual(self.mask(self.both), 1 << self.drama.bit)
+        self.comedy.movies.add(self.drama_only)
+        self.assertEqual(self.mask(self.drama_only), self.mask(self.both) | (
+            1 << self.comedy.bit
+        ))
+        self.drama.movies.clear()
+        self.assertEqual(self.mask(self.both), 0)
+        self.comedy.delete()
+        self.assertEqual(self.mask(self.drama_only), 0)
+
+    def test_any_and_all_filters_need_no_join(self):
+        queryset = filter_by_genres(
+            Movie.objects.all(),
+            [self.drama, self.comedy]
+        )
+        self.assertNotIn("JOIN", str(queryset.query))
+        self.assertNotIn("DISTINCT", str(queryset.query))
+        self.assertQuerysetEqual(
+            queryset.order_by("title"),
+            [self.both, self.drama_only]
+        )
+        self.assertQuerysetEqual(
+            filter_by_genres(
+                Movie.objects.all(),
+                [self.drama, self.comedy],
+                match_all=True
+            ),
+            [self.both]
+        )
+
+    def test_genres_without_a_bit_use_the_relation(self):
+        Genre.objects.filter(pk=self.comedy.pk).update(bit=None)
+        self.comedy.refresh_from_db()
+        self.assertQuerysetEqual(
+            filter_by_genres(
+                Movie.objects.all(),
+                [self.drama, self.comedy],
+                match_all=True
+            ),
+            [self.both]
+        )
+        self.assertEqual(
+            filter_by_genres(Movie.objects.all(), [self.comedy]).count(),
+            1
+        )
+
+    def test_rebuild_command_fixes_masks(self):
+        Movie.objects.update(genre_mask=0)
+        call_command("rebuild_media_aggregates", stdout=StringIO())
+        self.assertEqual(self.mask(self.drama_only), 1 << self.drama.bit)
@@ -0,0 +1,92 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from media.models import Movie, UserMovieData
+from media.pagination import encode_cursor
+from media.tests.base import TestBaseSetUp
+
+
+@override_settings(MEDIA_KEYSET_PAGINATION=True)
+class TestKeysetPagination(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        for i in range(110):
+            movie = Movie.objects.create(
+                title=f"Keyset{i % 7}",
+                year_released=None if i % 5 == 0 else 2000 + i % 4
+            )
+            UserMovieData.objects.create(
+                user=self.user,
+                movie=movie,
+                rate=None if i % 3 == 0 else i % 5
+            )
+
+    def walk(self, url, params):
+        pages = []
+        res = self.client.get(url, params)
+        pages.append(list(res.context["object_list"]))
+        while res.context["page_obj"].has_next():
+            cursor = res.context["page_obj"].next_cursor
+            self.assertIn(f"cursor={cursor}", res.content.decode())
+            res = self.client.get(url, {**params, "cursor": cursor})
+            pages.append(list(res.context["object_list"]))
+        back = [list(res.context["object_list"])]
+        while res.context["page_obj"].has_previous():
+            res = self.client.get(
+                url,
+                {**params, "cursor": res.context["page_obj"].previous_cursor}
+            )
+            back.insert(0, list(res.context["object_list"]))
+        self.assertEqual(back, pages)
+        return [obj for page in pages for obj in page]
+
+    def test_catalog_pages_follow_order(self):
+        url = reverse("media:movies-list")
+        for order in ("title", "-year_released"):
+            self.assertEqual(
+                self.walk(url, {"order": order}),
+                list(Movie.objects.order_by(order, "id"))
+            )
+
+    def test_ranked_search_pages(self):
+        movies = self.walk(reverse("media:movies-list"), {"title": "keyset"})
+        self.assertEqual(len(movies), 110)
+        self.assertEqual(len(set(movies)), 110)
+
+    def test_user_list_pages_follow_rate(self):
+        self.assertEqual(
+            self.walk(reverse("media:user-movies-list"), {}),
+            list(UserMovieData.objects.filter(user=self.user).order_by(
+                "-rate", "id"
+            ))
+        )
+
+    def test_first_page_has_no_count_query(self):
+        res = self.client.get(reverse("media:movies-list"))
+        self.assertIsNone(res.context["paginator"])
+        self.assertEqual(len(res.context["object_list"]), 50)
+
+    def test_invalid_cursor(self):
+        res = self.client.get(
+            reverse("media:movies-list"),
+            {"cursor": "not-a-cursor"}
+        )
+        self.assertEqual(res.status_code, 404)
+
+    def test_cursor_of_another_ordering(self):
+        url = reverse("media:movies-list")
+        cursor = self.client.get(
+            url,
+            {"order": "title"}
+        ).context["page_obj"].next_cursor
+        res = self.client.get(
+            url,
+            {"order": "-year_released", "cursor": cursor}
+        )
+        self.assertEqual(res.status_code, 404)
+
+    def test_cursor_with_mistyped_values(self):
+        cursor = encode_cursor(["title", "id"], ["Keyset1", "not-an-id"])
+        res = self.client.get(reverse("media:movies-list"), {"cursor": cursor})
+        self.assertEqual(res.status_code, 404)
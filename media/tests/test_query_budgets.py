@@ -0,0 +1,74 @@
+import random
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from media.benchmark import (
+    add_to_lists,
+    create_benchmark_user,
+    request_specs,
+    seed_catalog,
+    send,
+)
+from media.models import Movie
+from media.query_budgets import QUERY_BUDGETS
+from media.tests.queries import QueryLog, fingerprint
+from media.urls import urlpatterns
+
+
+class TestQueryBudgets(TestCase):
+    def setUp(self):
+        self.rng = random.Random(3)
+        seed_catalog(titles=5, users=3, rows=5, rng=self.rng, genres=3)
+        self.user = create_benchmark_user(list_size=2, rng=self.rng)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual(
+            set(QUERY_BUDGETS),
+            {f"media:{pattern.name}" for pattern in urlpatterns}
+        )
+
+    def assert_within_budgets(self, specs: dict, size: str):
+        for name, spec in specs.items():
+            cache.clear()
+            with QueryLog() as log:
+                response = send(self.client, spec)
+            with self.subTest(route=name, size=size):
+                self.assertLess(response.status_code, 400)
+                budget = QUERY_BUDGETS[name]
+                self.assertLessEqual(
+                    len(log),
+                    budget,
+                    f"{name} ran {len(log)} queries with {size} data, over "
+                    f"its budget of {budget}:\n{log.report()}"
+                )
+
+    def test_routes_stay_within_budget_as_data_grows(self):
+        specs = request_specs(self.user)
+        self.assert_within_budgets(specs, "small")
+        # More titles and list entries than fit on one page.
+        seed_catalog(titles=70, users=5, rows=100, rng=self.rng, genres=6)
+        add_to_lists(self.user, 60, self.rng)
+        self.assert_within_budgets(specs, "multi-page")
+
+
+class TestQueryLog(TestCase):
+    def test_fingerprint_collapses_literals(self):
+        self.assertEqual(
+            fingerprint(
+                'SELECT "a" FROM "t"\n  WHERE "id" IN (1, 2, 3) '
+                "AND \"name\" = 'x' LIMIT 21"
+            ),
+            'SELECT "a" FROM "t" WHERE "id" IN (...) AND "name" = ? LIMIT ?'
+        )
+
+    def test_report_groups_queries_with_their_origin(self):
+        with QueryLog() as log:
+            for _ in range(2):
+                Movie.refresh_rating_aggregates()
+        report = log.report()
+        self.assertIn("2x UPDATE", report)
+        self.assertIn("media/models.py", report)
+        self.assertNotIn("test_query_budgets.py", report)
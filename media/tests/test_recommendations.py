@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from media.models import Movie, SimilarMovie, UserMovieData
+from media.recommendations import (
+    build_similar_titles,
+    last_built,
+    similar_titles,
+    update_similar_titles,
+)
+
+RATES = {
+    "fan_1": {"A": 5, "B": 5, "C": 1},
+    "fan_2": {"A": 4, "B": 5, "C": 1},
+    "fan_3": {"A": 5, "B": 4, "C": 2, "D": 3},
+    "critic": {"A": 1, "B": 2, "C": 5},
+}
+
+
+class TestRecommendations(TestCase):
+    def setUp(self):
+        self.movies = {
+            title: Movie.objects.create(title=title) for title in "ABCDE"
+        }
+        self.rate(RATES)
+
+    def rate(self, rates: dict):
+        for username, user_rates in rates.items():
+            user, _ = get_user_model().objects.get_or_create(username=username)
+            for title, rate in user_rates.items():
+                UserMovieData.objects.update_or_create(
+                    user=user,
+                    movie=self.movies[title],
+                    defaults={"rate": rate}
+                )
+
+    def pairs(self) -> dict:
+        return {
+            (row.movie.title, row.similar.title): round(row.score, 6)
+            for row in SimilarMovie.objects.select_related("movie", "similar")
+        }
+
+    def test_titles_rated_alike_are_similar(self):
+        build_similar_titles(Movie)
+        self.assertEqual(
+            similar_titles(self.movies["A"]),
+            [self.movies["B"]]
+        )
+        self.assertEqual(
+            similar_titles(self.movies["B"]),
+            [self.movies["A"]]
+        )
+        # Rated the opposite way by the same users.
+        self.assertEqual(similar_titles(self.movies["C"]), [])
+
+    def test_incremental_update_matches_a_full_build(self):
+        build_similar_titles(Movie)
+        since = last_built(Movie)
+        self.rate({
+            "fan_4": {"A": 5, "D": 5, "C": 1},
+            "fan_5": {"A": 4, "D": 5, "E": 1},
+        })
+
+        updated = update_similar_titles(Movie, since)
+        self.assertEqual(updated, 4)
+        self.assertIn(self.movies["D"], similar_titles(self.movies["A"]))
+        self.assertIn(self.movies["A"], similar_titles(self.movies["D"]))
+        incremental = self.pairs()
+        build_similar_titles(Movie)
+        self.assertEqual(incremental, self.pairs())
+
+    def test_lists_are_cut_to_top_k(self):
+        self.rate({
+            "fan_4": {"A": 5, "D": 5, "E": 5, "C": 1},
+            "fan_5": {"A": 4, "D": 5, "E": 5, "C": 1},
+        })
+        build_similar_titles(Movie, top_k=1)
+        self.assertEqual(
+            SimilarMovie.objects.filter(movie=self.movies["A"]).count(),
+            1
+        )
+
+    def test_command_and_detail_page(self):
+        call_command(
+            "build_similar_titles",
+            "--kind",
+            "movies",
+            stdout=StringIO()
+        )
+        user = get_user_model().objects.get(username="fan_1")
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse("media:movies-detail", kwargs={"pk": self.movies["A"].pk})
+        )
+        self.assertEqual(
+            list(response.context["similar_titles"]),
+            [self.movies["B"]]
+        )
+        self.assertContains(
+            response,
+            reverse("media:movies-detail", kwargs={"pk": self.movies["B"].pk})
+        )
@@ -0,0 +1,41 @@
+from media.models import Movie, UserMovieData, UserSeriesData
+from media.stats import get_user_stats
+from media.tests.base import TestBaseSetUp
+
+
+class TestUserStats(TestBaseSetUp):
+    def test_counts_are_computed_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = get_user_stats(self.user.id)
+        self.assertEqual(stats["movies"]["total"], 10)
+        self.assertEqual(stats["anime"]["total"], 9)
+        self.assertEqual(stats["series"]["total"], 8)
+        self.assertEqual(stats["cartoons"]["total"], 7)
+        self.assertEqual(stats["total"]["total"], 34)
+        self.assertEqual(stats["total"]["want_to_watch"], 34)
+        with self.assertNumQueries(0):
+            get_user_stats(self.user.id)
+
+    def test_cache_is_invalidated_on_change(self):
+        get_user_stats(self.user.id)
+        user_series = UserSeriesData.objects.filter(user=self.user).first()
+        user_series.status = UserSeriesData.Status.watching
+        user_series.save()
+        stats = get_user_stats(self.user.id)
+        self.assertEqual(stats["series"]["watching"], 1)
+        self.assertEqual(stats["total"]["watching"], 1)
+
+        self.user.movies.add(Movie.objects.create(title="New"))
+        self.assertEqual(get_user_stats(self.user.id)["movies"]["total"], 11)
+
+        UserMovieData.objects.filter(user=self.user).delete()
+        self.assertEqual(get_user_stats(self.user.id)["movies"]["total"], 0)
+
+    def test_cache_is_invalidated_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.movies.add(Movie.objects.create(title="New"))
+            # Computed before the commit, as a concurrent request could.
+            get_user_stats(self.user.id)
+        with self.assertNumQueries(1):
+            stats = get_user_stats(self.user.id)
+        self.assertEqual(stats["movies"]["total"], 11)
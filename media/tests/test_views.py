@@ -22,12 +22,25 @@ class TestHomePage(TestBaseSetUp):
         self.assertIn("Series:<br> 8", res.content.decode())
         self.assertIn("Cartoons:<br> 7", res.content.decode())
 
+    def test_home_page_status_totals(self):
+        UserMovieData.objects.filter(
+            movie__title__in=["Test1", "Test2"]
+        ).update(status=UserMovieData.Status.finished)
+        UserAnimeData.objects.filter(anime__title="Test1").update(
+            status=UserAnimeData.Status.dropped
+        )
+        self.client.force_login(self.user)
+        res = self.client.get(self.url)
+        self.assertIn("Finished:<br> 2", res.content.decode())
+        self.assertIn("Dropped:<br> 1", res.content.decode())
+        self.assertIn("Want to watch:<br> 31", res.content.decode())
+
 
 class TestUserMediaListView(TestBaseSetUp):
     def setUp(self):
         super().setUp()
         self.client.force_login(self.user)
-        self.user_movie_url = reverse("user-movies-list")
+        self.user_movie_url = reverse("media:user-movies-list")
 
     def test_user_media_search_form(self):
         res = self.client.get(self.user_movie_url, {"title": "1"})
@@ -72,7 +85,7 @@ class MediaListView(TestBaseSetUp):
     def setUp(self):
         super().setUp()
         self.client.force_login(self.user)
-        self.movie_list_url = reverse("movies-list")
+        self.movie_list_url = reverse("media:movies-list")
         self.new_genre1 = Genre.objects.create(name="Test_genre1")
         self.new_genre2 = Genre.objects.create(name="Test_genre2")
         for i in range(1, 6):
@@ -105,6 +118,20 @@ class MediaListView(TestBaseSetUp):
         self.assertTrue(filter_form.is_valid(), msg=f"Errors: {filter_form.errors}")
         self.assertEqual(len(res.context["object_list"]), 5)
 
+    def test_media_filter_form_all_genres(self):
+        Movie.objects.get(id=1).genre.add(self.new_genre2)
+        res = self.client.get(
+            self.movie_list_url,
+            {
+                "genres": [self.new_genre1.id, self.new_genre2.id],
+                "genre_match": "all",
+            }
+        )
+        self.assertQuerysetEqual(
+            res.context["object_list"],
+            [Movie.objects.get(id=1)]
+        )
+
     def test_movie_order_form_by_title(self):
         res = self.client.get(self.movie_list_url, {"order": "title"})
         order_form = res.context.get('order_form')
@@ -157,11 +184,168 @@ class MediaListView(TestBaseSetUp):
         )
         self.assertEqual(len(res.context["object_list"]), 2)
 
+    def test_user_media_ids_are_limited_to_page(self):
+        for i in range(60):
+            self.user.movies.add(Movie.objects.create(title=f"Zzz{i}"))
+        self.user.movies.remove(Movie.objects.get(title="Test3"))
+        res = self.client.get(self.movie_list_url)
+        page_ids = {movie.id for movie in res.context["object_list"]}
+        self.assertEqual(len(page_ids), 50)
+        self.assertEqual(
+            res.context["user_media_ids"],
+            page_ids - {Movie.objects.get(title="Test3").id}
+        )
+        self.assertEqual(res.content.decode().count("Add to list"), 1)
+
     def test_add_media_to_user_list(self):
-        self.client.get(reverse("movies-add", kwargs={"pk": 1}))
+        self.client.get(reverse("media:movies-add", kwargs={"pk": 1}))
         movie = Movie.objects.get(id=1)
         self.assertNotIn(self.user, movie.user.all())
-        self.client.get(reverse("movies-add", kwargs={"pk": 1}))
+        self.client.get(reverse("media:movies-add", kwargs={"pk": 1}))
         self.assertIn(self.user, movie.user.all())
 
 
+class TestMediaTitleSearch(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.movie_list_url = reverse("media:movies-list")
+        for title in ("The Amelie Story", "Amelie", "Amelie 2"):
+            Movie.objects.create(title=title)
+
+    def test_search_is_ranked_by_relevance(self):
+        res = self.client.get(self.movie_list_url, {"title": "amelie"})
+        titles = [movie.title for movie in res.context["object_list"]]
+        self.assertEqual(len(titles), 3)
+        self.assertEqual(titles[0], "Amelie")
+
+    def test_explicit_order_overrides_relevance(self):
+        res = self.client.get(
+            self.movie_list_url,
+            {"title": "amelie", "order": "title"}
+        )
+        self.assertQuerysetEqual(
+            res.context["object_list"],
+            Movie.objects.filter(title__icontains="amelie").order_by("title")
+        )
+
+    def test_search_follows_title_changes(self):
+        movie = Movie.objects.get(title="Amelie 2")
+        movie.title = "Brand new title"
+        movie.save()
+        res = self.client.get(self.movie_list_url, {"title": "brand new"})
+        self.assertEqual(list(res.context["object_list"]), [movie])
+        res = self.client.get(self.movie_list_url, {"title": "amelie"})
+        self.assertNotIn(movie, res.context["object_list"])
+
+    def test_user_list_search(self):
+        amelie = Movie.objects.get(title="Amelie")
+        self.user.movies.add(amelie)
+        res = self.client.get(
+            reverse("media:user-movies-list"),
+            {"title": "amel"}
+        )
+        self.assertEqual(
+            [data.movie for data in res.context["object_list"]],
+            [amelie]
+        )
+
+
+class TestToggleUserMedia(TestBaseSetUp):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.movie = Movie.objects.get(title="Test1")
+        self.new_movie = Movie.objects.create(title="New")
+
+    def test_toggle_returns_json(self):
+        res = self.client.post(
+            reverse("media:movies-add", kwargs={"pk": self.movie.id}),
+            HTTP_ACCEPT="application/json"
+        )
+        self.assertEqual(
+            res.json(),
+            {"in_list": {str(self.movie.id): False}, "not_found": []}
+        )
+        self.assertFalse(UserMovieData.objects.filter(
+            user=self.user, movie=self.movie
+        ).exists())
+
+    def test_toggle_unknown_title(self):
+        res = self.client.post(
+            reverse("media:movies-add", kwargs={"pk": 9999})
+        )
+        self.assertEqual(res.status_code, 404)
+
+    def test_bulk_toggle(self):
+        res = self.client.post(
+            reverse("media:movies-toggle"),
+            {"ids": [self.movie.id, self.new_movie.id, 9999]},
+            HTTP_ACCEPT="application/json"
+        )
+        self.assertEqual(
+            res.json(),
+            {
+                "in_list": {
+                    str(self.movie.id): False,
+                    str(self.new_movie.id): True,
+                },
+                "not_found": [9999],
+            }
+        )
+        self.new_movie.refresh_from_db()
+        self.assertEqual(self.new_movie.want_to_watch_count, 1)
+
+    def test_bulk_toggle_with_json_body(self):
+        res = self.client.post(
+            reverse("media:movies-toggle"),
+            data={"ids": [self.new_movie.id]},
+            content_type="application/json"
+        )
+        self.assertEqual(res.status_code, 302)
+        self.assertIn(self.user, self.new_movie.user.all())
+
+    def test_bulk_toggle_requires_post(self):
+        res = self.client.get(reverse("media:movies-toggle"))
+        self.assertEqual(res.status_code, 405)
+
+
+class TestAsyncViews(TestBaseSetUp):
+    """The async views served natively, as under ASGI."""
+
+    async def test_login_required(self):
+        res = await self.async_client.get(reverse("media:index"))
+        self.assertEqual(res.status_code, 302)
+        res = await self.async_client.get(reverse("media:movies-list"))
+        self.assertEqual(res.status_code, 302)
+
+    async def test_home_page(self):
+        await self.async_client.aforce_login(self.user)
+        res = await self.async_client.get(reverse("media:index"))
+        self.assertIn("Movies:<br> 10", res.content.decode())
+
+    async def test_list_and_detail(self):
+        await self.async_client.aforce_login(self.user)
+        movie = await Movie.objects.aget(title="Test1")
+        res = await self.async_client.get(reverse("media:user-movies-list"))
+        self.assertContains(res, "Test1")
+        res = await self.async_client.get(
+            reverse("media:movies-detail", kwargs={"pk": movie.pk})
+        )
+        self.assertContains(res, "Test1")
+        res = await self.async_client.get(
+            reverse("media:movies-detail", kwargs={"pk": 9999})
+        )
+        self.assertEqual(res.status_code, 404)
+
+    async def test_toggle(self):
+        await self.async_client.aforce_login(self.user)
+        movie = await Movie.objects.aget(title="Test1")
+        res = await self.async_client.post(
+            reverse("media:movies-add", kwargs={"pk": movie.pk}),
+            headers={"accept": "application/json"}
+        )
+        self.assertEqual(res.json()["in_list"], {str(movie.pk): False})
+        self.assertFalse(
+            await UserMovieData.objects.filter(movie=movie).aexists()
+        )
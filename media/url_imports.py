@@ -1,5 +1,16 @@
 from django.urls import path
 
+from media.api import (
+    feed,
+    media_batch,
+    media_detail,
+    media_list,
+    user_data_batch,
+    user_data_batch_update,
+    user_data_detail,
+    user_data_list,
+)
+
 from media.views import (
     add_anime,
     add_cartoon,
@@ -15,7 +26,11 @@ from media.views import (
     CartoonDetailView,
     CartoonUpdateView,
     CartoonDeleteView,
+    db_pool_stats,
+    export_user_library,
+    for_you,
     index,
+    metrics,
     MovieListView,
     MovieCreateView,
     MovieDetailView,
@@ -27,6 +42,7 @@ from media.views import (
     SeriesUpdateView,
     SeriesDeleteView,
     UserCreateView,
+    UserLibraryListView,
     UserMovieListView,
     UserAnimeListView,
     UserSeriesListView,
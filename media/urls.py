@@ -5,6 +5,71 @@ urlpatterns = [
         "",
         index,
         name="index"),
+    path(
+        "export/",
+        export_user_library,
+        name="user-library-export"
+    ),
+    path(
+        "metrics",
+        metrics,
+        name="metrics"
+    ),
+    path(
+        "status/db-pool/",
+        db_pool_stats,
+        name="db-pool-stats"
+    ),
+    path(
+        "library/",
+        UserLibraryListView.as_view(),
+        name="user-library-list"
+    ),
+    path(
+        "for-you/",
+        for_you,
+        name="for-you"
+    ),
+    path(
+        "api/feed/",
+        feed,
+        name="api-feed"
+    ),
+    path(
+        "api/user/batch-update/",
+        user_data_batch_update,
+        name="api-user-data-batch-update"
+    ),
+    path(
+        "api/user/<slug:kind>/",
+        user_data_list,
+        name="api-user-data-list"
+    ),
+    path(
+        "api/user/<slug:kind>/batch/",
+        user_data_batch,
+        name="api-user-data-batch"
+    ),
+    path(
+        "api/user/<slug:kind>/<int:pk>/",
+        user_data_detail,
+        name="api-user-data-detail"
+    ),
+    path(
+        "api/<slug:kind>/",
+        media_list,
+        name="api-media-list"
+    ),
+    path(
+        "api/<slug:kind>/batch/",
+        media_batch,
+        name="api-media-batch"
+    ),
+    path(
+        "api/<slug:kind>/<int:pk>/",
+        media_detail,
+        name="api-media-detail"
+    ),
     path(
         "users/create",
         UserCreateView.as_view(),
@@ -26,6 +91,11 @@ urlpatterns = [
         "movies/<int:pk>/add_movie",
         add_movie,
         name="movies-add"),
+    path(
+        "movies/toggle",
+        add_movie,
+        name="movies-toggle"
+    ),
     path(
         "movies/create",
         MovieCreateView.as_view(),
@@ -64,6 +134,11 @@ urlpatterns = [
         add_anime,
         name="anime-add"
     ),
+    path(
+        "anime/toggle",
+        add_anime,
+        name="anime-toggle"
+    ),
     path(
         "anime/create",
         AnimeCreateView.as_view(),
@@ -104,6 +179,11 @@ urlpatterns = [
         add_series,
         name="series-add"
     ),
+    path(
+        "series/toggle",
+        add_series,
+        name="series-toggle"
+    ),
     path(
         "series/create",
         SeriesCreateView.as_view(),
@@ -144,6 +224,11 @@ urlpatterns = [
         add_cartoon,
         name="cartoons-add"
     ),
+    path(
+        "cartoons/toggle",
+        add_cartoon,
+        name="cartoons-toggle"
+    ),
     path(
         "cartoons/create",
         CartoonCreateView.as_view(),
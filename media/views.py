@@ -1,6 +1,11 @@
+import hmac
+import json
 from abc import ABC, abstractmethod
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import (
     authenticate,
     login,
@@ -8,16 +13,35 @@ from django.contrib.auth import (
 )
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import QuerySet, Avg
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import QuerySet
 from django.http import (
+    Http404,
     HttpRequest,
     HttpResponse,
-    HttpResponseRedirect
+    HttpResponseNotAllowed,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
 )
 from django.shortcuts import render, get_object_or_404
-from django.urls import reverse_lazy
+from django.template.response import TemplateResponse
+from django.urls import reverse, reverse_lazy
 from django.views import generic
-
+from django.views.decorators.http import require_http_methods
+
+from media.auth import AsyncLoginRequiredMixin, async_login_required
+from media.conditional import ConditionalDetailMixin, ConditionalListMixin
+from media.dbpool import pool_stats
+from media.metrics import registry
+from media.export import (
+    CONTENT_TYPES,
+    EXPORT_FORMATS,
+    aiter_lines,
+    canonical_format,
+    iter_user_data,
+    render_user_data,
+)
 from media.forms import (
     UserMovieDataForm,
     NewUserCreationForm,
@@ -27,6 +51,7 @@ from media.forms import (
     UserAnimeDataForm,
     StatusFilterForm,
     MediaOrderForm,
+    LibraryOrderForm,
     UserSeriesDataForm,
     UserCartoonDataForm,
     MovieForm,
@@ -34,33 +59,63 @@ from media.forms import (
     SeriesForm,
     CartoonForm,
 )
+from media.feed import aget_feed
+from media.fragments import bump_catalog_version, get_catalog_rows
+from media.genres import filter_by_genres, genre_registry
+from media.library import (
+    LIBRARY_ORDERINGS,
+    alibrary_validators,
+    filter_by_title,
+    library_branches,
+    library_querysets,
+    prepare_row,
+)
 from media.models import (
     Movie,
     Anime,
     Series,
     Cartoon,
     UserMovieData,
-    Genre,
     UserAnimeData,
     UserSeriesData,
     UserCartoonData,
 )
+from media.pagination import KeysetPaginationMixin, UnionKeysetPage
+from media.recommendations import similar_titles
+from media.search import get_search_backend
+from media.stats import aget_user_stats
 
 
-@login_required
-def index(request: HttpRequest) -> HttpResponse:
-    user = get_user_model().objects.get(id=request.user.id)
-    movies = user.movies.count()
-    anime = user.anime.count()
-    series = user.series.count()
-    cartoons = user.cartoons.count()
+@async_login_required
+async def index(request: HttpRequest) -> HttpResponse:
+    stats = await aget_user_stats(request.user.id)
     context = {
-        "movies": movies,
-        "anime": anime,
-        "series": series,
-        "cartoons": cartoons
+        "movies": stats["movies"]["total"],
+        "anime": stats["anime"]["total"],
+        "series": stats["series"]["total"],
+        "cartoons": stats["cartoons"]["total"],
+        "stats": stats,
     }
-    return render(request, "media/index.html", context=context)
+    return TemplateResponse(request, "media/index.html", context=context)
+
+
+@async_login_required
+async def for_you(request: HttpRequest) -> HttpResponse:
+    feed = [
+        {
+            **entry,
+            "detail_url": reverse(
+                f"media:{entry['kind']}-detail",
+                kwargs={"pk": entry["id"]}
+            ),
+        }
+        for entry in await aget_feed(request.user.id)
+    ]
+    return TemplateResponse(
+        request,
+        "media/for_you.html",
+        context={"feed": feed}
+    )
 
 
 class UserCreateView(generic.CreateView):
@@ -92,7 +147,13 @@ class UserCreateView(generic.CreateView):
         return super().form_invalid(form)
 
 
-class UserMediaListView(LoginRequiredMixin, generic.ListView, ABC):
+class UserMediaListView(
+    AsyncLoginRequiredMixin,
+    ConditionalListMixin,
+    KeysetPaginationMixin,
+    generic.ListView,
+    ABC
+):
     model = None
     paginate_by = 50
 
@@ -111,6 +172,9 @@ class UserMediaListView(LoginRequiredMixin, generic.ListView, ABC):
     def media_title_filter(queryset: QuerySet, filter_by: str) -> QuerySet:
         pass
 
+    def get_updated_at_fields(self) -> tuple:
+        return "updated_at", f"{self.table}__updated_at"
+
     def get_queryset(self):
         user = get_user_model().objects.get(id=self.request.user.id)
         queryset = self.model.objects.filter(
@@ -139,7 +203,7 @@ class UserMovieListView(UserMediaListView):
 
     @staticmethod
     def media_title_filter(queryset: QuerySet, filter_by: str) -> QuerySet:
-        return queryset.filter(movie__title__icontains=filter_by)
+        return get_search_backend().filter(queryset, filter_by, "movie")
 
 
 class UserAnimeListView(UserMediaListView):
@@ -149,7 +213,7 @@ class UserAnimeListView(UserMediaListView):
 
     @staticmethod
     def media_title_filter(queryset: QuerySet, filter_by: str) -> QuerySet:
-        return queryset.filter(anime__title__icontains=filter_by)
+        return get_search_backend().filter(queryset, filter_by, "anime")
 
 
 class UserSeriesListView(UserMediaListView):
@@ -159,7 +223,7 @@ class UserSeriesListView(UserMediaListView):
 
     @staticmethod
     def media_title_filter(queryset: QuerySet, filter_by: str) -> QuerySet:
-        return queryset.filter(series__title__icontains=filter_by)
+        return get_search_backend().filter(queryset, filter_by, "series")
 
 
 class UserCartoonListView(UserMediaListView):
@@ -169,13 +233,74 @@ class UserCartoonListView(UserMediaListView):
 
     @staticmethod
     def media_title_filter(queryset: QuerySet, filter_by: str) -> QuerySet:
-        return queryset.filter(cartoon__title__icontains=filter_by)
+        return get_search_backend().filter(queryset, filter_by, "cartoon")
+
+
+class UserLibraryListView(UserMediaListView):
+    """Every entry of the user's lists across the four media kinds, read
+    with one UNION ALL query and keyset pagination."""
+
+    template_name = "media/user_library_list.html"
+    context_object_name = "library"
+    keyset_pagination = True
+
+    @staticmethod
+    def media_title_filter(queryset: QuerySet, filter_by: str) -> QuerySet:
+        return filter_by_title(queryset, filter_by)
+
+    def get_library_querysets(self) -> list[QuerySet]:
+        search_form = MediaSearchForm(self.request.GET)
+        status_filter_form = StatusFilterForm(self.request.GET)
+        title = status = None
+        if search_form.is_valid():
+            title = search_form.cleaned_data["title"]
+        if status_filter_form.is_valid():
+            status = status_filter_form.cleaned_data.get("show_only")
+        return library_querysets(self.request.user.id, status, title)
+
+    def get_queryset(self):
+        return library_branches(self.get_library_querysets())
+
+    def get_ordering(self):
+        order_form = LibraryOrderForm(self.request.GET)
+        order = "-rate"
+        if order_form.is_valid():
+            order = order_form.cleaned_data.get("order") or order
+        return LIBRARY_ORDERINGS[order]
+
+    async def aget_validators(self):
+        querysets = await sync_to_async(self.get_library_querysets)()
+        last_modified, count = await alibrary_validators(querysets)
+        return last_modified, [count]
+
+    def paginate_queryset(self, queryset, page_size):
+        page = UnionKeysetPage(
+            queryset,
+            self.get_ordering(),
+            page_size,
+            self.request.GET.get(self.cursor_kwarg)
+        )
+        for row in page.object_list:
+            prepare_row(row)
+        return None, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, *, object_list=None, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["order_form"] = LibraryOrderForm(self.request.GET)
+        return context
 
 
-class MediaListView(LoginRequiredMixin, generic.ListView, ABC):
+class MediaListView(
+    AsyncLoginRequiredMixin,
+    ConditionalListMixin,
+    KeysetPaginationMixin,
+    generic.ListView,
+    ABC
+):
     model = None
     paginate_by = 50
     order_form = None
+    row_template_name = None
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -184,28 +309,51 @@ class MediaListView(LoginRequiredMixin, generic.ListView, ABC):
         context["search_form"] = search_form
         context["filter_form"] = filter_form
         context["order_form"] = self.order_form(self.request.GET)
-        context["genres"] = Genre.objects.all()
+        context["genres"] = genre_registry.all()
         context["selected_genres"] = self.request.GET.getlist("genres")
+        context["catalog_rows"] = get_catalog_rows(
+            self.model,
+            self.request.GET,
+            context["object_list"],
+            self.row_template_name
+        )
+        context["user_media_ids"] = self.get_user_media_ids(
+            [row.id for row in context["catalog_rows"]]
+        )
         return context
 
+    def get_user_media_ids(self, media_ids: list) -> set:
+        """Ids of the titles on the current page that are in the user's
+        list, so the template checks membership without scanning it."""
+        user_data_model = self.model.user_data_model()
+        media_field = user_data_model.media_field
+        return set(
+            user_data_model.objects.filter(
+                user_id=self.request.user.id,
+                **{f"{media_field}__in": media_ids}
+            ).values_list(f"{media_field}_id", flat=True)
+        )
+
     def get_queryset(self):
         queryset = self.model.objects.prefetch_related("genre")
         search_form = MediaSearchForm(self.request.GET)
         filter_form = MediaFilterForm(self.request.GET)
         order_form = self.order_form(self.request.GET)
+        search_backend = get_search_backend()
 
         if search_form.is_valid():
             title = search_form.cleaned_data.get("title", "")
             if title:
-                queryset = queryset.filter(
-                    title__icontains=title
-                )
+                queryset = search_backend.filter(queryset, title)
+                queryset = search_backend.rank(queryset, title)
         if filter_form.is_valid():
             selected_genres = filter_form.cleaned_data.get("genres", [])
             if selected_genres:
-                queryset = queryset.filter(
-                    genre__in=selected_genres
-                ).distinct()
+                queryset = filter_by_genres(
+                    queryset,
+                    selected_genres,
+                    filter_form.cleaned_data.get("genre_match") == "all"
+                )
 
         if order_form.is_valid():
             order = order_form.cleaned_data.get("order", "title")
@@ -217,83 +365,98 @@ class MediaListView(LoginRequiredMixin, generic.ListView, ABC):
 
 class MovieListView(MediaListView):
     model = Movie
+    row_template_name = "media/movie_row.html"
     order_form = MovieOrderForm
 
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data()
-        context["user_movies"] = self.request.user.movies.all()
-        return context
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.annotate(average_rate=Avg("usermoviedata__rate"))
-
 
 class AnimeListView(MediaListView):
     model = Anime
+    row_template_name = "media/anime_row.html"
     order_form = MediaOrderForm
 
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data()
-        context["user_anime"] = self.request.user.anime.all()
-        return context
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.annotate(average_rate=Avg("useranimedata__rate"))
-
 
 class SeriesListView(MediaListView):
     model = Series
+    row_template_name = "media/series_row.html"
     order_form = MediaOrderForm
 
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data()
-        context["user_series"] = self.request.user.series.all()
-        return context
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.annotate(average_rate=Avg("userseriesdata__rate"))
-
 
 class CartoonListView(MediaListView):
     model = Cartoon
+    row_template_name = "media/cartoon_row.html"
     order_form = MediaOrderForm
 
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data()
-        context["user_cartoon"] = self.request.user.cartoons.all()
-        return context
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.annotate(average_rate=Avg("usercartoondata__rate"))
+class CatalogChangeMixin:
+    """Invalidates the cached catalog pages after a successful change."""
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        bump_catalog_version()
+        return response
+
+
+class SimilarTitlesMixin:
+    """Adds the stored "users who rated this also liked" titles."""
+
+    similar_titles_limit = 6
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["similar_titles"] = similar_titles(
+            self.object,
+            self.similar_titles_limit
+        )
+        return context
 
 
-class MovieDetailView(LoginRequiredMixin, generic.DetailView):
+class MovieDetailView(
+    AsyncLoginRequiredMixin,
+    ConditionalDetailMixin,
+    SimilarTitlesMixin,
+    generic.DetailView
+):
     model = Movie
 
 
-class AnimeDetailView(LoginRequiredMixin, generic.DetailView):
+class AnimeDetailView(
+    AsyncLoginRequiredMixin,
+    ConditionalDetailMixin,
+    SimilarTitlesMixin,
+    generic.DetailView
+):
     model = Anime
 
 
-class SeriesDetailView(LoginRequiredMixin, generic.DetailView):
+class SeriesDetailView(
+    AsyncLoginRequiredMixin,
+    ConditionalDetailMixin,
+    SimilarTitlesMixin,
+    generic.DetailView
+):
     model = Series
 
 
-class CartoonDetailView(LoginRequiredMixin, generic.DetailView):
+class CartoonDetailView(
+    AsyncLoginRequiredMixin,
+    ConditionalDetailMixin,
+    SimilarTitlesMixin,
+    generic.DetailView
+):
     model = Cartoon
 
 
-class MovieUpdateView(LoginRequiredMixin, generic.UpdateView):
+class MovieUpdateView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.UpdateView
+):
     model = Movie
     form_class = MovieForm
 
     def get_success_url(self):
         movie_id = self.object.id
-        return reverse_lazy("movies-detail", kwargs={"pk": movie_id})
+        return reverse_lazy("media:movies-detail", kwargs={"pk": movie_id})
 
     def form_invalid(self, form):
         response = self.render_to_response(self.get_context_data(form=form))
@@ -301,7 +464,11 @@ class MovieUpdateView(LoginRequiredMixin, generic.UpdateView):
         return response
 
 
-class AnimeUpdateView(LoginRequiredMixin, generic.UpdateView):
+class AnimeUpdateView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.UpdateView
+):
     model = Anime
     form_class = AnimeForm
 
@@ -315,7 +482,11 @@ class AnimeUpdateView(LoginRequiredMixin, generic.UpdateView):
         return response
 
 
-class SeriesUpdateView(LoginRequiredMixin, generic.UpdateView):
+class SeriesUpdateView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.UpdateView
+):
     model = Series
     form_class = SeriesForm
 
@@ -329,13 +500,17 @@ class SeriesUpdateView(LoginRequiredMixin, generic.UpdateView):
         return response
 
 
-class CartoonUpdateView(LoginRequiredMixin, generic.UpdateView):
+class CartoonUpdateView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.UpdateView
+):
     model = Cartoon
     form_class = CartoonForm
 
     def get_success_url(self):
         cartoon_id = self.object.id
-        return reverse_lazy("cartoons-detail", kwargs={"pk": cartoon_id})
+        return reverse_lazy("media:cartoons-detail", kwargs={"pk": cartoon_id})
 
     def form_invalid(self, form):
         response = self.render_to_response(self.get_context_data(form=form))
@@ -343,20 +518,28 @@ class CartoonUpdateView(LoginRequiredMixin, generic.UpdateView):
         return response
 
 
-class MovieCreateView(LoginRequiredMixin, generic.CreateView):
+class MovieCreateView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.CreateView
+):
     model = Movie
     form_class = MovieForm
 
     def get_success_url(self):
         movie_id = self.object.id
-        return reverse_lazy("movies-detail", kwargs={"pk": movie_id})
+        return reverse_lazy("media:movies-detail", kwargs={"pk": movie_id})
 
     def form_invalid(self, form):
         response = self.render_to_response(self.get_context_data(form=form))
         response.status_code = 400
         return response
 
-class AnimeCreateView(LoginRequiredMixin, generic.CreateView):
+class AnimeCreateView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.CreateView
+):
     model = Anime
     form_class = AnimeForm
 
@@ -370,7 +553,11 @@ class AnimeCreateView(LoginRequiredMixin, generic.CreateView):
         return response
 
 
-class SeriesCreateView(LoginRequiredMixin, generic.CreateView):
+class SeriesCreateView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.CreateView
+):
     model = Series
     form_class = SeriesForm
 
@@ -384,13 +571,17 @@ class SeriesCreateView(LoginRequiredMixin, generic.CreateView):
         return response
 
 
-class CartoonCreateView(LoginRequiredMixin, generic.CreateView):
+class CartoonCreateView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.CreateView
+):
     model = Cartoon
     form_class = CartoonForm
 
     def get_success_url(self):
         cartoon_id = self.object.id
-        return reverse_lazy("cartoons-detail", kwargs={"pk": cartoon_id})
+        return reverse_lazy("media:cartoons-detail", kwargs={"pk": cartoon_id})
 
     def form_invalid(self, form):
         response = self.render_to_response(self.get_context_data(form=form))
@@ -398,24 +589,40 @@ class CartoonCreateView(LoginRequiredMixin, generic.CreateView):
         return response
 
 
-class MovieDeleteView(LoginRequiredMixin, generic.DeleteView):
+class MovieDeleteView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.DeleteView
+):
     model = Movie
-    success_url = reverse_lazy("movies-list")
+    success_url = reverse_lazy("media:movies-list")
 
 
-class AnimeDeleteView(LoginRequiredMixin, generic.DeleteView):
+class AnimeDeleteView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.DeleteView
+):
     model = Anime
     success_url = reverse_lazy("media:anime-list")
 
 
-class SeriesDeleteView(LoginRequiredMixin, generic.DeleteView):
+class SeriesDeleteView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.DeleteView
+):
     model = Series
     success_url = reverse_lazy("media:series-list")
 
 
-class CartoonDeleteView(LoginRequiredMixin, generic.DeleteView):
+class CartoonDeleteView(
+    LoginRequiredMixin,
+    CatalogChangeMixin,
+    generic.DeleteView
+):
     model = Cartoon
-    success_url = reverse_lazy("cartoons-list")
+    success_url = reverse_lazy("media:cartoons-list")
 
 
 @login_required
@@ -443,7 +650,7 @@ def update_user_movie_data_view(request: HttpRequest, pk: int) -> HttpResponse:
     user = request.user
     movie = get_object_or_404(Movie, id=pk)
     user_movie_data = get_object_or_404(UserMovieData, user=user, movie=movie)
-    response = reverse_lazy("user-movies-list")
+    response = reverse_lazy("media:user-movies-list")
     template = "media/user_movie_data_form.html"
     return update_user_media_data(
         request=request,
@@ -507,7 +714,7 @@ def update_user_cartoon_data_view(
         user=user,
         cartoon=cartoon
     )
-    response = reverse_lazy("user-cartoons-list")
+    response = reverse_lazy("media:user-cartoons-list")
     template = "media/user_cartoon_data_form.html"
     return update_user_media_data(
         request=request,
@@ -519,61 +726,129 @@ def update_user_cartoon_data_view(
     )
 
 
-@login_required
-def add_movie(request: HttpRequest, pk: int) -> HttpResponse:
-    user = get_user_model().objects.get(id=request.user.id)
-    if Movie.objects.get(id=pk) in user.movies.all():
-        user.movies.remove(pk)
+def _toggle_ids(request: HttpRequest, pk: int | None) -> list[int]:
+    if pk is not None:
+        return [pk]
+    if request.content_type == "application/json":
+        ids = json.loads(request.body or "{}").get("ids", [])
     else:
-        user.movies.add(pk)
-    return HttpResponseRedirect(
-        request.META.get(
-            "HTTP_REFERER",
-            reverse_lazy("movies-list")
+        ids = request.POST.getlist("ids")
+    if not isinstance(ids, list):
+        raise ValueError("ids must be a list")
+    return [int(media_id) for media_id in ids]
+
+
+async def toggle_user_media(
+        request: HttpRequest,
+        media_model: type,
+        pk: int | None,
+        fallback_url: str
+) -> HttpResponse:
+    """Add or remove one title (``pk``) or every title listed in ``ids``
+    to/from the user's list.
+
+    Clients asking for JSON get the resulting membership of every title,
+    everyone else is redirected back.
+    """
+    if pk is None and request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    try:
+        ids = _toggle_ids(request, pk)
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({"error": "Invalid ids"}, status=400)
+
+    # The toggle locks the titles and writes in one transaction, which
+    # needs sync code.
+    in_list = await sync_to_async(media_model.toggle_in_user_list)(
+        request.user.id,
+        ids
+    )
+    missing = sorted(set(ids) - in_list.keys())
+    if "application/json" in request.headers.get("Accept", ""):
+        return JsonResponse(
+            {
+                "in_list": {str(key): value for key, value in in_list.items()},
+                "not_found": missing,
+            },
+            status=404 if pk is not None and missing else 200
         )
+    if pk is not None and missing:
+        raise Http404(f"No {media_model._meta.verbose_name} found")
+    return HttpResponseRedirect(
+        request.META.get("HTTP_REFERER", fallback_url)
     )
 
 
-@login_required
-def add_anime(request: HttpRequest, pk: int) -> HttpResponse:
-    user = get_user_model().objects.get(id=request.user.id)
-    if Anime.objects.get(id=pk) in user.anime.all():
-        user.anime.remove(pk)
-    else:
-        user.anime.add(pk)
-    return HttpResponseRedirect(
-        request.META.get(
-            "HTTP_REFERER",
-            reverse_lazy("media:anime-list")
-        )
+@async_login_required
+@require_http_methods(["GET", "POST"])
+async def add_movie(request: HttpRequest, pk: int = None) -> HttpResponse:
+    return await toggle_user_media(
+        request, Movie, pk, reverse_lazy("media:movies-list")
     )
 
 
-@login_required
-def add_series(request: HttpRequest, pk: int) -> HttpResponse:
-    user = get_user_model().objects.get(id=request.user.id)
-    if Series.objects.get(id=pk) in user.series.all():
-        user.series.remove(pk)
-    else:
-        user.series.add(pk)
-    return HttpResponseRedirect(
-        request.META.get(
-            "HTTP_REFERER",
-            reverse_lazy("media:series-list")
-        )
+@async_login_required
+@require_http_methods(["GET", "POST"])
+async def add_anime(request: HttpRequest, pk: int = None) -> HttpResponse:
+    return await toggle_user_media(
+        request, Anime, pk, reverse_lazy("media:anime-list")
+    )
+
+
+@async_login_required
+@require_http_methods(["GET", "POST"])
+async def add_series(request: HttpRequest, pk: int = None) -> HttpResponse:
+    return await toggle_user_media(
+        request, Series, pk, reverse_lazy("media:series-list")
+    )
+
+
+@async_login_required
+@require_http_methods(["GET", "POST"])
+async def add_cartoon(request: HttpRequest, pk: int = None) -> HttpResponse:
+    return await toggle_user_media(
+        request, Cartoon, pk, reverse_lazy("media:cartoons-list")
     )
 
 
 @login_required
-def add_cartoon(request: HttpRequest, pk: int) -> HttpResponse:
-    user = get_user_model().objects.get(id=request.user.id)
-    if Cartoon.objects.get(id=pk) in user.cartoons.all():
-        user.cartoons.remove(pk)
-    else:
-        user.cartoons.add(pk)
-    return HttpResponseRedirect(
-        request.META.get(
-            "HTTP_REFERER",
-            reverse_lazy("cartoons-list")
+def export_user_library(request: HttpRequest) -> HttpResponse:
+    export_format = request.GET.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse(
+            {"error": "Unknown export format", "formats": EXPORT_FORMATS},
+            status=400
         )
+    lines = render_user_data(iter_user_data(request.user.id), export_format)
+    if isinstance(request, ASGIRequest):
+        lines = aiter_lines(lines)
+    response = StreamingHttpResponse(
+        lines,
+        content_type=CONTENT_TYPES[canonical_format(export_format)]
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="my-media-hub.{export_format}"'
+    )
+    return response
+
+
+@staff_member_required
+def db_pool_stats(request: HttpRequest) -> JsonResponse:
+    """Connection pool usage of the worker process serving the request."""
+    return JsonResponse(pool_stats())
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """Request and connection pool metrics of this worker process in the
+    Prometheus text format, for staff or the configured bearer token."""
+    token = settings.MEDIA_METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    allowed = request.user.is_staff or (
+        token and hmac.compare_digest(authorization, f"Bearer {token}")
+    )
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(
+        registry.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8"
     )
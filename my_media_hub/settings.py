@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
 import dj_database_url
+import django
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "media.metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
@@ -90,9 +92,74 @@ DATABASES = {
     }
 }
 
-db_from_env = dj_database_url.config(conn_max_age=500, )
+db_from_env = dj_database_url.config(
+    conn_max_age=int(os.environ.get("DATABASE_CONN_MAX_AGE", 500)),
+    conn_health_checks=(
+        os.environ.get("DATABASE_CONN_HEALTH_CHECKS", "") != "False"
+    ),
+)
 DATABASES['default'].update(db_from_env)
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    if os.environ.get("DATABASE_PGBOUNCER", "") == "True":
+        # pgbouncer in transaction mode may run every transaction on a
+        # different server connection, which breaks server-side cursors.
+        DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+    elif int(os.environ.get("DATABASE_POOL_SIZE", 0)):
+        # Every worker process keeps up to DATABASE_POOL_SIZE connections,
+        # so the server sees at most workers x DATABASE_POOL_SIZE of them.
+        if django.VERSION >= (5, 1):
+            # Django's own pool needs psycopg 3 and psycopg_pool.
+            DATABASES["default"]["CONN_MAX_AGE"] = 0
+            DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+                "min_size": 0,
+                "max_size": int(os.environ["DATABASE_POOL_SIZE"]),
+                "timeout": float(os.environ.get("DATABASE_POOL_TIMEOUT", 30)),
+                "max_idle": float(
+                    os.environ.get("DATABASE_POOL_MAX_IDLE", 600)
+                ),
+            }
+        else:
+            DATABASES["default"].update({
+                "ENGINE": "media.pooled_postgresql",
+                "CONN_MAX_AGE": 0,
+                "POOL": {
+                    "MAX_SIZE": int(os.environ["DATABASE_POOL_SIZE"]),
+                    "TIMEOUT": float(
+                        os.environ.get("DATABASE_POOL_TIMEOUT", 30)
+                    ),
+                    "MAX_IDLE": float(
+                        os.environ.get("DATABASE_POOL_MAX_IDLE", 600)
+                    ),
+                },
+            })
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# Shared by every worker when REDIS_URL points at a Redis-protocol server
+# (Redis, Valkey, KeyDB); per-process memory otherwise, e.g. in tests.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+            "KEY_PREFIX": "my-media-hub",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "my-media-hub",
+        }
+    }
+
+# Sessions are read from the cache and only fall back to the database on a
+# miss; writes go to both.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -146,3 +213,11 @@ AUTH_USER_MODEL = "media.User"
 LOGIN_REDIRECT_URL = "/"
 
 CRISPY_TEMPLATE_PACK = "bootstrap4"
+
+# Request metrics served at /metrics, see media/metrics.py. Scrapers
+# authenticate with "Authorization: Bearer <MEDIA_METRICS_TOKEN>".
+MEDIA_METRICS_ENABLED = os.environ.get("MEDIA_METRICS", "") == "True"
+MEDIA_METRICS_SAMPLE_RATE = float(
+    os.environ.get("MEDIA_METRICS_SAMPLE_RATE", 1)
+)
+MEDIA_METRICS_TOKEN = os.environ.get("MEDIA_METRICS_TOKEN", "")